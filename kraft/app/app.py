@@ -41,6 +41,15 @@ import click
 import six
 
 import kraft.util as util
+from .fingerprint import build_fingerprint
+from .fingerprint import changed_since_prepare
+from .fingerprint import prepare_digests
+from .fingerprint import read_build_stamp
+from .fingerprint import remove_stamps
+from .fingerprint import restore_build
+from .fingerprint import store_build
+from .fingerprint import write_build_stamp
+from .fingerprint import write_prepare_stamp
 from kraft.arch import Architecture
 from kraft.component import Component
 from kraft.config import Config
@@ -398,8 +407,102 @@ class Application(Component):
 
         return True
 
+    def fingerprint(self):
+        """
+        Returns:
+            str: The fingerprint of the application's build, or None if the
+                application has not been configured.
+        """
+        try:
+            config_files = get_default_config_files(self.localdir)
+        except KraftFileNotFound:
+            config_files = list()
+
+        return build_fingerprint(
+            self.localdir, config_files, self.components
+        )
+
+    def restore_build(self):
+        """
+        Bring the images of the application up to date without running make,
+        either because they have already been built or because they were
+        built before with the same fingerprint.
+
+        Returns:
+            tuple: Whether the images are up to date, and the fingerprint.
+        """
+        fingerprint = self.fingerprint()
+        if fingerprint is None:
+            return False, None
+
+        builddir = os.path.join(self.localdir, UNIKRAFT_BUILDDIR)
+        binaries = [target.binary for target in self.binaries]
+
+        if read_build_stamp(builddir) == fingerprint \
+                and all(os.path.isfile(binary) for binary in binaries):
+            logger.info("Build is up to date")
+            return True, fingerprint
+
+        if restore_build(fingerprint, binaries):
+            logger.info("Restored build from the artifact cache")
+            write_build_stamp(builddir, fingerprint)
+            return True, fingerprint
+
+        return False, fingerprint
+
+    def store_build(self):
+        """
+        Keep the images which have just been built in the artifact cache.
+        """
+        # The build may have changed the application's files, so the
+        # fingerprint is taken again for the next build to match
+        fingerprint = self.fingerprint()
+        if fingerprint is None:
+            return
+
+        store_build(fingerprint, [target.binary for target in self.binaries])
+        write_build_stamp(
+            os.path.join(self.localdir, UNIKRAFT_BUILDDIR), fingerprint
+        )
+
+    def fetch_and_prepare(self, fetch=True, prepare=True, use_cache=True):
+        """
+        Run the fetch and prepare steps of the build.  Each step is a full
+        invocation of make, so both are skipped once they have run for the
+        current .config, Makefile.uk files and components, as long as what
+        they fetched and prepared is still in the build directory.
+        Otherwise, make itself only fetches and prepares the components
+        which need to.
+        """
+        builddir = os.path.join(self.localdir, UNIKRAFT_BUILDDIR)
+        digests = prepare_digests(self.localdir, self.components)
+
+        if use_cache and fetch and prepare:
+            changed = changed_since_prepare(builddir, digests)
+            if changed is not None and len(changed) == 0:
+                logger.debug("Skipping fetch and prepare, nothing changed")
+                return
+
+            if changed is not None:
+                logger.debug("Changed since last prepared: %s"
+                             % ", ".join(changed))
+
+        if fetch:
+            self.make('fetch')
+
+        if prepare:
+            self.make('prepare')
+
+        if fetch and prepare:
+            write_prepare_stamp(builddir, digests)
+
     @click.pass_context
-    def build(ctx, self, fetch=True, prepare=True, target=None, n_proc=0):
+    def build(ctx, self, fetch=True, prepare=True, target=None, n_proc=0,
+              use_cache=True):
+        # Only complete builds of the application are cached
+        if use_cache and target is None and self.restore_build()[0]:
+            return
+
         extra = []
         if n_proc is not None and n_proc > 0:
             extra.append('-j%s' % str(n_proc))
@@ -407,11 +510,7 @@ class Application(Component):
         if not fetch and not prepare:
             fetch = prepare = True
 
-        if fetch:
-            self.make('fetch')
-
-        if prepare:
-            self.make('prepare')
+        self.fetch_and_prepare(fetch, prepare, use_cache)
 
         # Create a no-op when target is False
         if target is False:
@@ -422,6 +521,9 @@ class Application(Component):
 
         self.make(extra)
 
+        if use_cache and target is None:
+            self.store_build()
+
     def init(self, create_makefile=False, force_create=False):
         """
         Initialize an app component's directory.
@@ -499,6 +601,8 @@ class Application(Component):
         Clean the application.
         """
 
+        remove_stamps(os.path.join(self.localdir, UNIKRAFT_BUILDDIR))
+
         if proper:
             self.make("properclean")
 
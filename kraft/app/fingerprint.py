@@ -0,0 +1,579 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Laboratories GmbH., NEC Corporation.
+#                     All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+import click
+
+from kraft.const import BUILD_ARTIFACT_IMAGES
+from kraft.const import BUILD_ARTIFACT_URL
+from kraft.const import BUILD_FINGERPRINT_VERSION
+from kraft.const import DOT_CONFIG
+from kraft.const import MAKEFILE_UK
+from kraft.const import UNIKERNEL_IMAGE_FORMAT_DBG
+from kraft.const import UNIKRAFT_BUILD_FINGERPRINT
+from kraft.const import UNIKRAFT_BUILDDIR
+from kraft.const import UNIKRAFT_PATCHESDIR
+from kraft.const import UNIKRAFT_PREPARE_STAMP
+from kraft.const import UNIKRAFT_WORKDIR
+from kraft.logger import logger
+from kraft.util import make_version
+
+# Files of the application which are written by the build itself
+APP_EXCLUDES = [UNIKRAFT_BUILDDIR, UNIKRAFT_WORKDIR, '.git']
+
+CONFIG_CROSS_COMPILE = re.compile(r'^CONFIG_CROSS_COMPILE="(.*)"$', re.M)
+
+_toolchains = dict()
+_toolchains_lock = threading.Lock()
+
+
+def git_head(localdir=None):
+    """
+    Return the commit checked out in localdir, read from the repository
+    rather than with git, or None if it is not a git repository.
+    """
+    gitdir = os.path.join(localdir, '.git')
+    try:
+        with open(os.path.join(gitdir, 'HEAD'), 'r') as f:
+            head = f.read().strip()
+
+        if not head.startswith('ref: '):
+            return head
+
+        ref = head[len('ref: '):]
+        if os.path.isfile(os.path.join(gitdir, ref)):
+            with open(os.path.join(gitdir, ref), 'r') as f:
+                return f.read().strip()
+
+        with open(os.path.join(gitdir, 'packed-refs'), 'r') as f:
+            for line in f:
+                if line.rstrip().endswith(' ' + ref):
+                    return line.split()[0]
+
+    except OSError:
+        pass
+
+    return None
+
+
+def git_dirty(localdir=None):
+    """
+    Return the files of the git repository at localdir which differ from the
+    commit checked out, including untracked files which are not ignored.
+    git only reads the files whose size or modification time differ from
+    those recorded in its index.
+
+    Returns:
+        list: The paths of the files relative to localdir, or None if the
+            status of the repository could not be determined.
+    """
+    try:
+        status = subprocess.run(
+            ["git", "-C", localdir, "status", "--porcelain", "-z",
+             "--untracked-files=all"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            stdin=subprocess.DEVNULL,
+            check=True
+        ).stdout
+
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    paths = list()
+    entries = iter(status.split(b"\0"))
+    for entry in entries:
+        if len(entry) < 4:
+            continue
+
+        paths.append(entry[3:].decode('utf-8', 'surrogateescape'))
+
+        # Renames and copies are followed by the path of the original
+        if entry[:1] in [b"R", b"C"]:
+            next(entries, None)
+
+    return sorted(paths)
+
+
+def component_digest(h=None, localdir=None):
+    """
+    Add the files of a component to the hash h.  Components which are git
+    checkouts are identified by their commit and the files which differ from
+    it, such that the rest of the tree need not be read.  Otherwise, every
+    file is identified by its size and modification time.
+    """
+    head = git_head(localdir)
+    dirty = git_dirty(localdir) if head is not None else None
+
+    if dirty is None:
+        tree_digest(h, localdir)
+        return
+
+    h.update(head.encode('utf-8') + b"\0")
+
+    for path in dirty:
+        h.update(path.encode('utf-8', 'surrogateescape') + b"\0")
+
+        try:
+            st = os.stat(os.path.join(localdir, path))
+            h.update(("%d:%d" % (st.st_size, st.st_mtime_ns))
+                     .encode('utf-8'))
+
+        except OSError:
+            h.update(b"missing")
+
+        h.update(b"\0")
+
+
+def tree_digest(h=None, root=None, exclude=[], content=False):
+    """
+    Add every file below root to the hash h, by its path and either its
+    content or, for large trees which are not expected to change, its size
+    and modification time.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        if dirpath == root:
+            dirnames[:] = [d for d in dirnames if d not in exclude]
+        dirnames[:] = sorted(d for d in dirnames if d != '.git')
+
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            h.update(os.path.relpath(path, root).encode('utf-8') + b"\0")
+
+            try:
+                if content:
+                    with open(path, 'rb') as f:
+                        for chunk in iter(lambda: f.read(1 << 20), b""):
+                            h.update(chunk)
+                else:
+                    st = os.stat(path)
+                    h.update(("%d:%d" % (st.st_size, st.st_mtime_ns))
+                             .encode('utf-8'))
+
+            except OSError:
+                h.update(b"missing")
+
+            h.update(b"\0")
+
+
+def cross_compile(dotconfig=None):
+    """
+    Return the prefix of the cross-compiler, selected the same way as by
+    Unikraft: CROSS_COMPILE if it is set in the environment, otherwise the
+    CONFIG_CROSS_COMPILE option of the application's .config.
+    """
+    if 'CROSS_COMPILE' in os.environ:
+        return os.environ['CROSS_COMPILE']
+
+    try:
+        with open(dotconfig, 'r') as f:
+            match = CONFIG_CROSS_COMPILE.search(f.read())
+
+    except (OSError, TypeError):
+        match = None
+
+    return match.group(1) if match is not None else ''
+
+
+def compiler_version(compiler=None):
+    """
+    Returns:
+        str: The first line printed by `compiler --version`, or None if the
+            compiler could not be run.
+    """
+    try:
+        output = subprocess.run(
+            [compiler, "--version"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            stdin=subprocess.DEVNULL,
+            universal_newlines=True,
+            check=True
+        ).stdout
+
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.debug("Could not determine the version of %s: %s" % (
+            compiler, e
+        ))
+        return None
+
+    return output.split("\n")[0]
+
+
+def toolchain_identity(dotconfig=None):
+    """
+    Return the versions of make and of the compiler set by UK_BUILD_ENGINE,
+    with the prefix of the cross-compiler configured for the application.
+    The version of each compiler is determined once per process.
+    """
+    compiler = "%s%s" % (
+        cross_compile(dotconfig),
+        os.environ.get('UK_BUILD_ENGINE', 'gcc')
+    )
+
+    with _toolchains_lock:
+        if compiler not in _toolchains:
+            _toolchains[compiler] = compiler_version(compiler)
+
+        version = _toolchains[compiler]
+
+    return "\n".join([make_version(), compiler, version or ''])
+
+
+def component_key(component=None):
+    """
+    Returns:
+        tuple: The type and name of a component, e.g. lib/lwip, and its
+            version and commit.
+    """
+    version = component.version
+    return (
+        "%s/%s" % (
+            component.type.shortname if component.type is not None else '',
+            component.name
+        ),
+        "%s:%s" % (
+            version.version if version is not None else '',
+            version.git_sha if version is not None else '',
+        )
+    )
+
+
+def build_fingerprint(localdir=None, config_files=[], components=[]):
+    """
+    Compute the fingerprint of the build of the application at localdir from
+    its .config, its configuration files and sources, the version and files
+    of each of its components and the toolchain.  Two builds with the same
+    fingerprint produce the same unikernel images.
+
+    Returns:
+        str: The fingerprint, or None if the application is not configured.
+    """
+    dotconfig = os.path.join(localdir, DOT_CONFIG)
+    if not os.path.isfile(dotconfig):
+        return None
+
+    h = hashlib.sha256()
+    h.update(("%d\n" % BUILD_FINGERPRINT_VERSION).encode('utf-8'))
+
+    for path in [dotconfig] + list(config_files):
+        with open(path, 'rb') as f:
+            h.update(f.read())
+        h.update(b"\0")
+
+    # The sources of the application are usually few and may be checked out
+    # anew, e.g. in CI, so they are compared by content
+    tree_digest(h, localdir, exclude=APP_EXCLUDES, content=True)
+
+    for component in components:
+        h.update(("%s@%s" % component_key(component)).encode('utf-8'))
+
+        localdir = component.localdir
+        if localdir is not None and os.path.isdir(localdir):
+            component_digest(h, localdir)
+
+        h.update(b"\0")
+
+    h.update(toolchain_identity(dotconfig).encode('utf-8'))
+
+    return h.hexdigest()
+
+
+def file_digest(path=None):
+    h = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+
+    except OSError:
+        return None
+
+    return h.hexdigest()
+
+
+def makefile_digest(h=None, localdir=None):
+    """
+    Add the Makefile.uk of the library at localdir and its patches to the
+    hash h.
+    """
+    h.update((file_digest(os.path.join(localdir, MAKEFILE_UK)) or '')
+             .encode('utf-8'))
+    tree_digest(h, os.path.join(localdir, UNIKRAFT_PATCHESDIR))
+
+
+def app_libraries(localdir=None):
+    """
+    Return the directories of the application at localdir which hold a
+    Makefile.uk: the application itself and any libraries kept within it.
+    """
+    libraries = list()
+    for dirpath, dirnames, filenames in os.walk(localdir):
+        if dirpath == localdir:
+            dirnames[:] = [d for d in dirnames if d not in APP_EXCLUDES]
+        dirnames[:] = sorted(d for d in dirnames if d != '.git')
+
+        if MAKEFILE_UK in filenames:
+            libraries.append(dirpath)
+
+    return libraries
+
+
+def prepare_digests(localdir=None, components=[]):
+    """
+    Digest what `make fetch` and `make prepare` depend on: the .config of the
+    application, the Makefile.uk and patches of the application and of the
+    libraries within it and, for each component, its version, its
+    Makefile.uk and its patches.
+
+    Returns:
+        dict: The digest of the .config, of the Makefile.uk of each library
+            of the application by its path and of each component by its type
+            and name.
+    """
+    digests = {
+        DOT_CONFIG: file_digest(os.path.join(localdir, DOT_CONFIG))
+    }
+
+    for libdir in app_libraries(localdir):
+        h = hashlib.sha256()
+        makefile_digest(h, libdir)
+        digests[os.path.relpath(os.path.join(libdir, MAKEFILE_UK), localdir)] = \
+            h.hexdigest()
+
+    for component in components:
+        name, version = component_key(component)
+        h = hashlib.sha256()
+        h.update(version.encode('utf-8'))
+
+        localdir = component.localdir
+        if localdir is not None and os.path.isdir(localdir):
+            h.update((git_head(localdir) or '').encode('utf-8'))
+            makefile_digest(h, localdir)
+
+        digests[name] = h.hexdigest()
+
+    return digests
+
+
+def prepare_outputs(builddir=None):
+    """
+    Return what fetch and prepare have left in the build directory of each
+    library, such as the origin it was fetched to and its stamps.  Files
+    which the build itself writes there are not included.
+    """
+    outputs = list()
+
+    try:
+        libdirs = sorted(os.listdir(builddir))
+    except OSError:
+        return outputs
+
+    for libdir in libdirs:
+        path = os.path.join(builddir, libdir)
+        if not os.path.isdir(path):
+            continue
+
+        for entry in sorted(os.listdir(path)):
+            if entry.startswith('.') or os.path.isdir(os.path.join(path, entry)):
+                outputs.append("%s/%s" % (libdir, entry))
+
+    return outputs
+
+
+def read_prepare_stamp(builddir=None):
+    try:
+        with open(os.path.join(builddir, UNIKRAFT_PREPARE_STAMP), 'r') as f:
+            stamp = json.load(f)
+
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(stamp, dict) or 'digests' not in stamp \
+            or 'outputs' not in stamp:
+        return None
+
+    return stamp
+
+
+def write_prepare_stamp(builddir=None, digests=None):
+    os.makedirs(builddir, exist_ok=True)
+    stamp = {
+        'digests': digests,
+        'outputs': prepare_outputs(builddir),
+    }
+
+    with open(os.path.join(builddir, UNIKRAFT_PREPARE_STAMP), 'w') as f:
+        json.dump(stamp, f)
+
+
+def remove_stamps(builddir=None):
+    for stamp in [UNIKRAFT_BUILD_FINGERPRINT, UNIKRAFT_PREPARE_STAMP]:
+        try:
+            os.remove(os.path.join(builddir, stamp))
+        except FileNotFoundError:
+            pass
+
+
+def changed_since_prepare(builddir=None, digests=None):
+    """
+    Returns:
+        list: What has changed since fetch and prepare last ran, including
+            any of their outputs which have since been removed, or None if
+            they have never run for this build directory.
+    """
+    stamp = read_prepare_stamp(builddir)
+    if stamp is None:
+        return None
+
+    previous = stamp['digests']
+    changed = sorted(
+        key for key in set(previous) | set(digests)
+        if previous.get(key) != digests.get(key)
+    )
+
+    # e.g. the build directory of a library was removed by hand
+    changed.extend(
+        output for output in stamp['outputs']
+        if not os.path.lexists(os.path.join(builddir, output))
+    )
+
+    return changed
+
+
+def build_images(binary=None):
+    """Return the images built for a target: its binary and debug binary."""
+    return [binary, UNIKERNEL_IMAGE_FORMAT_DBG % binary]
+
+
+def read_build_stamp(builddir=None):
+    try:
+        with open(os.path.join(builddir, UNIKRAFT_BUILD_FINGERPRINT), 'r') as f:
+            return f.read().strip()
+
+    except OSError:
+        return None
+
+
+def write_build_stamp(builddir=None, fingerprint=None):
+    os.makedirs(builddir, exist_ok=True)
+    with open(os.path.join(builddir, UNIKRAFT_BUILD_FINGERPRINT), 'w') as f:
+        f.write(fingerprint)
+
+
+@click.pass_context
+def restore_build(ctx, fingerprint=None, binaries=[]):
+    """
+    Restore the images built with the given fingerprint from the artifact
+    cache.  Nothing is restored unless every image which was stored for each
+    binary is still in the cache.
+
+    Returns:
+        bool: Whether all of the images were restored.
+    """
+    artifacts = ctx.obj.artifacts
+
+    stored = artifacts.lookup(
+        url=BUILD_ARTIFACT_URL % (fingerprint, BUILD_ARTIFACT_IMAGES)
+    )
+    if stored is None:
+        return False
+
+    try:
+        with open(stored, 'r') as f:
+            stored = json.load(f)
+
+    except (OSError, ValueError):
+        return False
+
+    images = list()
+    for binary in binaries:
+        if os.path.basename(binary) not in stored:
+            return False
+
+        for image in build_images(binary):
+            if os.path.basename(image) not in stored:
+                continue
+
+            url = BUILD_ARTIFACT_URL % (fingerprint, os.path.basename(image))
+            cached = artifacts.lookup(url=url)
+            if cached is None:
+                return False
+
+            images.append((cached, image))
+
+    for cached, image in images:
+        logger.debug("Restoring %s from the artifact cache..." % image)
+        os.makedirs(os.path.dirname(image), exist_ok=True)
+        shutil.copyfile(cached, image)
+        shutil.copymode(cached, image)
+
+    return True
+
+
+@click.pass_context
+def store_build(ctx, fingerprint=None, binaries=[]):
+    """
+    Add the images which have been built to the artifact cache, under the
+    fingerprint they were built with, together with the list of them.
+    """
+    artifacts = ctx.obj.artifacts
+    stored = list()
+
+    for binary in binaries:
+        for image in build_images(binary):
+            if not os.path.isfile(image):
+                continue
+
+            url = BUILD_ARTIFACT_URL % (fingerprint, os.path.basename(image))
+            incoming = artifacts.incoming(url)
+            shutil.copyfile(image, incoming)
+            shutil.copymode(image, incoming)
+
+            artifacts.add(url, file_digest(incoming), incoming)
+            stored.append(os.path.basename(image))
+
+    url = BUILD_ARTIFACT_URL % (fingerprint, BUILD_ARTIFACT_IMAGES)
+    incoming = artifacts.incoming(url)
+    with open(incoming, 'w') as f:
+        json.dump(sorted(stored), f)
+
+    artifacts.add(url, file_digest(incoming), incoming)
@@ -0,0 +1,260 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Laboratories GmbH., NEC Corporation.
+#                     All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from kraft.const import ARTIFACT_CACHE_MAX_SIZE
+from kraft.const import UNIKRAFT_ARTIFACTDIR
+from kraft.logger import logger
+from kraft.util import parse_size
+
+ARTIFACT_CACHE_FILE = "artifacts.sqlite"
+ARTIFACT_CACHE_INCOMING = "incoming"
+ARTIFACT_CACHE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS artifacts (
+        checksum TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        last_used REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS urls (
+        url TEXT PRIMARY KEY,
+        checksum TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS artifacts_last_used ON artifacts (last_used);
+"""
+
+
+class ArtifactCache(object):
+    """
+    The artifact cache keeps downloaded files, e.g. the tarballs of
+    components, in UK_CACHEDIR/artifacts under their SHA-256 checksum.  Only
+    verified files are added, so an artifact which is found by its checksum,
+    or by the URL it was downloaded from, never needs to be downloaded again.
+    Once the cache grows beyond its maximum size, the least recently used
+    artifacts are evicted.
+    """
+    _root = None
+    _db = None
+    _max_size = None
+    _lock = None
+
+    def __init__(self, cachedir=None, max_size=ARTIFACT_CACHE_MAX_SIZE):
+        self._root = os.path.join(cachedir, UNIKRAFT_ARTIFACTDIR)
+        self._max_size = parse_size(max_size)
+
+        os.makedirs(os.path.join(self._root, ARTIFACT_CACHE_INCOMING),
+                    exist_ok=True)
+
+        self._db = sqlite3.connect(
+            os.path.join(self._root, ARTIFACT_CACHE_FILE),
+            check_same_thread=False
+        )
+        self._db.executescript(ARTIFACT_CACHE_SCHEMA)
+
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    def path(self, checksum=None):
+        """
+        Return the path of the artifact with the given checksum.
+        """
+        return os.path.join(self._root, checksum)
+
+    def incoming(self, url=None):
+        """
+        Return the path to download an artifact to before it is verified and
+        added.  The path is the same for every attempt at downloading the URL,
+        such that an interrupted download can be resumed.
+        """
+        return os.path.join(
+            self._root,
+            ARTIFACT_CACHE_INCOMING,
+            hashlib.sha1(url.encode('utf-8')).hexdigest()
+        )
+
+    def lookup(self, url=None, checksum=None):
+        """
+        Find an artifact by its checksum or, if its checksum is not known, by
+        the URL it was downloaded from.  The artifact is marked as used.
+
+        Returns:
+            str: The path of the artifact or None if it is not in the cache.
+        """
+        with self._lock, self._db:
+            if checksum is None and url is not None:
+                row = self._db.execute(
+                    "SELECT checksum FROM urls WHERE url = ?", (url,)
+                ).fetchone()
+                if row is not None:
+                    checksum = row[0]
+
+            if checksum is None:
+                return None
+
+            path = self.path(checksum)
+            if not os.path.exists(path):
+                self._forget(checksum)
+                return None
+
+            self._db.execute(
+                "UPDATE artifacts SET last_used = ? WHERE checksum = ?",
+                (time.time(), checksum)
+            )
+
+        return path
+
+    def add(self, url=None, checksum=None, path=None):
+        """
+        Move a verified file into the cache and evict the least recently used
+        artifacts if the cache has grown too large.
+
+        Returns:
+            str: The path of the artifact.
+        """
+        size = os.path.getsize(path)
+        os.replace(path, self.path(checksum))
+
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?)",
+                (checksum, size, time.time())
+            )
+            if url is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO urls VALUES (?, ?)",
+                    (url, checksum)
+                )
+
+        if self._max_size is not None:
+            self.evict(self._max_size, keep=[checksum])
+
+        return self.path(checksum)
+
+    def _forget(self, checksum=None):
+        self._db.execute(
+            "DELETE FROM artifacts WHERE checksum = ?", (checksum,)
+        )
+        self._db.execute(
+            "DELETE FROM urls WHERE checksum = ?", (checksum,)
+        )
+
+    def remove(self, checksum=None):
+        with self._lock, self._db:
+            self._forget(checksum)
+
+        try:
+            os.remove(self.path(checksum))
+        except FileNotFoundError:
+            pass
+
+    def entries(self):
+        """
+        Returns:
+            list: The checksum, size, time of last use and URLs of every
+                artifact, from the least to the most recently used.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT a.checksum, a.size, a.last_used, group_concat(u.url) "
+                "FROM artifacts a LEFT JOIN urls u ON a.checksum = u.checksum "
+                "GROUP BY a.checksum ORDER BY a.last_used"
+            ).fetchall()
+
+        return [(checksum, size, last_used, urls.split(",") if urls else [])
+                for checksum, size, last_used, urls in rows]
+
+    def usage(self):
+        """
+        Returns:
+            tuple: The number and the total size of the artifacts.
+        """
+        with self._lock:
+            count, size = self._db.execute(
+                "SELECT count(*), coalesce(sum(size), 0) FROM artifacts"
+            ).fetchone()
+
+        return count, size
+
+    def evict(self, max_size=0, keep=None):
+        """
+        Remove the least recently used artifacts until the cache is no larger
+        than max_size bytes.
+
+        Returns:
+            list: The checksums of the removed artifacts.
+        """
+        _, size = self.usage()
+
+        removed = list()
+        for checksum, artifact_size, _, _ in self.entries():
+            if size <= max_size:
+                break
+            if keep is not None and checksum in keep:
+                continue
+
+            logger.debug("Evicting %s from the artifact cache..." % checksum)
+            self.remove(checksum)
+            removed.append(checksum)
+            size -= artifact_size
+
+        return removed
+
+    def prune(self, older_than=None):
+        """
+        Remove the artifacts which have not been used for older_than seconds,
+        or every artifact if older_than is None, together with any incomplete
+        downloads.
+
+        Returns:
+            list: The checksums of the removed artifacts.
+        """
+        removed = list()
+        for checksum, _, last_used, _ in self.entries():
+            if older_than is None or time.time() - last_used > older_than:
+                self.remove(checksum)
+                removed.append(checksum)
+
+        if older_than is None:
+            incoming = os.path.join(self._root, ARTIFACT_CACHE_INCOMING)
+            for f in os.listdir(incoming):
+                os.remove(os.path.join(incoming, f))
+
+        return removed
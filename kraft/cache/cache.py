@@ -0,0 +1,455 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Laboratories GmbH., NEC Corporation.
+#                     All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import tempfile
+import threading
+
+import six
+from fcache.cache import FileCache
+
+from kraft import __program__
+from kraft.logger import logger
+from kraft.manifest import Manifest
+from kraft.types import ComponentType
+
+INDEX_KEY = "index"
+INDEX_BY_NAME = "name:%s/%s"
+INDEX_BY_LOCALDIR = "localdir:%s"
+
+
+class AtomicFileCache(FileCache):
+    """
+    A FileCache which writes each entry to a temporary file in the same
+    directory before renaming it into place, such that an entry is never
+    left partially written if kraft is interrupted.  FileCache itself creates
+    the temporary file in the system's temporary directory, from which the
+    rename is neither atomic nor possible across filesystems.
+    """
+
+    def _write_to_file(self, filename, bytesvalue):
+        fh, tmp = tempfile.mkstemp(
+            dir=os.path.dirname(filename),
+            prefix=".%s." % os.path.basename(filename)
+        )
+
+        try:
+            with os.fdopen(fh, self._flag) as f:
+                f.write(self._dumps(bytesvalue))
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(tmp, filename)
+
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        if self._mode:
+            os.chmod(filename, self._mode)
+
+    def _all_filenames(self):
+        # Skip temporary files of writes which are in progress or which were
+        # interrupted
+        return [
+            filename for filename in super(AtomicFileCache, self)._all_filenames()
+            if not os.path.basename(filename).startswith(".")
+        ]
+
+
+class Cache(object):
+    _cache = {}
+    _index = {}
+    _index_entries = None
+    _index_mtime = None
+    _manifests = {}
+    _generations = {}
+    _hits = 0
+    _misses = 0
+    _dirty = False
+    _cachedir = None
+    _cache_lock = None
+    _save_item_lock = None
+    @property
+    def cache_lock(self): return self._cache_lock
+
+    def __init__(self, environment):
+        """
+        Initializes the cache so that kraft does not have to constantly
+        retrieve informational lists about unikraft, its available
+        architectures, platforms, libraries and supported applications.
+        """
+
+        self._cachedir = environment.get('UK_CACHEDIR')
+
+        # Initiaize a cache instance
+        self._cache = AtomicFileCache(
+            app_cache_dir=self._cachedir,
+            appname=__program__,
+            flag='cs'
+        )
+
+        # Initialize the secondary index which maps the type and name of a
+        # component, as well as its local directory, to the origin(s) which
+        # provide it.  This prevents having to unpickle every manifest in the
+        # cache in order to find a single component.  The index is stored as
+        # a single entry so that it can be read in one go.
+        self._index = AtomicFileCache(
+            app_cache_dir=self._cachedir,
+            appname="%s.index" % __program__,
+            flag='cs'
+        )
+        self._index_entries = None
+        self._index_mtime = None
+
+        # Decoded manifests are kept in memory for the lifetime of the process
+        # so that repeated reads do not re-read and unpickle the same file.
+        # Each entry is invalidated by the file's modification time and the
+        # generation of the origin, which is incremented on every save.
+        self._manifests = dict()
+        self._generations = dict()
+        self._hits = 0
+        self._misses = 0
+        self._dirty = False
+
+        self._cache_lock = threading.Lock()
+        self._save_item_lock = threading.Lock()
+
+    @property
+    def cache(self):
+        ret = None
+        with self._cache_lock:
+            ret = self._cache
+        return ret
+
+    @property
+    def hits(self): return self._hits
+
+    @property
+    def misses(self): return self._misses
+
+    @property
+    def dirty(self):
+        """
+        Whether the cache has been modified since it was last synchronized.
+        """
+        return self._dirty
+
+    def _mtime(self, origin, cache=None):
+        """
+        Return the modification time of the file backing the origin, or None
+        if the origin is not in the cache.
+        """
+        if cache is None:
+            cache = self._cache
+
+        filename = cache._key_to_filename(cache._encode_key(origin))
+
+        try:
+            return os.stat(filename).st_mtime_ns
+        except OSError:
+            return None
+
+    def get(self, origin=None):
+        ret = None
+        if not isinstance(origin, six.string_types):
+            return ret
+
+        with self._cache_lock:
+            mtime = self._mtime(origin)
+            if mtime is None:
+                return ret
+
+            generation = self._generations.get(origin, 0)
+            entry = self._manifests.get(origin, None)
+            if entry is not None and entry[0] == generation \
+                    and entry[1] == mtime:
+                self._hits += 1
+                return entry[2]
+
+            logger.debug("Retrieving %s from cache..." % origin)
+            self._misses += 1
+            ret = self._cache[origin]
+            self._manifests[origin] = (generation, mtime, ret)
+
+        return ret
+
+    def _load_index(self):
+        """
+        Return the index, only reading it from disk if it has been modified
+        since it was last read.  The cache lock must be held.
+        """
+        mtime = self._mtime(INDEX_KEY, self._index)
+        if mtime is None:
+            self._index_entries = dict()
+        elif self._index_entries is None or mtime != self._index_mtime:
+            self._index_entries = self._index[INDEX_KEY]
+
+        self._index_mtime = mtime
+        return self._index_entries
+
+    def _save_index(self, entries):
+        self._index[INDEX_KEY] = entries
+        self._index_entries = entries
+        self._index_mtime = self._mtime(INDEX_KEY, self._index)
+
+    def _unindex_origin(self, entries, origin):
+        """
+        Remove every entry of the origin from the index, such that components
+        which are no longer part of its manifest are not left behind.
+        """
+        for key in list(entries.keys()):
+            entries[key] = [e for e in entries[key] if e[0] != origin]
+            if len(entries[key]) == 0:
+                del entries[key]
+
+    def _index_items(self, entries, origin, manifest):
+        for name, item in manifest.items():
+            for key in [INDEX_BY_NAME % (item.type.shortname, item.name),
+                        INDEX_BY_LOCALDIR % item.localdir]:
+                if key not in entries:
+                    entries[key] = list()
+                if (origin, name) not in entries[key]:
+                    entries[key].append((origin, name))
+
+    def _index_entries_or_reindex(self):
+        with self._cache_lock:
+            entries = self._load_index()
+
+        # Caches populated before the index existed need to be indexed once
+        if len(entries) == 0 and len(self._cache) > 0:
+            entries = self.reindex()
+
+        return entries
+
+    def _index_lookup(self, key, entries=None):
+        """
+        Return the components recorded in the index under the given key.  The
+        index only records the origin and name of each component; resolving
+        them through get() is cheap as decoded manifests are kept in memory,
+        so each origin is only unpickled once per process.
+        """
+        if entries is None:
+            entries = self._index_entries_or_reindex()
+
+        items = list()
+        for origin, name in entries.get(key, list()):
+            manifest = self.get(origin)
+            if manifest is None:
+                continue
+
+            # Stale entries are skipped, the item may have since been removed
+            item = manifest.get_item(name)
+            if item is not None:
+                items.append(item)
+
+        return items
+
+    def reindex(self):
+        """
+        Rebuild the secondary index from every manifest in the cache.
+        """
+        logger.debug("Re-indexing cache...")
+
+        entries = dict()
+        for origin in self._cache:
+            manifest = self.get(origin)
+            if manifest is not None:
+                self._index_items(entries, origin, manifest)
+
+        with self._cache_lock:
+            self._save_index(entries)
+
+        return entries
+
+    def find_items_by_name(self, type=None, name=None):
+        """
+        Find all known components with the given name, optionally restricted
+        to a given component type.
+
+        Args:
+            type (str or ComponentType):  The type of the component.
+            name (str):  The name of the component.
+
+        Returns:
+            list: The ManifestItems matching the type and name.
+        """
+        if isinstance(type, ComponentType):
+            type = type.shortname
+
+        if type is not None:
+            types = [type]
+        else:
+            types = [t.shortname for t in ComponentType.__members__.values()]
+
+        items = list()
+        for t in types:
+            items.extend(self._index_lookup(INDEX_BY_NAME % (t, name)))
+
+        return items
+
+    def find_item_by_name(self, type=None, name=None):
+        items = self.find_items_by_name(type=type, name=name)
+        if len(items) > 0:
+            return items[0]
+
+        return None
+
+    def find_items_by_names(self, specs=None):
+        """
+        Find the components of many (type, name) pairs at once, e.g. all of
+        the components of an application, reading the index only once.
+
+        Args:
+            specs (list):  The (type, name) pairs of the components.
+
+        Returns:
+            dict: The first ManifestItem found for each (type, name) pair, or
+                None if the component is unknown.
+        """
+        entries = self._index_entries_or_reindex()
+        items = dict()
+
+        for type, name in specs or list():
+            if isinstance(type, ComponentType):
+                type = type.shortname
+
+            if type is not None:
+                types = [type]
+            else:
+                types = [t.shortname for t in ComponentType.__members__.values()]
+
+            items[(type, name)] = None
+            for t in types:
+                found = self._index_lookup(INDEX_BY_NAME % (t, name), entries)
+                if len(found) > 0:
+                    items[(type, name)] = found[0]
+                    break
+
+        return items
+
+    def find_item_by_localdir(self, localdir=None):
+        """
+        Find the component which is located at the given local directory.
+
+        Args:
+            localdir (str):  The directory of the component on disk.
+
+        Returns:
+            ManifestItem: The component or None if it is unknown.
+        """
+        if localdir is None:
+            return None
+
+        for item in self._index_lookup(INDEX_BY_LOCALDIR % localdir):
+            if item.localdir == localdir:
+                return item
+
+        # The local directory of a component depends on the working directory
+        # it was indexed from, so fall back to matching on its name.
+        for item in self.find_items_by_name(name=os.path.basename(localdir)):
+            if item.localdir == localdir:
+                return item
+
+        return None
+
+    def all(self):
+        return self.cache
+
+    def save(self, origin, manifest):
+        if not isinstance(origin, six.string_types):
+            raise TypeError("origin is not string")
+        if not isinstance(manifest, Manifest):
+            raise TypeError("Invalid manifest")
+
+        with self._cache_lock:
+            logger.debug("Saving %s into cache..." % manifest)
+            self._cache[origin] = manifest
+            self._dirty = True
+
+            entries = self._load_index()
+            self._unindex_origin(entries, origin)
+            self._index_items(entries, origin, manifest)
+            self._save_index(entries)
+
+            generation = self._generations.get(origin, 0) + 1
+            self._generations[origin] = generation
+            self._manifests[origin] = (
+                generation, self._mtime(origin), manifest
+            )
+
+    def save_item(self, origin, item):
+        """
+        Save a single component of an origin.  The file cache stores the
+        manifest of an origin as a whole, so it is re-written in full.
+        Components may be saved from several threads at once, e.g. whilst
+        they are pulled, so the manifest is read and re-written by one thread
+        at a time such that no component is lost.
+        """
+        with self._save_item_lock:
+            manifest = self.get(origin)
+            if manifest is None:
+                manifest = Manifest(
+                    manifest=origin
+                )
+
+            manifest.add_item(item)
+            self.save(origin, manifest)
+
+    def sync(self):
+        logger.debug("Synchronizing cache with filesystem...")
+
+        with self._cache_lock:
+            self._cache.sync()
+            self._dirty = False
+
+    def purge(self):
+        logger.debug("Purging cache...")
+
+        with self._cache_lock:
+            self._cache.clear()
+            self._index.clear()
+            self._index_entries = None
+            self._manifests.clear()
+            self._dirty = True
+
+    def is_stale(self):
+        """
+        Determine if the list of remote repositories is stale.  Return a boolean
+        value if at least one repository is marked as stale.
+        """
+
+        logger.debug("Checking cache for staleness...")
+        return True if len(self.all()) == 0 else False
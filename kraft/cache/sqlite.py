@@ -0,0 +1,393 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Laboratories GmbH., NEC Corporation.
+#                     All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import pickle
+import sqlite3
+import threading
+
+import six
+from fcache.cache import FileCache
+
+from .cache import Cache
+from kraft import __program__
+from kraft.logger import logger
+from kraft.manifest import Manifest
+from kraft.types import ComponentType
+
+SQLITE_CACHE_FILE = "%s.sqlite" % __program__
+SQLITE_CACHE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    CREATE TABLE IF NOT EXISTS manifests (
+        origin TEXT PRIMARY KEY,
+        manifest_checksum TEXT
+    );
+    CREATE TABLE IF NOT EXISTS items (
+        origin TEXT NOT NULL,
+        name TEXT NOT NULL,
+        type TEXT,
+        localdir TEXT,
+        data BLOB NOT NULL,
+        PRIMARY KEY (origin, name)
+    );
+    CREATE INDEX IF NOT EXISTS items_type_name ON items (type, name);
+    CREATE INDEX IF NOT EXISTS items_localdir ON items (localdir);
+"""
+
+
+class SQLiteCache(Cache):
+    """
+    The SQLite cache stores every known origin in a single database file with
+    one row per component.  Unlike the file cache, finding a component or
+    updating a single component does not require reading or re-writing the
+    complete manifest of its origin.
+    """
+    _db = None
+    _data_version = None
+    _migrated = False
+
+    def __init__(self, environment):
+        self._cachedir = environment.get('UK_CACHEDIR')
+
+        if not os.path.isdir(self._cachedir):
+            os.makedirs(self._cachedir)
+
+        self._db = sqlite3.connect(
+            os.path.join(self._cachedir, SQLITE_CACHE_FILE),
+            check_same_thread=False
+        )
+        self._db.executescript(SQLITE_CACHE_SCHEMA)
+
+        self._manifests = dict()
+        self._generations = dict()
+        self._hits = 0
+        self._misses = 0
+        self._dirty = False
+        self._data_version = None
+        self._migrated = False
+
+        self._cache_lock = threading.Lock()
+        self._save_item_lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return self._db
+
+    def _invalidate(self):
+        """
+        Drop decoded manifests if another process has written to the database
+        since they were read.
+        """
+        data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._manifests.clear()
+            self._data_version = data_version
+
+    def _memoized(self, origin):
+        entry = self._manifests.get(origin, None)
+        if entry is not None and entry[0] == self._generations.get(origin, 0):
+            return entry[1]
+
+        return None
+
+    def migrate(self):
+        """
+        Import the manifests of an existing file cache into the database.
+        This is performed once, the first time the database is used.  The
+        import and the record of it are written in a single transaction such
+        that an interrupted migration is attempted again.
+        """
+        with self._cache_lock:
+            if self._migrated:
+                return
+
+            row = self._db.execute(
+                "SELECT value FROM meta WHERE key = 'migrated'"
+            ).fetchone()
+
+            if row is None:
+                with self._db:
+                    self._import_file_cache()
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) "
+                        "VALUES ('migrated', '1')"
+                    )
+
+            self._migrated = True
+
+    def _import_file_cache(self):
+        legacy = os.path.join(self._cachedir, "cache")
+        if not os.path.isdir(legacy) or len(os.listdir(legacy)) == 0:
+            return
+
+        logger.info("Migrating cache to: %s" % SQLITE_CACHE_FILE)
+
+        filecache = FileCache(
+            app_cache_dir=self._cachedir,
+            appname=__program__,
+            flag='r'
+        )
+
+        for origin in filecache:
+            self._save_manifest(origin, filecache[origin])
+
+        self._dirty = True
+
+    def get(self, origin=None):
+        ret = None
+        if not isinstance(origin, six.string_types):
+            return ret
+
+        if not self._migrated:
+            self.migrate()
+
+        with self._cache_lock:
+            self._invalidate()
+
+            ret = self._memoized(origin)
+            if ret is not None:
+                self._hits += 1
+                return ret
+
+            row = self._db.execute(
+                "SELECT manifest_checksum FROM manifests WHERE origin = ?",
+                (origin,)
+            ).fetchone()
+            if row is None:
+                return ret
+
+            logger.debug("Retrieving %s from cache..." % origin)
+            self._misses += 1
+
+            ret = Manifest(
+                manifest=origin,
+                manifest_checksum=row[0]
+            )
+
+            for data, in self._db.execute(
+                    "SELECT data FROM items WHERE origin = ?", (origin,)):
+                ret.add_item(pickle.loads(data))
+
+            self._manifests[origin] = (self._generations.get(origin, 0), ret)
+
+        return ret
+
+    def _find_items(self, query, params):
+        if not self._migrated:
+            self.migrate()
+
+        items = list()
+
+        with self._cache_lock:
+            self._invalidate()
+
+            for origin, name, data in self._db.execute(query, params):
+                # The memoized manifest of the origin may predate the row,
+                # in which case the row itself is used
+                manifest = self._memoized(origin)
+                item = manifest.get_item(name) if manifest is not None \
+                    else None
+
+                if item is not None:
+                    self._hits += 1
+                    items.append(item)
+                else:
+                    self._misses += 1
+                    items.append(pickle.loads(data))
+
+        return items
+
+    def reindex(self):
+        # Indices are maintained by the database
+        pass
+
+    def find_items_by_name(self, type=None, name=None):
+        if isinstance(type, ComponentType):
+            type = type.shortname
+
+        if type is None:
+            return self._find_items(
+                "SELECT origin, name, data FROM items WHERE name = ?",
+                (name,)
+            )
+
+        return self._find_items(
+            "SELECT origin, name, data FROM items WHERE type = ? AND name = ?",
+            (type, name)
+        )
+
+    def find_items_by_names(self, specs=None):
+        specs = [
+            (t.shortname if isinstance(t, ComponentType) else t, name)
+            for t, name in specs or list()
+        ]
+        items = dict((spec, None) for spec in specs)
+
+        names = list(set(name for _, name in specs))
+        if len(names) == 0:
+            return items
+
+        # All components are retrieved with a single query
+        found = self._find_items(
+            "SELECT origin, name, data FROM items WHERE name IN (%s)"
+            % ", ".join("?" * len(names)), names
+        )
+
+        for item in found:
+            for key in [(item.type.shortname, item.name), (None, item.name)]:
+                if key in items and items[key] is None:
+                    items[key] = item
+
+        return items
+
+    def find_item_by_localdir(self, localdir=None):
+        if localdir is None:
+            return None
+
+        for item in self._find_items(
+                "SELECT origin, name, data FROM items WHERE localdir = ?",
+                (localdir,)):
+            if item.localdir == localdir:
+                return item
+
+        # The local directory of a component depends on the working directory
+        # it was saved from, so fall back to matching on its name.
+        for item in self.find_items_by_name(name=os.path.basename(localdir)):
+            if item.localdir == localdir:
+                return item
+
+        return None
+
+    def all(self):
+        if not self._migrated:
+            self.migrate()
+
+        with self._cache_lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT origin FROM manifests"
+            )]
+
+    def _save_item(self, origin, item):
+        self._db.execute(
+            "INSERT OR REPLACE INTO items (origin, name, type, localdir, data) "
+            "VALUES (?, ?, ?, ?, ?)", (
+                origin,
+                item.name,
+                item.type.shortname,
+                item.localdir,
+                pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+            )
+        )
+
+    def _save_manifest(self, origin, manifest):
+        self._db.execute(
+            "INSERT OR REPLACE INTO manifests (origin, manifest_checksum) "
+            "VALUES (?, ?)", (origin, manifest.manifest_checksum)
+        )
+
+        names = list()
+        for name, item in manifest.items():
+            names.append(name)
+            self._save_item(origin, item)
+
+        # Remove components which are no longer part of the manifest
+        self._db.execute(
+            "DELETE FROM items WHERE origin = ? AND name NOT IN (%s)"
+            % ", ".join("?" * len(names)), [origin] + names
+        )
+
+    def save(self, origin, manifest):
+        if not isinstance(origin, six.string_types):
+            raise TypeError("origin is not string")
+        if not isinstance(manifest, Manifest):
+            raise TypeError("Invalid manifest")
+
+        with self._cache_lock:
+            logger.debug("Saving %s into cache..." % manifest)
+
+            with self._db:
+                self._save_manifest(origin, manifest)
+
+            self._dirty = True
+            generation = self._generations.get(origin, 0) + 1
+            self._generations[origin] = generation
+            self._manifests[origin] = (generation, manifest)
+
+    def save_item(self, origin, item):
+        """
+        Save a single component of an origin without re-writing the rest of
+        the origin's manifest.
+        """
+        with self._save_item_lock:
+            manifest = self.get(origin)
+
+            with self._cache_lock:
+                logger.debug("Saving %s into cache..." % item)
+
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR IGNORE INTO manifests (origin) VALUES (?)",
+                        (origin,)
+                    )
+                    self._save_item(origin, item)
+
+                self._dirty = True
+                if manifest is not None:
+                    manifest.add_item(item)
+                    self._generations[origin] = \
+                        self._generations.get(origin, 0) + 1
+                    self._manifests[origin] = (
+                        self._generations[origin], manifest
+                    )
+
+    def sync(self):
+        logger.debug("Synchronizing cache with filesystem...")
+
+        with self._cache_lock:
+            self._db.commit()
+            self._dirty = False
+
+    def purge(self):
+        logger.debug("Purging cache...")
+
+        with self._cache_lock:
+            with self._db:
+                self._db.execute("DELETE FROM items")
+                self._db.execute("DELETE FROM manifests")
+
+            self._manifests.clear()
+            self._dirty = True
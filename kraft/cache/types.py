@@ -0,0 +1,87 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Laboratories GmbH., NEC Corporation.
+#                     All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+from enum import Enum
+
+from .cache import Cache
+from .sqlite import SQLiteCache
+from kraft.logger import logger
+
+
+class CacheBackendType(Enum):
+    FILE   = ("file"  , Cache)        # noqa
+    SQLITE = ("sqlite", SQLiteCache)  # noqa
+
+    @property
+    def name(self):
+        return self.value[0]
+
+    @property
+    def cls(self):
+        return self.value[1]
+
+
+def cache_backend_name_to_enum(name=None):
+    if name is None:
+        return None
+
+    for _, backend in CacheBackendType.__members__.items():
+        if backend.name == name:
+            return backend
+
+    return None
+
+
+def new_cache(environment, backend=None):
+    """
+    Instantiate the cache using the desired backend.
+
+    Args:
+        environment:  The environment which provides UK_CACHEDIR.
+        backend (str):  The name of the backend, defaults to the file cache.
+
+    Returns:
+        The cache instance.
+    """
+    if backend is None:
+        return CacheBackendType.FILE.cls(environment)
+
+    backend_type = cache_backend_name_to_enum(backend)
+    if backend_type is None:
+        logger.warning("Unknown cache backend '%s', using: %s" % (
+            backend, CacheBackendType.FILE.name
+        ))
+        backend_type = CacheBackendType.FILE
+
+    return backend_type.cls(environment)
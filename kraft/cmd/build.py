@@ -44,7 +44,7 @@ from kraft.logger import logger
 
 @click.pass_context
 def kraft_build(ctx, workdir=None, fetch=True, prepare=True, target=None,
-                fast=False, force_build=False):
+                fast=False, force_build=False, use_cache=True):
     """
     """
     if workdir is None or os.path.exists(workdir) is False:
@@ -67,7 +67,8 @@ def kraft_build(ctx, workdir=None, fetch=True, prepare=True, target=None,
         fetch=fetch,
         prepare=prepare,
         target=target,
-        n_proc=n_proc
+        n_proc=n_proc,
+        use_cache=use_cache
     )
 
 
@@ -92,10 +93,15 @@ def kraft_build(ctx, workdir=None, fetch=True, prepare=True, target=None,
     help='Force the build of the unikernel.',
     is_flag=True
 )
+@click.option(
+    '--no-cache', 'no_cache',
+    help='Run make even if the unikernel has been built before.',
+    is_flag=True
+)
 @click.argument('target', required=False)
 @click.pass_context
 def cmd_build(ctx, fetch=True, prepare=True, target=None, fast=False,
-              force_build=False):
+              force_build=False, no_cache=False):
     """
     Builds the Unikraft application for the target architecture and platform.
     """
@@ -109,7 +115,8 @@ def cmd_build(ctx, fetch=True, prepare=True, target=None, fast=False,
             prepare=prepare,
             target=target,
             fast=fast,
-            force_build=force_build
+            force_build=force_build,
+            use_cache=not no_cache
         )
 
     except Exception as e:
@@ -0,0 +1,171 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Laboratories GmbH., NEC Corporation.
+#                     All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import sys
+from datetime import datetime
+
+import click
+
+from kraft.const import UNIKRAFT_GIT_MIRRORDIR
+from kraft.logger import logger
+from kraft.util import parse_size
+from kraft.util import pretty_columns
+from kraft.util import pretty_size
+from kraft.util import prettydate
+
+
+def du(path=None):
+    size = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                size += os.lstat(os.path.join(root, f)).st_size
+            except OSError:
+                pass
+
+    return size
+
+
+@click.group(name='cache', short_help='Manage downloaded artifacts.')
+@click.pass_context
+def grp_cache(ctx):
+    """
+    Inspect and prune the artifacts which kraft keeps in UK_CACHEDIR, such as
+    the tarballs of downloaded components.
+    """
+    pass
+
+
+@click.command('show', short_help='Show the contents of the cache.')
+@click.pass_context
+def cmd_cache_show(ctx):
+    """
+    Show the artifacts in the cache, from the least to the most recently
+    used, and how much space they take up.
+    """
+    artifacts = ctx.obj.artifacts
+
+    data = [[
+        click.style('CHECKSUM', fg='white'),
+        click.style('SIZE', fg='white'),
+        click.style('LAST USED', fg='white'),
+        click.style('URL', fg='white'),
+    ]]
+
+    for checksum, size, last_used, urls in artifacts.entries():
+        data.append([
+            click.style(checksum[:12], fg='white'),
+            click.style(pretty_size(size), fg='white'),
+            click.style(prettydate(
+                datetime.utcfromtimestamp(last_used)
+            ), fg='white'),
+            click.style(", ".join(urls), fg='white'),
+        ])
+
+    if len(data) > 1:
+        click.echo(pretty_columns(data)[:-1])
+
+    count, size = artifacts.usage()
+    logger.info("%d artifacts using %s of %s" % (
+        count,
+        pretty_size(size),
+        pretty_size(artifacts.max_size)
+        if artifacts.max_size is not None else "unlimited"
+    ))
+
+    # Mirrors are shared with the checkouts of components and are therefore
+    # never pruned
+    mirrors = os.path.join(
+        ctx.obj.env.get('UK_CACHEDIR'), UNIKRAFT_GIT_MIRRORDIR
+    )
+    if os.path.isdir(mirrors):
+        logger.info("git mirrors using %s" % pretty_size(du(mirrors)))
+
+
+@click.command('prune', short_help='Remove artifacts from the cache.')
+@click.option(
+    '--all', '-a', 'prune_all',
+    help='Remove every artifact.',
+    is_flag=True
+)
+@click.option(
+    '--older-than', '-o', 'older_than',
+    help='Remove artifacts which have not been used for this many days.',
+    type=click.IntRange(min=0),
+    metavar="DAYS"
+)
+@click.option(
+    '--max-size', '-s', 'max_size',
+    help='Remove the least recently used artifacts down to this size.',
+    metavar="SIZE"
+)
+@click.pass_context
+def cmd_cache_prune(ctx, prune_all=False, older_than=None, max_size=None):
+    """
+    Remove artifacts from the cache.  Without any options, the least
+    recently used artifacts are removed until the cache is within the size
+    set by `cache/max_size` in ~/.kraftrc.
+
+        $ kraft cache prune --older-than 30
+
+        $ kraft cache prune --max-size 512M
+
+    """
+    artifacts = ctx.obj.artifacts
+
+    try:
+        if prune_all:
+            removed = artifacts.prune()
+        elif older_than is not None:
+            removed = artifacts.prune(older_than=older_than * 24 * 60 * 60)
+        elif max_size is not None:
+            removed = artifacts.evict(parse_size(max_size))
+        elif artifacts.max_size is not None:
+            removed = artifacts.evict(artifacts.max_size)
+        else:
+            removed = list()
+
+    except ValueError as e:
+        logger.critical(str(e))
+        sys.exit(1)
+
+    count, size = artifacts.usage()
+    logger.info("Removed %d artifacts, %d remaining using %s" % (
+        len(removed), count, pretty_size(size)
+    ))
+
+
+grp_cache.add_command(cmd_cache_show)
+grp_cache.add_command(cmd_cache_prune)
@@ -72,12 +72,9 @@ def kraft_app_init(ctx, appdir=None, name=None, plat=None, arch=None,
 
         _, template_name, _, version = break_component_naming_format(template_app)
 
-        for manifest_origin in ctx.obj.cache.all():
-            manifest = ctx.obj.cache.get(manifest_origin)
-
-            for _, item in manifest.items():
-                if item.name == template_name and item.type == ComponentType.APP:
-                    app_manifest = item
+        for item in ctx.obj.cache.find_items_by_name(
+                type=ComponentType.APP, name=template_name):
+            app_manifest = item
 
         if app_manifest is None:
             raise UnknownApplicationTemplateName(template_app)
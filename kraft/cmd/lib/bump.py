@@ -33,17 +33,121 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import os
+import shutil
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 import click
 
+from kraft.app import Application
+from kraft.cmd.init import kraft_app_init
 from kraft.cmd.list import kraft_list_preflight
 from kraft.cmd.list.pull import kraft_download_via_manifest
+from kraft.const import KRAFTRC_LIB_BUILD_CONCURRENCY
+from kraft.const import KRAFTRC_LIB_CONCURRENCY
+from kraft.const import LIB_BUILD_CONCURRENCY
+from kraft.const import LIB_BUILD_TEMPLATE
+from kraft.const import LIB_PROBE_CONCURRENCY
+from kraft.error import LibraryBuildError
 from kraft.lib import Library
+from kraft.lib import LibraryManager
 from kraft.logger import logger
 from kraft.manifest import maniest_from_name
 from kraft.types import ComponentType
 from kraft.util import ClickOptionMutex
+from kraft.util import pretty_columns
+
+
+@click.pass_context
+def kraft_lib_build_template(ctx, template=LIB_BUILD_TEMPLATE):
+    """
+    Fetch the template application into a scratch directory, from which it
+    can be copied for each library which is built.
+
+    Returns:
+        str: The directory of the template application.
+    """
+    templatedir = tempfile.mkdtemp(prefix="kraft-%s-" % template)
+
+    try:
+        kraft_app_init(appdir=templatedir, template_app=template)
+
+    except BaseException:
+        shutil.rmtree(templatedir, ignore_errors=True)
+        raise
+
+    return templatedir
+
+
+@click.pass_context
+def kraft_lib_build(ctx, lib=None, template=LIB_BUILD_TEMPLATE,
+                    templatedir=None):
+    """
+    Build the template application against a library in a scratch directory,
+    to test that the library still builds.  The template is copied from
+    templatedir if it has already been fetched, see
+    `kraft_lib_build_template`, and fetched otherwise.
+
+    Raises:
+        LibraryBuildError: The application could not be built.
+    """
+    scratchdir = tempfile.mkdtemp(prefix="kraft-%s-" % lib.name)
+    appdir = os.path.join(scratchdir, template)
+
+    try:
+        if templatedir is not None:
+            shutil.copytree(templatedir, appdir, symlinks=True)
+        else:
+            kraft_app_init(appdir=appdir, template_app=template)
+
+        app = Application.from_workdir(appdir)
+        app.config.libraries.add(Library(
+            name=lib.name,
+            localdir=lib.localdir
+        ))
+        app.configure()
+        app.build(use_cache=False)
+
+    # Each step is run by make, which exits on failure
+    except SystemExit as e:
+        raise LibraryBuildError(lib.name, e.code)
+
+    finally:
+        shutil.rmtree(scratchdir, ignore_errors=True)
+
+
+@click.pass_context
+def kraft_lib_build_all(ctx, libs=None, concurrency=LIB_BUILD_CONCURRENCY):
+    """
+    Build the template application against each library at the same time.
+    The template application is only fetched once for all of them.
+
+    Returns:
+        dict: The libraries which could not be built and their error.
+    """
+    templatedir = kraft_lib_build_template()
+
+    def build(lib):
+        with ctx:
+            logger.info("Building %s..." % lib.name)
+            kraft_lib_build(lib, templatedir=templatedir)
+
+    errors = dict()
+    try:
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            futures = [(lib, executor.submit(build, lib)) for lib in libs]
+
+            for lib, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[lib] = e
+
+    finally:
+        shutil.rmtree(templatedir, ignore_errors=True)
+
+    return errors
 
 
 @click.pass_context
@@ -56,12 +160,119 @@ def kraft_lib_bump(ctx, workdir=None, version=None, bump_all=False,
         workdir = os.getcwd()
 
     library = Library.from_workdir(workdir)
-    library.bump(
+    current_version = library.origin_version
+
+    version = library.bump(
         version=version,
         fast_forward=fast_forward,
         force_version=force_version,
     )
 
+    if build and version != current_version:
+        kraft_lib_build(library)
+
+    return version
+
+
+@click.pass_context
+def kraft_lib_bump_all(ctx, force_version=False, fast_forward=False,
+                       build=False):
+    """
+    Bump every library downloaded to UK_LIBS.  The remotes of all libraries
+    are probed at the same time before any is bumped, and the libraries which
+    were bumped are built at the same time afterwards.
+
+    Returns:
+        bool: Whether every library was bumped, and built, successfully.
+    """
+    libraries = LibraryManager.from_libsdir()
+    if len(libraries.all()) == 0:
+        logger.warning("No libraries in %s" % ctx.obj.env.get('UK_LIBS'))
+        return True
+
+    logger.info("Probing %d libraries..." % len(libraries.all()))
+    errors = dict(libraries.probe_remote_versions(
+        concurrency=int(ctx.obj.settings.get(
+            KRAFTRC_LIB_CONCURRENCY, LIB_PROBE_CONCURRENCY
+        ))
+    ))
+
+    # Bumping may prompt for each library, so they are edited in turn
+    report = dict()
+    bumped = list()
+
+    for lib in libraries.all():
+        if lib in errors:
+            report[lib] = ("", "", "failed: %s" % errors[lib])
+            continue
+
+        current_version = lib.origin_version
+
+        if not (ctx.obj.assume_yes or click.confirm("Bump %s?" % lib.name)):
+            report[lib] = (current_version, "", "skipped")
+            continue
+
+        try:
+            version = lib.bump(
+                fast_forward=fast_forward,
+                force_version=force_version,
+            )
+
+        except Exception as e:
+            errors[lib] = e
+            report[lib] = (current_version, "", "failed: %s" % e)
+            continue
+
+        if version == current_version:
+            report[lib] = (current_version, version, "up to date")
+        else:
+            report[lib] = (current_version, version, "bumped")
+            bumped.append(lib)
+
+    if build and len(bumped) > 0:
+        failed = kraft_lib_build_all(
+            libs=bumped,
+            concurrency=int(ctx.obj.settings.get(
+                KRAFTRC_LIB_BUILD_CONCURRENCY, LIB_BUILD_CONCURRENCY
+            ))
+        )
+
+        for lib in bumped:
+            current_version, version, _ = report[lib]
+            if lib in failed:
+                errors[lib] = failed[lib]
+                report[lib] = (current_version, version,
+                               "build failed: %s" % failed[lib])
+            else:
+                report[lib] = (current_version, version, "bumped and built")
+
+    kraft_lib_bump_report(libraries.all(), report, errors)
+
+    return len(errors) == 0
+
+
+def kraft_lib_bump_report(libs=None, report=None, errors=None):
+    """
+    Print the versions and status of each library after a bump.
+    """
+    data = [[
+        click.style('LIBRARY', fg='white'),
+        click.style('CURRENT', fg='white'),
+        click.style('BUMPED', fg='white'),
+        click.style('STATUS', fg='white'),
+    ]]
+
+    for lib in libs:
+        current_version, version, status = report[lib]
+        data.append([
+            click.style(lib.name, fg='red' if lib in errors else 'green'),
+            click.style(current_version or "", fg='white'),
+            click.style(version or "", fg='white'),
+            click.style(status, fg='white'),
+        ])
+
+    click.echo(pretty_columns(data)[:-1])
+
 
 @click.command('bump', short_help='Update a library\'s version (experimental).')  # noqa: C901
 @click.option(
@@ -115,28 +326,12 @@ def cmd_lib_bump(ctx, lib=None, version=None, bump_all=False,
 
     try:
         if bump_all:
-            for manifest_origin in ctx.obj.cache.all():
-                manifest = ctx.obj.cache.get(manifest_origin)
-
-                for _, item in manifest.items():
-                    if item.type != ComponentType.LIB.shortname:
-                        continue
-
-                    if not (ctx.obj.assume_yes or click.confirm(
-                            "Bump %s?" % item.name)):
-                        continue
-
-                    kraft_download_via_manifest(
-                        manifest=item,
-                        use_git=True
-                    )
-
-                    kraft_lib_bump(
-                        workdir=item.localdir,
-                        force_version=force_version,
-                        fast_forward=fast_forward,
-                        build=build
-                    )
+            if not kraft_lib_bump_all(
+                force_version=force_version,
+                fast_forward=fast_forward,
+                build=build
+            ):
+                sys.exit(1)
 
         elif lib is not None and os.path.isdir(lib):
             kraft_lib_bump(
@@ -144,6 +339,7 @@ def cmd_lib_bump(ctx, lib=None, version=None, bump_all=False,
                 version=version,
                 force_version=force_version,
                 fast_forward=fast_forward,
+                build=build
             )
 
         elif lib is not None:
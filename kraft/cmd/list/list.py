@@ -221,7 +221,7 @@ def cmd_list(ctx, show_installed=False, show_core=False, show_plats=False,
                     if member.plural not in data_json:
                         data_json[member.plural] = []
 
-                    row_json = row.__getstate__()
+                    row_json = row.to_dict()
 
                     if not show_installed or (installed and show_installed):
                         data_json[member.plural].append(row_json)
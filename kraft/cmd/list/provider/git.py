@@ -33,6 +33,7 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import hashlib
 import os
 import sys
 import uuid
@@ -47,17 +48,27 @@ from git import InvalidGitRepositoryError
 from git import NoSuchPathError
 from git import RemoteProgress
 from git import Repo as GitRepo
-from git.cmd import Git
 
+from .provider import cached_manifest
 from .provider import ListProvider
+from kraft.const import GIT_FETCH_DEPTH
+from kraft.const import GIT_SHA_PATTERN
 from kraft.const import GIT_UNIKRAFT_TAG_PATTERN
 from kraft.const import GIT_UNIKRAFT_TAG_RELEASE
+from kraft.const import KRAFTRC_LIST_GIT_DEPTH
+from kraft.const import KRAFTRC_LIST_GIT_FILTER
+from kraft.const import KRAFTRC_LIST_GIT_MIRROR
 from kraft.const import UNIKRAFT_RELEASE_STABLE
 from kraft.const import UNIKRAFT_RELEASE_STABLE_VARIATIONS
 from kraft.const import UNIKRAFT_RELEASE_STAGING
 from kraft.logger import logger
 from kraft.types import break_component_naming_format
+from kraft.util import ConcurrencyBudget
 from kraft.util import ErrorPropagatingThread
+from kraft.util import git_borrow_objects
+from kraft.util import git_ls_remote
+from kraft.util import git_mirror
+from kraft.util import git_mirror_path
 
 
 class GitProgressBar(RemoteProgress):
@@ -85,17 +96,16 @@ class GitListProvider(ListProvider):
         if origin is None:
             return False
 
-        g = Git()
-
         try:
-            g.ls_remote(origin)
+            git_ls_remote(origin)
         except GitCommandError:
             return False
 
         return True
 
     @click.pass_context
-    def probe(ctx, self, origin=None, items=None, return_threads=False):
+    def probe(ctx, self, origin=None, items=None, return_threads=False,
+              budget=None):
         # TODO: There should be a work around to fix this import loop cycle
         from kraft.manifest import Manifest
 
@@ -106,31 +116,53 @@ class GitListProvider(ListProvider):
         if items is None:
             items = Queue()
 
-        manifest = ctx.obj.cache.get(origin)
+        manifest = cached_manifest(ctx, origin)
 
         if manifest is None:
             manifest = Manifest(
                 manifest=origin
             )
 
+        if budget is None:
+            budget = ConcurrencyBudget()
+
+        def probe_repo(ctx, origin):
+            with budget:
+                if budget.cancelled is False:
+                    items.put(get_component_from_git_repo(ctx, origin))
+
         if return_threads:
             thread = ErrorPropagatingThread(
-                target=lambda *arg: items.put(get_component_from_git_repo(*arg)),
+                target=probe_repo,
                 args=(
                     ctx,
                     origin
-                )
+                ),
+                daemon=True
             )
             threads.append(thread)
             thread.start()
         else:
-            items.put(get_component_from_git_repo(ctx, origin))
+            probe_repo(ctx, origin)
 
         return items, threads
 
-    @classmethod
-    def download(cls, manifest=None, localdir=None, version=None,
-            override_existing=False, **kwargs):
+    @click.pass_context
+    def download(ctx, self, manifest=None, localdir=None, version=None,
+            override_existing=False, depth=None, git_filter=None, **kwargs):
+        """
+        Fetch and check out a version of a component.  Only the version's tag
+        or commit is fetched, with `depth` commits of history (`list/git_depth`
+        in ~/.kraftrc, 1 by default).  A depth of 0 fetches the full history,
+        deepening a previously shallow download.  A partial clone filter, e.g.
+        blob:none, can be set with `git_filter` or `list/git_filter`.
+        """
+        if depth is None:
+            depth = int(ctx.obj.settings.get(
+                KRAFTRC_LIST_GIT_DEPTH, GIT_FETCH_DEPTH
+            ))
+        if git_filter is None:
+            git_filter = ctx.obj.settings.get(KRAFTRC_LIST_GIT_FILTER, None)
 
         try:
             repo = GitRepo(localdir)
@@ -144,27 +176,106 @@ class GitListProvider(ListProvider):
             except GitCommandError as e:
                 pass
 
-        try:
-            if sys.stdout.isatty():
-                repo.remotes.origin.fetch(
-                    progress=GitProgressBar(
-                        label="%s@%s" % (str(manifest), version.version)
-                    )
+        ref = version.git_sha
+        shallow = os.path.exists(os.path.join(repo.git_dir, 'shallow'))
+
+        # A commit which has already been fetched does not need to be fetched
+        # again, unless the history is being deepened
+        if ref is not None and GIT_SHA_PATTERN.match(ref) is not None \
+                and not (depth == 0 and shallow) and git_has_commit(repo, ref):
+            logger.debug("Already fetched %s@%s" % (manifest.git, ref))
+            repo.git.checkout(ref)
+            return
+
+        options = dict()
+        if depth > 0:
+            options['depth'] = depth
+        elif shallow:
+            options['unshallow'] = True
+        if git_filter is not None:
+            options['filter'] = git_filter
+
+        label = "%s@%s" % (str(manifest), version.version)
+
+        # Versions are fetched into a mirror of the repository shared by all
+        # of the component's checkouts, each of which borrows the mirror's
+        # objects instead of storing its own copy.  Partial clones are not
+        # mirrored as they need to fetch missing objects from their origin.
+        cachedir = ctx.obj.env.get('UK_CACHEDIR', None)
+        if ref is not None and git_filter is None and cachedir is not None \
+                and manifest.git is not None \
+                and ctx.obj.settings.get(KRAFTRC_LIST_GIT_MIRROR, True):
+            mirrordir = git_mirror_path(cachedir, manifest.git)
+
+            try:
+                sha = git_mirror(
+                    manifest.git, mirrordir, ref, depth,
+                    progress=GitProgressBar(label=label)
+                    if sys.stdout.isatty() else None
                 )
-            else:
-                for fetch_info in repo.remotes.origin.fetch():
-                    logger.debug("Updated %s %s to %s" % (
-                        manifest.git,
-                        fetch_info.ref,
-                        fetch_info.commit
+                git_borrow_objects(repo, mirrordir)
+                repo.git.fetch(mirrordir, sha, **options)
+                repo.git.checkout(sha)
+                return
+
+            except GitCommandError as e:
+                logger.debug("Could not fetch %s via its mirror: %s" % (
+                    manifest.git, str(e)
+                ))
+
+        try:
+            if ref is not None:
+                try:
+                    git_fetch(repo, label, ref, **options)
+                    ref = 'FETCH_HEAD'
+
+                # Not every server allows fetching a commit by its hash, in
+                # which case all of the remote's references are fetched
+                except GitCommandError as e:
+                    logger.debug("Could not fetch %s of %s: %s" % (
+                        ref, manifest.git, str(e)
                     ))
+                    options.pop('depth', None)
+                    git_fetch(repo, label, **options)
+
+            else:
+                git_fetch(repo, label, **options)
 
             # self.last_checked = datetime.now()
         except (GitCommandError, AttributeError) as e:
             logger.error("Could not fetch %s: %s" % (manifest.git, str(e)))
 
-        if version.git_sha is not None:
-            repo.git.checkout(version.git_sha)
+        if ref is not None:
+            repo.git.checkout(ref)
+
+
+def git_has_commit(repo=None, ref=None):
+    try:
+        repo.git.cat_file('-e', '%s^{commit}' % ref)
+        return True
+    except GitCommandError:
+        return False
+
+
+def git_fetch(repo=None, label=None, *refspec, **options):
+    """
+    Fetch the given references, or every reference if none are given, from
+    the origin of repo.
+    """
+    if sys.stdout.isatty():
+        repo.remotes.origin.fetch(
+            refspec=list(refspec) or None,
+            progress=GitProgressBar(label=label),
+            **options
+        )
+    else:
+        for fetch_info in repo.remotes.origin.fetch(
+                refspec=list(refspec) or None, **options):
+            logger.debug("Updated %s %s to %s" % (
+                repo.remotes.origin.url,
+                fetch_info.ref,
+                fetch_info.commit
+            ))
 
 
 def get_component_from_git_repo(ctx, origin=None):
@@ -195,6 +306,19 @@ def get_component_from_git_repo(ctx, origin=None):
             ]) % origin
         )
 
+    # The hash of all references of the repository is used to skip
+    # enumerating its tags and branches if nothing has changed
+    refs_hash = hashlib.sha1(
+        git_ls_remote(origin).encode('utf-8')
+    ).hexdigest()
+
+    manifest = cached_manifest(ctx, origin)
+    if manifest is not None:
+        cached = manifest.get_item(_name)
+        if cached is not None and cached.refs_hash == refs_hash:
+            logger.debug("Unchanged: %s" % origin)
+            return cached
+
     localdir = None
     if os.path.exists(origin):
         localdir = origin
@@ -207,7 +331,8 @@ def get_component_from_git_repo(ctx, origin=None):
         dist=UNIKRAFT_RELEASE_STABLE,
         git=origin,
         manifest=origin,
-        localdir=localdir
+        localdir=localdir,
+        refs_hash=refs_hash
     )
 
     stable = ManifestItemDistribution(
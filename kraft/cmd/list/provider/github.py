@@ -37,22 +37,39 @@ import fnmatch
 import os
 import re
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from queue import Queue
 from urllib.parse import urlparse
 
 import click
+import requests
 from github import Github
+from github.GithubException import RateLimitExceededException
 from github.Repository import Repository
 
 from .git import GitListProvider
+from .github_graphql import get_components_from_github_graphql
+from .provider import cached_manifest
 from .tarball import TarballListProvider
 from kraft.const import GIT_UNIKRAFT_TAG_PATTERN
+from kraft.const import GITHUB_API_REPO
 from kraft.const import GITHUB_ORIGIN
+from kraft.const import GITHUB_PER_PAGE
+from kraft.const import GITHUB_RATELIMIT_MAX_WAIT
+from kraft.const import GITHUB_RATELIMIT_RETRIES
 from kraft.const import GITHUB_TARBALL
+from kraft.const import GITHUB_TIMESTAMP_FORMAT
+from kraft.const import HTTP_TIMEOUT
+from kraft.const import KRAFTRC_LIST_CONCURRENCY
+from kraft.const import KRAFTRC_LIST_GITHUB_API
+from kraft.const import LIST_CONCURRENCY
 from kraft.const import UNIKRAFT_RELEASE_STABLE
 from kraft.logger import logger
 from kraft.types import break_component_naming_format
+from kraft.util import ConcurrencyBudget
 from kraft.util import ErrorPropagatingThread
+from kraft.util import http_get
 
 
 class GitHubListProvider(GitListProvider):
@@ -74,10 +91,8 @@ class GitHubListProvider(GitListProvider):
         return False
 
     @click.pass_context
-    def probe(ctx, self, origin=None, items=None, return_threads=False):
-        # TODO: There should be a work around to fix this import loop cycle
-        from kraft.manifest import Manifest
-
+    def probe(ctx, self, origin=None, items=None, return_threads=False,
+              budget=None):
         if self.is_type(origin) is False:
             return []
 
@@ -85,18 +100,16 @@ class GitHubListProvider(GitListProvider):
         if items is None:
             items = Queue()
 
-        manifest = ctx.obj.cache.get(origin)
-
-        if manifest is None:
-            manifest = Manifest(
-                manifest=origin
-            )
-
         uri = urlparse(origin)
 
         # Is the origin from GitHub?
         if uri.netloc == GITHUB_ORIGIN:
-            github_api = Github(ctx.obj.env.get('UK_KRAFT_GITHUB_TOKEN', None))
+            # A single client is shared by all workers probing this origin
+            github_api = Github(
+                ctx.obj.env.get('UK_KRAFT_GITHUB_TOKEN', None),
+                per_page=GITHUB_PER_PAGE,
+                timeout=HTTP_TIMEOUT
+            )
             github_org = uri.path.split('/')[1]
             github_repo = uri.path.split('/')[2]
 
@@ -107,70 +120,302 @@ class GitHubListProvider(GitListProvider):
             # Does the origin contain a wildcard in the repo name?
             if "*" in github_repo:
                 logger.info("Populating via wildcard: %s" % origin)
-
-                org = github_api.get_organization(github_org)
-                repos = org.get_repos()
-
-                for repo in repos:
-                    if return_threads:
-                        thread = ErrorPropagatingThread(
-                            target=lambda *arg: items.put(get_component_from_github(*arg)),
-                            args=(
-                                ctx,
-                                origin,
-                                github_org,
-                                repo.name,
-                            )
-                        )
-                        threads.append(thread)
-                        thread.start()
-                    else:
-                        items.put(get_component_from_github(
-                            ctx,
-                            origin,
-                            github_org,
-                            repo.name
-                        ))
             else:
                 logger.info("Using direct repository: %s" % origin)
 
-                if return_threads:
-                    thread = ErrorPropagatingThread(
-                        target=lambda *arg: items.put(get_component_from_github(*arg)),
-                        args=(
-                            ctx,
-                            origin,
-                            github_org,
-                            github_repo,
-                        )
-                    )
-                    threads.append(thread)
-                    thread.start()
+            target = get_components_from_github
+            args = (ctx, origin, github_org, github_repo, items, github_api,
+                    budget)
+
+            # GraphQL fetches whole pages of repositories with their refs and
+            # releases at once but can only be used with an access token
+            if ctx.obj.settings.get(KRAFTRC_LIST_GITHUB_API) == "graphql":
+                if ctx.obj.env.get('UK_KRAFT_GITHUB_TOKEN', None) is None:
+                    logger.warning("".join([
+                        "GitHub's GraphQL API requires a personal access ",
+                        "token to be set via UK_KRAFT_GITHUB_TOKEN, falling ",
+                        "back to the REST API..."]))
                 else:
-                    items.put(get_component_from_github(
-                        ctx,
-                        origin,
-                        github_org,
-                        github_repo
-                    ))
+                    target = get_components_from_github_graphql
+                    args = (ctx, origin, github_org, github_repo, items,
+                            budget)
+
+            if return_threads:
+                thread = ErrorPropagatingThread(
+                    target=target, args=args, daemon=True
+                )
+                threads.append(thread)
+                thread.start()
+            else:
+                target(*args)
 
         return items, threads
 
     @click.pass_context
     def download(ctx, self, manifest=None, localdir=None, version=None,
-            override_existing=False, use_git=False):
-        # TODO: Fix Tarball downloader
-        use_git = True
+            override_existing=False, use_git=False, **kwargs):
+        # A tarball only holds a snapshot of a version, so components which
+        # were previously checked out with git continue to use git
+        if version.tarball is None or (localdir is not None and
+                os.path.isdir(os.path.join(localdir, '.git'))):
+            use_git = True
+
         provider = (GitListProvider if use_git else TarballListProvider)()
         provider.download(
             manifest=manifest,
             localdir=localdir,
             version=version,
-            override_existing=override_existing
+            override_existing=override_existing,
+            **kwargs
+        )
+
+
+class GitHubRateLimit(object):
+    """
+    Paces requests made with a shared GitHub client using the rate limit
+    reported in the headers of the API's responses.  As the number of
+    remaining requests runs low, requests are spread out until the limit
+    resets.  Once the limit is exceeded and does not reset within
+    `max_wait` seconds, all further requests are abandoned.
+    """
+
+    _github_api = None
+    _reserve = 0
+    _max_wait = 0
+    _retries = 0
+    _exceeded = None
+
+    def __init__(self, github_api, reserve=0,
+                 max_wait=GITHUB_RATELIMIT_MAX_WAIT,
+                 retries=GITHUB_RATELIMIT_RETRIES):
+        self._github_api = github_api
+        self._reserve = reserve
+        self._max_wait = max_wait
+        self._retries = retries
+        self._exceeded = threading.Event()
+
+    @property
+    def exceeded(self):
+        return self._exceeded.is_set()
+
+    def set_exceeded(self):
+        """
+        Abandon all further requests, e.g. when a request made outside of
+        call() has exceeded the rate limit.
+        """
+        self._exceeded.set()
+
+    def _reset_delay(self, e=None):
+        headers = getattr(e, 'headers', None) or dict()
+        headers = {k.lower(): v for k, v in headers.items()}
+
+        if 'retry-after' in headers:
+            return int(headers['retry-after'])
+
+        reset = headers.get(
+            'x-ratelimit-reset',
+            self._github_api.rate_limiting_resettime
+        )
+
+        return max(int(reset) - time.time(), 1)
+
+    def throttle(self):
+        remaining, _ = self._github_api.rate_limiting
+        if remaining < 0 or remaining > self._reserve:
+            return
+
+        delay = self._reset_delay() / max(remaining, 1)
+        logger.debug("%d GitHub API requests remaining, waiting %.1fs..." % (
+            remaining, delay
+        ))
+        time.sleep(min(delay, self._max_wait))
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Call fn, retrying it if the rate limit is exceeded and resets soon.
+        Returns None if the rate limit has been exceeded.
+        """
+        for attempt in range(self._retries + 1):
+            if self.exceeded:
+                return None
+
+            self.throttle()
+
+            try:
+                return fn(*args, **kwargs)
+
+            except RateLimitExceededException as e:
+                delay = self._reset_delay(e)
+                if delay > self._max_wait or attempt == self._retries:
+                    self.set_exceeded()
+                    return None
+
+                logger.debug("GitHub rate limit exceeded, retrying in %ds..." %
+                    delay)
+                time.sleep(delay)
+
+        return None
+
+
+def get_components_from_github(ctx, origin=None, org=None, repo=None,
+                               items=None, github_api=None, budget=None):
+    """
+    Probe every repository of a GitHub origin using a bounded pool of workers
+    and place each discovered component into items.  The size of the pool is
+    set by `list/concurrency` in ~/.kraftrc.  If a budget is given, it limits
+    the number of repositories probed at once together with other origins.
+    """
+    if github_api is None:
+        github_api = Github(
+            ctx.obj.env.get('UK_KRAFT_GITHUB_TOKEN', None),
+            per_page=GITHUB_PER_PAGE,
+            timeout=HTTP_TIMEOUT
+        )
+
+    concurrency = int(ctx.obj.settings.get(
+        KRAFTRC_LIST_CONCURRENCY, LIST_CONCURRENCY
+    ))
+    if concurrency < 1:
+        concurrency = 1
+
+    if budget is None:
+        budget = ConcurrencyBudget(concurrency)
+
+    # Components which have not changed upstream are re-used from the cache
+    manifest = cached_manifest(ctx, origin)
+
+    # Keep enough requests in reserve for the probes already in flight, each
+    # of which make up to four requests
+    ratelimit = GitHubRateLimit(github_api, reserve=concurrency * 4)
+
+    def probe_repo(repo):
+        with ctx, budget:
+            if budget.cancelled:
+                return None
+
+            return ratelimit.call(
+                get_component_from_github,
+                ctx, origin, org, repo, github_api, manifest
+            )
+
+    skipped = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = list()
+
+        if "*" in repo:
+            reobj = re.compile(fnmatch.translate(repo))
+
+            # Listing the organisation is run within the budget so that it
+            # counts towards the origin's deadline
+            try:
+                with budget:
+                    for r in github_api.get_organization(org).get_repos():
+                        if reobj.match(r.name) is not None:
+                            futures.append(
+                                (r.name, executor.submit(probe_repo, r))
+                            )
+
+            except RateLimitExceededException:
+                ratelimit.set_exceeded()
+
+        else:
+            futures.append((repo, executor.submit(probe_repo, repo)))
+
+        for name, future in futures:
+            # A repository which cannot be probed does not prevent the rest of
+            # the origin from being listed
+            try:
+                item = future.result()
+            except Exception as e:
+                logger.warning("Could not probe %s/%s: %s" % (org, name, e))
+                continue
+
+            if item is not None:
+                items.put(item)
+            elif ratelimit.exceeded:
+                skipped += 1
+
+    if ratelimit.exceeded:
+        logger.warning("".join([
+            "GitHub rate limit exceeded, %d repositories of %s were " % (
+                skipped, origin
+            ),
+            "skipped.  You can tell kraft to use a personal access token by ",
+            "setting the UK_KRAFT_GITHUB_TOKEN environmental variable."]))
+
+    return items
+
+
+def github_timestamp(timestamp=None):
+    if timestamp is None:
+        return None
+
+    return timestamp.strftime(GITHUB_TIMESTAMP_FORMAT)
+
+
+def github_repo_modified(ctx, org=None, repo=None, etag=None):
+    """
+    Conditionally request the metadata of a repository from the GitHub API.
+    If the repository has not changed since the ETag was issued, the API
+    responds with 304 Not Modified which does not count towards the rate
+    limit.
+
+    Returns:
+        tuple: Whether the repository was modified, its ETag and the time it
+            was last pushed to, or None if it was not modified.
+    """
+    headers = {
+        'Accept': 'application/vnd.github.v3+json'
+    }
+
+    token = ctx.obj.env.get('UK_KRAFT_GITHUB_TOKEN', None)
+    if token is not None:
+        headers['Authorization'] = 'token %s' % token
+    if etag is not None:
+        headers['If-None-Match'] = etag
+
+    try:
+        response = http_get(
+            GITHUB_API_REPO % (org, repo),
+            headers=headers
+        )
+    except requests.RequestException as e:
+        logger.debug("Could not check %s/%s for changes: %s" % (org, repo, e))
+        return True, None, None
+
+    if response.status_code == 304:
+        return False, etag, None
+
+    if response.status_code == 403 \
+            and response.headers.get('X-RateLimit-Remaining') == '0':
+        raise RateLimitExceededException(
+            response.status_code, response.json(), dict(response.headers)
         )
 
+    if response.status_code != 200:
+        return True, None, None
 
-def get_component_from_github(ctx, origin=None, org=None, repo=None):
+    return True, response.headers.get('ETag'), \
+        response.json().get('pushed_at', None)
+
+
+def cached_component_from_github(manifest=None, repo=None):
+    if manifest is None:
+        return None
+
+    _type, _name, _, _ = break_component_naming_format(repo)
+    if _type is None:
+        return None
+
+    item = manifest.get_item(_name)
+    if item is None or item.type != _type:
+        return None
+
+    return item
+
+
+def get_component_from_github(ctx, origin=None, org=None, repo=None,
+                              github_api=None, manifest=None):
     if origin is None:
         raise ValueError("expected origin")
     elif org is None:
@@ -184,14 +429,35 @@ def get_component_from_github(ctx, origin=None, org=None, repo=None):
     from kraft.manifest import ManifestItemDistribution
     from .types import ListProviderType
 
+    etag = None
+    cached = None
     if isinstance(repo, str):
         if ".git" in repo:
             repo = repo.split(".")[0]
-        github_api = Github(ctx.obj.env.get('UK_KRAFT_GITHUB_TOKEN', None))
+
+        cached = cached_component_from_github(manifest, repo)
+        if cached is not None:
+            modified, etag, pushed_at = github_repo_modified(
+                ctx, org, repo, cached.etag
+            )
+            if modified is False or (pushed_at is not None and
+                                     pushed_at == cached.pushed_at):
+                logger.debug("Unchanged: %s/%s" % (org, repo))
+                cached.etag = etag
+                return cached
+
+        if github_api is None:
+            github_api = Github(
+                ctx.obj.env.get('UK_KRAFT_GITHUB_TOKEN', None),
+                timeout=HTTP_TIMEOUT
+            )
         repo = github_api.get_repo(
             "%s/%s" % (org, repo)
         )
 
+    elif repo is not None:
+        cached = cached_component_from_github(manifest, repo.name)
+
     if repo is None or not isinstance(repo, Repository):
         raise TypeError("repo expected Repository")
 
@@ -211,6 +477,14 @@ def get_component_from_github(ctx, origin=None, org=None, repo=None):
         if match is None:
             return
 
+    # Repositories listed from an organisation include the time they were last
+    # pushed to, which is used to skip enumerating their branches, tags and
+    # releases if nothing has changed
+    pushed_at = github_timestamp(repo.pushed_at)
+    if cached is not None and pushed_at == cached.pushed_at:
+        logger.debug("Unchanged: %s/%s" % (org, repo.name))
+        return cached
+
     _type, _name, _, _ = break_component_naming_format(repo.name)
 
     item = ManifestItem(
@@ -221,6 +495,8 @@ def get_component_from_github(ctx, origin=None, org=None, repo=None):
         dist=UNIKRAFT_RELEASE_STABLE,
         git=repo.git_url,
         manifest=origin,
+        etag=etag,
+        pushed_at=pushed_at,
     )
 
     for branch in repo.get_branches():
@@ -233,51 +509,51 @@ def get_component_from_github(ctx, origin=None, org=None, repo=None):
             releases = repo.get_releases()
             did_add_version = False
 
-            if tags.totalCount > 0:
-                for tag in tags:
-                    _version = tag.name
-
-                    # interpret the tag name for symbolic distributions
-                    ref = GIT_UNIKRAFT_TAG_PATTERN.match(tag.name)
-                    if ref is not None:
-                        _version = ref.group(1)
-
-                    did_add_version = True
-                    dist.add_version(ManifestItemVersion(
-                        git_sha=tag.name,
-                        version=_version,
-                        timestamp=repo.pushed_at,
-                        tarball=GITHUB_TARBALL % (
-                            repo.owner.login,
-                            repo.name,
-                            tag.name
-                        ),
-                    ))
-
-            if releases.totalCount > 0:
-                for release in releases:
-                    # Skip draft releases
-                    if release.draft:
-                        continue
-
-                    _version = release.tag_name
-
-                    # interpret the tag name for symbolic distributions
-                    ref = GIT_UNIKRAFT_TAG_PATTERN.match(release.tag_name)
-                    if ref is not None:
-                        _version = ref.group(1)
-
-                    did_add_version = True
-                    dist.add_version(ManifestItemVersion(
-                        git_sha=release.tag_name,
-                        version=_version,
-                        timestamp=release.published_at,
-                        tarball=GITHUB_TARBALL % (
-                            repo.owner.login,
-                            repo.name,
-                            release.tag_name
-                        ),
-                    ))
+            # The lists are iterated directly rather than first checking
+            # totalCount, which costs an additional request each
+            for tag in tags:
+                _version = tag.name
+
+                # interpret the tag name for symbolic distributions
+                ref = GIT_UNIKRAFT_TAG_PATTERN.match(tag.name)
+                if ref is not None:
+                    _version = ref.group(1)
+
+                did_add_version = True
+                dist.add_version(ManifestItemVersion(
+                    git_sha=tag.name,
+                    version=_version,
+                    timestamp=repo.pushed_at,
+                    tarball=GITHUB_TARBALL % (
+                        repo.owner.login,
+                        repo.name,
+                        tag.name
+                    ),
+                ))
+
+            for release in releases:
+                # Skip draft releases
+                if release.draft:
+                    continue
+
+                _version = release.tag_name
+
+                # interpret the tag name for symbolic distributions
+                ref = GIT_UNIKRAFT_TAG_PATTERN.match(release.tag_name)
+                if ref is not None:
+                    _version = ref.group(1)
+
+                did_add_version = True
+                dist.add_version(ManifestItemVersion(
+                    git_sha=release.tag_name,
+                    version=_version,
+                    timestamp=release.published_at,
+                    tarball=GITHUB_TARBALL % (
+                        repo.owner.login,
+                        repo.name,
+                        release.tag_name
+                    ),
+                ))
 
             if did_add_version is False:
                 dist.add_version(ManifestItemVersion(
@@ -0,0 +1,379 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Laboratories GmbH., NEC Corporation.
+#                     All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import fnmatch
+import re
+from datetime import datetime
+
+from github.GithubException import RateLimitExceededException
+
+from .provider import cached_manifest
+from kraft.const import GIT_UNIKRAFT_TAG_PATTERN
+from kraft.const import GITHUB_API_GRAPHQL
+from kraft.const import GITHUB_GIT_URL
+from kraft.const import GITHUB_GRAPHQL_REFS_PER_REPO
+from kraft.const import GITHUB_GRAPHQL_REPOS_PER_PAGE
+from kraft.const import GITHUB_TARBALL
+from kraft.const import GITHUB_TIMESTAMP_FORMAT
+from kraft.const import UNIKRAFT_RELEASE_STABLE
+from kraft.error import GitHubGraphQLError
+from kraft.logger import logger
+from kraft.types import break_component_naming_format
+from kraft.util import ConcurrencyBudget
+from kraft.util import http_post
+
+# Everything needed to build a ManifestItem is requested for each repository
+# at once, rather than with separate requests for its branches, tags and
+# releases.  Repositories with more refs or releases than fit on the first
+# page have the remaining pages fetched afterwards.
+GITHUB_GRAPHQL_REPOSITORY = """
+fragment repository on Repository {
+  name
+  description
+  pushedAt
+  owner { login }
+  branches: refs(refPrefix: "refs/heads/", first: %(refs)d) {
+    pageInfo { hasNextPage endCursor }
+    nodes { name target { oid } }
+  }
+  tags: refs(refPrefix: "refs/tags/", first: %(refs)d) {
+    pageInfo { hasNextPage endCursor }
+    nodes { name }
+  }
+  releases(first: %(refs)d) {
+    pageInfo { hasNextPage endCursor }
+    nodes { tagName isDraft publishedAt }
+  }
+}
+""" % {"refs": GITHUB_GRAPHQL_REFS_PER_REPO}
+
+GITHUB_GRAPHQL_REFS_QUERY = """
+query($org: String!, $repo: String!, $prefix: String!, $cursor: String) {
+  repository(owner: $org, name: $repo) {
+    connection: refs(refPrefix: $prefix, first: %(refs)d, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes { name target { oid } }
+    }
+  }
+}
+""" % {"refs": GITHUB_GRAPHQL_REFS_PER_REPO}
+
+GITHUB_GRAPHQL_RELEASES_QUERY = """
+query($org: String!, $repo: String!, $cursor: String) {
+  repository(owner: $org, name: $repo) {
+    connection: releases(first: %(refs)d, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes { tagName isDraft publishedAt }
+    }
+  }
+}
+""" % {"refs": GITHUB_GRAPHQL_REFS_PER_REPO}
+
+GITHUB_GRAPHQL_ORGANIZATION_QUERY = GITHUB_GRAPHQL_REPOSITORY + """
+query($org: String!, $cursor: String) {
+  organization(login: $org) {
+    repositories(first: %(repos)d, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes { ...repository }
+    }
+  }
+}
+""" % {"repos": GITHUB_GRAPHQL_REPOS_PER_PAGE}
+
+GITHUB_GRAPHQL_REPOSITORY_QUERY = GITHUB_GRAPHQL_REPOSITORY + """
+query($org: String!, $repo: String!) {
+  repository(owner: $org, name: $repo) { ...repository }
+}
+"""
+
+
+def github_graphql_query(ctx, query=None, variables=None):
+    """
+    Perform a query against GitHub's GraphQL API, which requires a personal
+    access token to be set via UK_KRAFT_GITHUB_TOKEN.  The endpoint can be
+    changed with UK_KRAFT_GITHUB_GRAPHQL.
+
+    Raises:
+        RateLimitExceededException: The rate limit has been exceeded.
+        GitHubGraphQLError: The query could not be completed.
+    """
+    response = http_post(
+        ctx.obj.env.get('UK_KRAFT_GITHUB_GRAPHQL', GITHUB_API_GRAPHQL),
+        json={
+            "query": query,
+            "variables": variables or dict()
+        },
+        headers={
+            "Authorization": "bearer %s" %
+            ctx.obj.env.get('UK_KRAFT_GITHUB_TOKEN', '')
+        }
+    )
+
+    if response.status_code in [403, 429] \
+            and response.headers.get('X-RateLimit-Remaining') == '0':
+        raise RateLimitExceededException(
+            response.status_code, response.json(), dict(response.headers)
+        )
+
+    if response.status_code != 200:
+        raise GitHubGraphQLError([{
+            "message": "HTTP %d" % response.status_code
+        }])
+
+    data = response.json()
+    errors = data.get("errors", None)
+    if errors:
+        if any(e.get("type") == "RATE_LIMITED" for e in errors):
+            raise RateLimitExceededException(
+                response.status_code, data, dict(response.headers)
+            )
+
+        raise GitHubGraphQLError(errors)
+
+    return data["data"]
+
+
+def parse_github_timestamp(timestamp=None):
+    if timestamp is None:
+        return None
+
+    return datetime.strptime(timestamp, GITHUB_TIMESTAMP_FORMAT)
+
+
+def github_graphql_version(ref=None, owner=None, repo=None, timestamp=None):
+    # TODO: There should be a work around to fix this import loop cycle
+    from kraft.manifest import ManifestItemVersion
+
+    # interpret the tag name for symbolic distributions
+    version = ref
+    match = GIT_UNIKRAFT_TAG_PATTERN.match(ref)
+    if match is not None:
+        version = match.group(1)
+
+    return ManifestItemVersion(
+        git_sha=ref,
+        version=version,
+        timestamp=timestamp,
+        tarball=GITHUB_TARBALL % (owner, repo, ref),
+    )
+
+
+def github_graphql_paginate(ctx, node=None, budget=None):
+    """
+    Fetch the remaining pages of the branches, tags and releases of a
+    repository returned by a GraphQL query, of which only the first page is
+    returned with the repository itself.
+    """
+    if budget is None:
+        budget = ConcurrencyBudget()
+
+    connections = [
+        ("branches", GITHUB_GRAPHQL_REFS_QUERY, {"prefix": "refs/heads/"}),
+        ("tags", GITHUB_GRAPHQL_REFS_QUERY, {"prefix": "refs/tags/"}),
+        ("releases", GITHUB_GRAPHQL_RELEASES_QUERY, dict()),
+    ]
+
+    for key, query, variables in connections:
+        connection = node[key]
+
+        while connection["pageInfo"]["hasNextPage"]:
+            logger.debug("Fetching next page of %s of %s: %s" % (
+                key, node["name"], connection["pageInfo"]["endCursor"]
+            ))
+
+            variables.update({
+                "org": node["owner"]["login"],
+                "repo": node["name"],
+                "cursor": connection["pageInfo"]["endCursor"]
+            })
+
+            with budget:
+                data = github_graphql_query(ctx, query, variables)
+
+            page = data["repository"]["connection"]
+            connection["nodes"].extend(page["nodes"])
+            connection["pageInfo"] = page["pageInfo"]
+
+    return node
+
+
+def get_component_from_github_graphql(ctx, origin=None, node=None,
+                                      manifest=None, budget=None):
+    """
+    Map a repository returned by a GraphQL query to a ManifestItem in the same
+    way as `get_component_from_github` does for the REST API.
+    """
+    # TODO: There should be a work around to fix this import loop cycle
+    from kraft.manifest import ManifestItem
+    from kraft.manifest import ManifestItemVersion
+    from kraft.manifest import ManifestItemDistribution
+    from .types import ListProviderType
+
+    _type, _name, _, _ = break_component_naming_format(node["name"])
+    if _type is None:
+        return None
+
+    # Re-use the cached component if the repository has not been pushed to
+    if manifest is not None:
+        cached = manifest.get_item(_name)
+        if cached is not None and cached.type == _type \
+                and cached.pushed_at == node["pushedAt"]:
+            return cached
+
+    github_graphql_paginate(ctx, node, budget)
+
+    owner = node["owner"]["login"]
+    pushed_at = parse_github_timestamp(node["pushedAt"])
+
+    item = ManifestItem(
+        provider=ListProviderType.GITHUB,
+        name=_name,
+        description=node["description"],
+        type=_type.shortname,
+        dist=UNIKRAFT_RELEASE_STABLE,
+        git=GITHUB_GIT_URL % (owner, node["name"]),
+        manifest=origin,
+        pushed_at=node["pushedAt"],
+    )
+
+    for branch in node["branches"]["nodes"]:
+        sha = branch["target"]["oid"]
+
+        if branch["name"] == UNIKRAFT_RELEASE_STABLE:
+            dist = ManifestItemDistribution(
+                name=UNIKRAFT_RELEASE_STABLE
+            )
+
+            for tag in node["tags"]["nodes"]:
+                dist.add_version(github_graphql_version(
+                    ref=tag["name"],
+                    owner=owner,
+                    repo=node["name"],
+                    timestamp=pushed_at
+                ))
+
+            for release in node["releases"]["nodes"]:
+                # Skip draft releases
+                if release["isDraft"]:
+                    continue
+
+                dist.add_version(github_graphql_version(
+                    ref=release["tagName"],
+                    owner=owner,
+                    repo=node["name"],
+                    timestamp=parse_github_timestamp(release["publishedAt"])
+                ))
+
+            if len(dist.versions) > 0:
+                item.add_distribution(dist)
+                continue
+
+        else:
+            dist = ManifestItemDistribution(
+                name=branch["name"],
+            )
+
+        dist.add_version(ManifestItemVersion(
+            git_sha=sha,
+            version=sha[:7],
+            timestamp=pushed_at,
+            tarball=GITHUB_TARBALL % (owner, node["name"], sha),
+        ))
+
+        item.add_distribution(dist)
+
+    return item
+
+
+def get_components_from_github_graphql(ctx, origin=None, org=None, repo=None,
+                                       items=None, budget=None):
+    """
+    Populate items with every component of a GitHub origin using batched
+    GraphQL queries: one per repository, or one per page of repositories of
+    an organisation when the origin contains a wildcard.
+    """
+    manifest = cached_manifest(ctx, origin)
+
+    if budget is None:
+        budget = ConcurrencyBudget()
+
+    if "*" not in repo:
+        if ".git" in repo:
+            repo = repo.split(".")[0]
+
+        with budget:
+            data = github_graphql_query(
+                ctx, GITHUB_GRAPHQL_REPOSITORY_QUERY, {
+                    "org": org,
+                    "repo": repo
+                }
+            )
+
+        if data["repository"] is not None:
+            items.put(get_component_from_github_graphql(
+                ctx, origin, data["repository"], manifest, budget
+            ))
+
+        return items
+
+    reobj = re.compile(fnmatch.translate(repo))
+    cursor = None
+
+    while budget.cancelled is False:
+        with budget:
+            data = github_graphql_query(
+                ctx, GITHUB_GRAPHQL_ORGANIZATION_QUERY, {
+                    "org": org,
+                    "cursor": cursor
+                }
+            )
+
+        repositories = data["organization"]["repositories"]
+        for node in repositories["nodes"]:
+            if reobj.match(node["name"]) is None:
+                continue
+
+            item = get_component_from_github_graphql(
+                ctx, origin, node, manifest, budget
+            )
+            if item is not None:
+                items.put(item)
+
+        if not repositories["pageInfo"]["hasNextPage"]:
+            break
+
+        cursor = repositories["pageInfo"]["endCursor"]
+        logger.debug("Fetching next page of %s: %s" % (org, cursor))
+
+    return items
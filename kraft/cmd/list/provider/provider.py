@@ -35,9 +35,27 @@ from __future__ import unicode_literals
 
 import click
 
+from kraft.error import UnknownManifestSchemaError
 from kraft.logger import logger
 
 
+def cached_manifest(ctx, origin=None):
+    """
+    Return the cached manifest of an origin which is being updated.  A
+    manifest which was written with a different schema, e.g. by a newer
+    version of kraft, is treated as missing such that it is rebuilt.
+
+    Returns:
+        Manifest: The cached manifest or None.
+    """
+    try:
+        return ctx.obj.cache.get(origin)
+
+    except UnknownManifestSchemaError as e:
+        logger.debug("Rebuilding %s: %s" % (origin, e))
+        return None
+
+
 class ListProvider(object):
     @classmethod
     def is_type(cls, origin=None):
@@ -46,7 +64,8 @@ class ListProvider(object):
         return False
 
     @click.pass_context
-    def probe(ctx, self, origin=None, items=None, return_threads=False):
+    def probe(ctx, self, origin=None, items=None, return_threads=False,
+              budget=None):
         logger.warning("%s did not replace probe()" %
             self.__class__.__name__)
         return None, None
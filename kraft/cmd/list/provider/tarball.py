@@ -29,144 +29,375 @@
 # CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
-# flake8: noqa
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import hashlib
 import os
-import threading
-import time
-import urllib.request
+import shutil
+import sys
+import tarfile
+import tempfile
 import uuid
-from email.utils import parsedate_tz
-from math import ceil
-from os.path import join
-from time import mktime
 
 import click
-import requests
 from atpbar import find_reporter
 
 from .provider import ListProvider
-from kraft.const import UNIKRAFT_CACHEDIR
+from kraft.const import GITHUB_TARBALL_PATTERN
+from kraft.const import TARBALL_CHUNK_SIZE
+from kraft.error import TarballChecksumError
+from kraft.error import UnsafeTarballError
 from kraft.logger import logger
+from kraft.util import ErrorPropagatingThread
+from kraft.util import http_get
 
 
-class FileDownloader(object):
-    CHUNK_SIZE = 1024
+class TarballProgressBar(object):
+    def __init__(self, label=None):
+        self.taskid = uuid.uuid4()
+        self.reporter = find_reporter()
+        self.pid = os.getpid()
+        self.label = label
+
+    def update(self, done=0, total=0):
+        self.reporter.report(dict(
+            taskid=self.taskid,
+            name=self.label,
+            done=int(done / 1024),
+            total=int(max(done, total) / 1024),
+            pid=self.pid,
+            in_main_thread=True
+        ))
+
+
+def tarball_read_chunks(path=None):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(TARBALL_CHUNK_SIZE)
+            if not chunk:
+                break
+
+            yield chunk
+
+
+def tarball_download_chunks(url=None, archive=None, size=None, progress=None):
+    """
+    Yield the contents of a tarball whilst it is downloaded to archive.  A
+    previously interrupted download, left at archive.part, is resumed with an
+    HTTP range request and the part which was already downloaded is yielded
+    first.  The archive is only moved into place once it is complete.
+
+    Args:
+        url (str):  The location of the tarball.
+        archive (str):  The path to save the tarball to.
+        size (int):  The expected size of the tarball, if known.
+        progress (TarballProgressBar):  Reports the progress of the download.
+    """
+    partial = "%s.part" % archive
+
+    offset = 0
+    if os.path.exists(partial):
+        offset = os.path.getsize(partial)
+
+    headers = dict()
+    if offset > 0:
+        headers['Range'] = 'bytes=%d-' % offset
 
-    def __init__(self, url, dest=None, label=None):
-        self._url = url
-        self._destination = dest
-        self._progressbar = None
-        self._request = None
+    response = http_get(url, headers=headers, stream=True)
 
-        # make connection
-        self._request = requests.get(url, stream=True)
-        print(self._request.headers)
-        if self._request.status_code != 200:
+    try:
+        # The partial download cannot be resumed, e.g. it is already complete
+        # or the tarball has since changed
+        if response.status_code == 416:
+            response.close()
+            os.remove(partial)
+            offset = 0
+            response = http_get(url, stream=True)
+
+        response.raise_for_status()
+
+        # Servers which do not support range requests send everything again
+        if response.status_code != 206 and offset > 0:
+            logger.debug("Cannot resume download of %s" % url)
+            offset = 0
+
+        if 'Content-Length' in response.headers:
+            size = offset + int(response.headers['Content-Length'])
+
+        done = 0
+        if offset > 0:
+            logger.debug("Resuming download of %s at %d bytes" % (
+                url, offset
+            ))
+
+            for chunk in tarball_read_chunks(partial):
+                done += len(chunk)
+                yield chunk
+
+        with open(partial, 'ab' if offset > 0 else 'wb') as f:
+            for chunk in response.iter_content(chunk_size=TARBALL_CHUNK_SIZE):
+                f.write(chunk)
+                done += len(chunk)
+
+                if progress is not None:
+                    progress.update(done, size or 0)
+
+                yield chunk
+
+    finally:
+        response.close()
+
+    os.replace(partial, archive)
+
+
+def tarball_extract(url=None, fileobj=None, path=None):
+    """
+    Extract a tarball as it is read from a stream into path, refusing any
+    member which would be written outside of it.
+    """
+    kwargs = dict()
+    # Python versions which support extraction filters also validate the
+    # permissions and types of members
+    if hasattr(tarfile, 'data_filter'):
+        kwargs['filter'] = 'data'
+
+    root = os.path.realpath(path)
+
+    try:
+        with tarfile.open(fileobj=fileobj, mode='r|*') as tar:
+            for member in tar:
+                names = [member.name]
+                if member.islnk():
+                    names.append(member.linkname)
+                elif member.issym():
+                    names.append(os.path.join(
+                        os.path.dirname(member.name), member.linkname
+                    ))
+
+                for name in names:
+                    target = os.path.realpath(os.path.join(root, name))
+                    if os.path.commonpath([root, target]) != root:
+                        raise UnsafeTarballError(url, member.name)
+
+                tar.extract(member, path, **kwargs)
+
+        # Drain the remainder of the stream, e.g. the padding after the end of
+        # the archive, such that the writer is never left blocked
+        while fileobj.read(TARBALL_CHUNK_SIZE):
             pass
-            # raise FDUnrecognizedStatusCode(self._request.status_code, url)
 
-    def set_destination(self, destination):
-        self._destination = destination
+    finally:
+        fileobj.close()
 
-    def get_filepath(self):
-        return self._destination
 
-    def get_lmtime(self):
-        if 'last-modified' in self._request.headers:
-            return self._request.headers['last-modified']
+def tarball_install(path=None, localdir=None, override_existing=False):
+    """
+    Move the extracted contents of a tarball into localdir.  Tarballs which
+    contain a single top-level directory, such as those of GitHub, have the
+    contents of that directory moved instead.
+    """
+    entries = os.listdir(path)
+    if len(entries) == 1 and os.path.isdir(os.path.join(path, entries[0])):
+        path = os.path.join(path, entries[0])
 
-    def get_size(self):
-        return int(self._request.headers['Content-Length'])
+    if override_existing and os.path.isdir(localdir):
+        shutil.rmtree(localdir)
 
-    def start(self):
-        itercontent = self._request.iter_content(chunk_size=self.CHUNK_SIZE)
-        f = open(self._destination, "wb")
-        chunks = int(ceil(self.get_size() / float(self.CHUNK_SIZE)))
+    if not os.path.isdir(localdir) or len(os.listdir(localdir)) == 0:
+        if os.path.isdir(localdir):
+            os.rmdir(localdir)
 
-        with click.progressbar(
-                length=chunks,
-                label="Downloading",
-                show_pos=True,
-                width=0,
-            ) as pb:
-            time.sleep(0.5)
-            for _ in pb:
-                f.write(next(itercontent))
+        os.replace(path, localdir)
+        return
 
-        f.close()
-        self._request.close()
+    # Files which are not part of the tarball are left in place, in the same
+    # way as a checkout with git would
+    for entry in os.listdir(path):
+        target = os.path.join(localdir, entry)
+        if os.path.isdir(target) and not os.path.islink(target):
+            shutil.rmtree(target)
+        elif os.path.lexists(target):
+            os.remove(target)
 
-    def __del__(self):
-        if self._request:
-            self._request.close()
+        os.replace(os.path.join(path, entry), target)
 
 
-class TarballProgressBar(object):
-    def __init__(self, label=None):
-        self.taskid = uuid.uuid4()
-        self.reporter = find_reporter()
-        self.pid = os.getpid()
-        self.label = label
-        self.total = 0
+def tarball_pipe(url=None, chunks=None, path=None):
+    """
+    Extract a tarball into path whilst its chunks are produced, e.g. as they
+    are downloaded, computing its SHA-256 checksum along the way.
 
-    def update_to(self, b=1, bsize=1, tsize=0):
-        if tsize is not None and tsize > 0:
-            self.total = tsize / 1024
-        elif (b * bsize) > self.total:
+    Returns:
+        tuple: The checksum and the size of the tarball.
+    """
+    r, w = os.pipe()
+    reader = os.fdopen(r, 'rb', TARBALL_CHUNK_SIZE)
+    writer = os.fdopen(w, 'wb', TARBALL_CHUNK_SIZE)
+
+    extractor = ErrorPropagatingThread(
+        target=tarball_extract,
+        args=(url, reader, path),
+        daemon=True
+    )
+    extractor.start()
+
+    def close_writer():
+        try:
+            writer.close()
+        except BrokenPipeError:
             pass
-        else:
-            self.total += (b * bsize) / 1024
 
-        self.reporter.report(dict(
-            taskid=self.taskid,
-            name=self.label,
-            done=int((b * bsize) / 1024),
-            total=int(self.total),
-            pid=self.pid,
-            # pid=threading.current_thread().ident,
-            in_main_thread=True
-            # in_main_thread=False
-        ))
+    sha256 = hashlib.sha256()
+    size = 0
+
+    try:
+        for chunk in chunks:
+            sha256.update(chunk)
+            size += len(chunk)
+            writer.write(chunk)
+
+    # The extractor stopped reading, the reason is raised when joined
+    except BrokenPipeError:
+        chunks.close()
+
+    # The download failed, which also fails the extraction
+    except BaseException:
+        close_writer()
+        try:
+            extractor.join()
+        except Exception:
+            pass
+        raise
+
+    close_writer()
+    extractor.join()
+
+    return sha256.hexdigest(), size
+
+
+def tarball_download(url=None, archive=None, localdir=None, checksum=None,
+                     size=None, override_existing=False, progress=None):
+    """
+    Download a tarball to archive and extract it into localdir at the same
+    time.  The SHA-256 checksum of the tarball is computed as it arrives and,
+    if one is given, verified before anything is placed in localdir.  A
+    tarball which was previously downloaded to archive is not downloaded
+    again, nor is it removed if its checksum does not match.
+
+    Returns:
+        tuple: The checksum and the size of the tarball.
+
+    Raises:
+        TarballChecksumError: The checksum of the tarball does not match.
+    """
+    os.makedirs(os.path.dirname(archive), exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.abspath(localdir)), exist_ok=True)
+
+    downloaded = not os.path.exists(archive)
+    if not downloaded:
+        logger.debug("Using cached %s" % archive)
+        chunks = tarball_read_chunks(archive)
+    else:
+        logger.debug("Downloading %s..." % url)
+        chunks = tarball_download_chunks(url, archive, size, progress)
+
+    # The tarball is extracted into a temporary directory next to localdir
+    # so that it can be moved into place once it has been verified
+    tmpdir = tempfile.mkdtemp(
+        dir=os.path.dirname(os.path.abspath(localdir)),
+        prefix=".%s." % os.path.basename(localdir)
+    )
+
+    try:
+        digest, size = tarball_pipe(url, chunks, tmpdir)
+
+        if checksum is not None and checksum != digest:
+            if downloaded:
+                os.remove(archive)
+            raise TarballChecksumError(url, checksum, digest)
+
+        tarball_install(tmpdir, localdir, override_existing)
+
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    return digest, size
+
+
+def tarball_is_generated(url=None):
+    """
+    Determine whether a tarball is an archive which GitHub generates on
+    request for a branch, tag or commit.  Such archives are not guaranteed
+    to be byte-for-byte identical each time they are generated, so their
+    checksums cannot be pinned.
+    """
+    return url is not None and GITHUB_TARBALL_PATTERN.match(url) is not None
 
 
 class TarballListProvider(ListProvider):
     @click.pass_context
     def download(ctx, self, manifest=None, localdir=None, version=None,
-            override_existing=False):
-
+                 override_existing=False, **kwargs):
+        """
+        Download and extract the tarball of a version of a component.  The
+        checksum of a tarball is remembered in the cache the first time it is
+        downloaded.  It is verified on every download thereafter, unless the
+        tarball is a generated archive whose checksum may change, in which
+        case the remembered checksum is replaced.  Downloaded tarballs are
+        kept in the artifact cache.
+        """
         if version.tarball is None:
             logger.warn("Cannot download tarball, not in manifest")
             return
 
-        remote = manifest.get_version(version.version).tarball
-
-        if remote.endswith(".tar.gz"):
-            ext = ".tar.gz"
-        else:
-            _, ext = os.path.splitext(remote)
-
-        local = os.path.join(
-            ctx.obj.env.get('UK_CACHEDIR', os.path.join(
-                ctx.obj.workdir,
-                UNIKRAFT_CACHEDIR)
-            ),
-            "%s-%s%s" % (manifest.name, version.version, ext)
-        )
-
-        logger.debug("Downloading %s..." % remote)
-
-        t = TarballProgressBar(label="%s/%s@%s"
-            % (manifest.type.shortname, manifest.name, version.version)
-        )
-        urllib.request.urlretrieve(
-            remote,
-            filename=local,
-            reporthook=t.update_to,
-            data=None
-        )
-
-        # dl = FileDownloader(remote, local)
-        # dl.start()
+        remote = version.tarball
+
+        # Tarballs which have already been downloaded and verified are taken
+        # from the artifact cache, otherwise they are added to it
+        artifacts = ctx.obj.artifacts
+        archive = artifacts.lookup(remote, version.tarball_checksum)
+        checksum = version.tarball_checksum
+        cached = archive is not None
+        if not cached:
+            archive = artifacts.incoming(remote)
+
+            if tarball_is_generated(remote):
+                checksum = None
+
+        try:
+            digest, size = tarball_download(
+                url=remote,
+                archive=archive,
+                localdir=localdir,
+                checksum=checksum,
+                size=version.tarball_size,
+                override_existing=override_existing,
+                progress=TarballProgressBar(label="%s/%s@%s" % (
+                    manifest.type.shortname, manifest.name, version.version
+                )) if sys.stdout.isatty() else None
+            )
+
+        except TarballChecksumError:
+            # A corrupted archive is removed from the artifact cache together
+            # with its entry
+            if cached:
+                artifacts.remove(checksum)
+            raise
+
+        if archive != artifacts.path(digest):
+            artifacts.add(remote, digest, archive)
+
+        if version.tarball_checksum == digest:
+            return
+
+        if version.tarball_checksum is not None:
+            logger.warning("Generated archive %s has changed, expected %s, got %s" % (
+                remote, version.tarball_checksum, digest
+            ))
+
+        version.tarball_checksum = digest
+        version.tarball_size = size
+
+        if manifest.manifest is not None:
+            ctx.obj.cache.save_item(manifest.manifest, manifest)
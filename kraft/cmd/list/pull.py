@@ -34,6 +34,7 @@ from __future__ import unicode_literals
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import click
@@ -41,18 +42,20 @@ from atpbar import flush
 
 from .list import kraft_list_preflight
 from kraft.app import Application
+from kraft.const import KRAFTRC_LIST_CONCURRENCY
+from kraft.const import LIST_CONCURRENCY
 from kraft.logger import logger
 from kraft.manifest import ManifestItem
 from kraft.manifest import ManifestVersionEquality
 from kraft.types import break_component_naming_format
 from kraft.types import ComponentType
-from kraft.util import ErrorPropagatingThread
 
 
 @click.pass_context  # noqa: C901
 def kraft_list_pull(ctx, name=None, workdir=None, use_git=False,
                     pull_dependencies=False, skip_verify=False, appdir=None,
-                    skip_app=False, force_pull=False):
+                    skip_app=False, force_pull=False, depth=None,
+                    git_filter=None):
     """
     Pull a particular component from a known manifest.  This will retrieve
     the contents to either the automatically determined directory or to an
@@ -68,6 +71,10 @@ def kraft_list_pull(ctx, name=None, workdir=None, use_git=False,
         appdir (str):  Used in conjunction with pull_dependencies and used to
             specify the application from which the dependencies are determined
             and then pulled.
+        depth (int):  The number of commits of history to fetch for components
+            retrieved with git, 0 for the full history.
+        git_filter (str):  A partial clone filter for components retrieved
+            with git, e.g. blob:none.
     """
 
     manifests = list()
@@ -86,19 +93,12 @@ def kraft_list_pull(ctx, name=None, workdir=None, use_git=False,
     # Pull the dependencies for the application at workdir or cwd
     if (pull_dependencies and
             (len(names) == 0 or (appdir is not None and len(names) == 1))):
-        app = Application.from_workdir(
-            appdir if appdir is not None
+        manifests.extend(kraft_app_dependencies(
+            appdir=appdir if appdir is not None
             else workdir if workdir is not None
             else os.getcwd(),
-            force_pull
-        )
-        for component in app.components:
-            if component.manifest is not None:
-                manifests.append((
-                    component.manifest,
-                    ManifestVersionEquality.EQ,
-                    component.version.version
-                ))
+            force_pull=force_pull
+        ))
 
     # Pull the provided named components
     else:
@@ -131,100 +131,231 @@ def kraft_list_pull(ctx, name=None, workdir=None, use_git=False,
         logger.error("No manifests to download")
         sys.exit(1)
 
+    scheduler = DownloadScheduler(
+        workdir=workdir,
+        use_git=use_git,
+        skip_verify=skip_verify,
+        depth=depth,
+        git_filter=git_filter
+    )
+
     for manifest in manifests:
         if skip_app and manifest[0].type == ComponentType.APP:
             continue
 
-        kraft_download_via_manifest(
-            workdir=workdir,
-            manifest=manifest[0],
-            equality=manifest[1],
-            version=manifest[2],
-            use_git=use_git,
-            skip_verify=skip_verify
-        )
+        scheduler.add(*manifest)
 
+    scheduler.run()
+
+    # The dependencies of every application are only known once it has been
+    # downloaded, so they are resolved together and pulled in a second batch
+    # which skips anything which has already been downloaded
     if pull_dependencies and len(names) > 0:
         for manifest in manifests:
             if manifest[0].type == ComponentType.APP:
-                kraft_list_pull(
-                    appdir=manifest[0].localdir,
-                    workdir=workdir,
-                    use_git=use_git,
-                    pull_dependencies=True,
-                    skip_verify=skip_verify
-                )
+                for dependency in kraft_app_dependencies(
+                        appdir=manifest[0].localdir,
+                        force_pull=force_pull):
+                    scheduler.add(*dependency)
+
+        scheduler.run()
 
 
 @click.pass_context
-def kraft_download_via_manifest(ctx, workdir=None, manifest=None,
-                                equality=None, version=None, use_git=False,
-                                skip_verify=False):
+def kraft_app_dependencies(ctx, appdir=None, force_pull=False):
     """
+    Determine the components an application depends on.
+
+    Returns:
+        list: Tuples of the manifest, version equality and version of each
+            component of the application.
     """
-    threads = list()
-
-    def kraft_download_component_thread(localdir=None, manifest=None,
-                                        equality=ManifestVersionEquality.EQ,
-                                        version=None, use_git=False,
-                                        skip_verify=False,
-                                        override_existing=False):
-        with ctx:
-            kraft_download_component(
-                localdir=localdir,
-                manifest=manifest,
-                equality=equality,
-                version=version,
-                use_git=use_git,
-                skip_verify=skip_verify,
-                override_existing=override_existing
-            )
+    dependencies = list()
+    app = Application.from_workdir(appdir, force_pull)
+
+    for component in app.components:
+        if component.manifest is not None:
+            dependencies.append((
+                component.manifest,
+                ManifestVersionEquality.EQ,
+                component.version.version
+            ))
+
+    return dependencies
 
+
+def kraft_download_localdir(workdir=None, manifest=None):
+    """
+    Determine the directory a component is downloaded to.
+    """
     if workdir is None:
-        localdir = manifest.localdir
+        return manifest.localdir
     elif manifest.type == ComponentType.CORE:
-        localdir = os.path.join(workdir, manifest.type.workdir)
-    else:
-        localdir = os.path.join(workdir, manifest.type.workdir, manifest.name)
-
-    thread = ErrorPropagatingThread(
-        target=kraft_download_component_thread,
-        kwargs={
-            'localdir': localdir,
-            'manifest': manifest,
-            'equality': equality,
-            'version': version,
-            'use_git': use_git,
-            'skip_verify': skip_verify
-        }
-    )
-    threads.append((manifest, thread))
-    thread.start()
+        return os.path.join(workdir, manifest.type.workdir)
 
-    for manifest, thread in threads:
-        try:
-            thread.join()
-        except Exception as e:
-            logger.error("Error pulling manifest: %s " % e)
+    return os.path.join(workdir, manifest.type.workdir, manifest.name)
 
-            if ctx.obj.verbose:
-                import traceback
-                logger.error(traceback.format_exc())
 
-    if sys.stdout.isatty():
-        flush()
+class DownloadScheduler(object):
+    """
+    Downloads a set of components with a bounded pool of workers, such that
+    pulling many components takes as long as the slowest of them rather
+    than the sum of all of them.  The size of the pool is set by
+    `list/concurrency` in ~/.kraftrc.
+
+    Components are deduplicated by their manifest, version and local
+    directory, so a component which several applications depend on is only
+    downloaded once, even across several runs of the same scheduler.
+    """
+
+    _workdir = None
+    _use_git = False
+    _skip_verify = False
+    _depth = None
+    _git_filter = None
+    _scheduled = None
+    _pending = None
+    _localdirs = None
+
+    def __init__(self, workdir=None, use_git=False, skip_verify=False,
+                 depth=None, git_filter=None):
+        self._workdir = workdir
+        self._use_git = use_git
+        self._skip_verify = skip_verify
+        self._depth = depth
+        self._git_filter = git_filter
+        self._scheduled = set()
+        self._pending = list()
+        self._localdirs = dict()
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def add(self, manifest=None, equality=ManifestVersionEquality.EQ,
+            version=None):
+        """
+        Schedule a component to be downloaded.
+
+        Returns:
+            bool: False if the component was already scheduled.
+        """
+        localdir = kraft_download_localdir(self._workdir, manifest)
+        key = (str(manifest), version, localdir)
+
+        if key in self._scheduled:
+            logger.debug("Already scheduled: %s@%s" % (manifest, version))
+            return False
+
+        # Downloading two versions to the same directory at once would leave
+        # it in an undefined state, so only the first one is kept
+        if localdir in self._localdirs:
+            logger.warning("Not pulling %s@%s, %s@%s is pulled to %s" % (
+                (manifest, version) + self._localdirs[localdir] + (localdir,)
+            ))
+            return False
+
+        self._scheduled.add(key)
+        self._localdirs[localdir] = (manifest, version)
+        self._pending.append((localdir, manifest, equality, version))
+
+        return True
+
+    @click.pass_context
+    def run(ctx, self):
+        """
+        Download every pending component and wait for all of them to finish.
+
+        Returns:
+            list: Tuples of the manifest and the error of each component which
+                could not be downloaded.
+        """
+        pending = self._pending
+        self._pending = list()
+
+        if len(pending) == 0:
+            return list()
+
+        concurrency = int(ctx.obj.settings.get(
+            KRAFTRC_LIST_CONCURRENCY, LIST_CONCURRENCY
+        ))
+        if concurrency < 1:
+            concurrency = 1
+
+        def download(localdir, manifest, equality, version):
+            with ctx:
+                kraft_download_component(
+                    localdir=localdir,
+                    manifest=manifest,
+                    equality=equality,
+                    version=version,
+                    use_git=self._use_git,
+                    skip_verify=self._skip_verify,
+                    depth=self._depth,
+                    git_filter=self._git_filter
+                )
+
+        errors = list()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                (job[1], executor.submit(download, *job)) for job in pending
+            ]
+
+            for manifest, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error("Error pulling manifest: %s " % e)
+                    errors.append((manifest, e))
+
+                    if ctx.obj.verbose:
+                        import traceback
+                        logger.error("".join(traceback.format_exception(
+                            type(e), e, e.__traceback__
+                        )))
+
+        # The progress bars of all downloads are shown together
+        if sys.stdout.isatty():
+            flush()
+
+        return errors
+
+
+@click.pass_context
+def kraft_download_via_manifest(ctx, workdir=None, manifest=None,
+                                equality=None, version=None, use_git=False,
+                                skip_verify=False):
+    """
+    Download a single component.
+    """
+    scheduler = DownloadScheduler(
+        workdir=workdir,
+        use_git=use_git,
+        skip_verify=skip_verify
+    )
+    scheduler.add(manifest, equality, version)
+    scheduler.run()
 
 
 @click.pass_context
 def kraft_download_component(ctx, localdir=None, manifest=None,
                              equality=ManifestVersionEquality.EQ, version=None,
                              use_git=False, skip_verify=False,
-                             override_existing=False):
+                             override_existing=False, depth=None,
+                             git_filter=None):
     """
     """
     if manifest is None or not isinstance(manifest, ManifestItem):
         raise TypeError("expected ManifestItem")
 
+    # Only components retrieved with git know about these, the defaults are
+    # otherwise taken from ~/.kraftrc
+    kwargs = dict()
+    if depth is not None:
+        kwargs['depth'] = depth
+    if git_filter is not None:
+        kwargs['git_filter'] = git_filter
+
     path = Path(localdir)
     if not os.path.exists(str(path.parent)):
         os.makedirs(str(path.parent), exist_ok=True)
@@ -236,6 +367,7 @@ def kraft_download_component(ctx, localdir=None, manifest=None,
             version=version,
             override_existing=override_existing,
             use_git=use_git,
+            **kwargs
         )
 
 
@@ -260,10 +392,22 @@ def kraft_download_component(ctx, localdir=None, manifest=None,
     help='Skip the verification of the manifest.',
     is_flag=True
 )
+@click.option(
+    '--depth', 'depth',
+    help='Number of commits of history to fetch, 0 for the full history.',
+    type=click.IntRange(min=0),
+    metavar="N"
+)
+@click.option(
+    '--filter', 'git_filter',
+    help='Partial clone filter to fetch with, e.g. blob:none.',
+    metavar="SPEC"
+)
 @click.argument('name', required=False, nargs=-1)
 @click.pass_context
 def cmd_list_pull(ctx, name=None, workdir=None, use_git=False,
-                  no_dependencies=False, skip_verify=False):
+                  no_dependencies=False, skip_verify=False, depth=None,
+                  git_filter=None):
     """
     Download a remote component to your working directory.
 
@@ -294,6 +438,11 @@ def cmd_list_pull(ctx, name=None, workdir=None, use_git=False,
 
         $ kraft list pull lib-python3>=0.4
 
+    Components retrieved with git are fetched with only the commit of the
+    requested version.  To fetch their full history instead:
+
+        $ kraft list pull --depth 0 lib/python3
+
     """
 
     kraft_list_preflight()
@@ -304,7 +453,9 @@ def cmd_list_pull(ctx, name=None, workdir=None, use_git=False,
             workdir=workdir,
             use_git=use_git,
             pull_dependencies=not no_dependencies,
-            skip_verify=skip_verify
+            skip_verify=skip_verify,
+            depth=depth,
+            git_filter=git_filter
         )
 
     except Exception as e:
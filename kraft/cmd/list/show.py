@@ -62,18 +62,8 @@ def cmd_list_show(ctx, return_json=False, name=None):
 
     kraft_list_preflight()
 
-    components = list()
     type, name, _, _ = break_component_naming_format(name)
-
-    for manifest_origin in ctx.obj.cache.all():
-        manifest = ctx.obj.cache.get(manifest_origin)
-
-        for _, component in manifest.items():
-            if (type is None or
-                    (type is not None
-                        and type == component.type)) \
-                    and component.name == name:
-                components.append(component)
+    components = ctx.obj.cache.find_items_by_name(type=type, name=name)
 
     if len(components) == 0:
         logger.error("Unknown component name: %s" % name)
@@ -82,7 +72,7 @@ def cmd_list_show(ctx, return_json=False, name=None):
     if return_json:
         data_json = []
         for _, component in enumerate(components):
-            data_json.append(component.__getstate__())
+            data_json.append(component.to_dict())
 
         click.echo(json.dumps(data_json))
 
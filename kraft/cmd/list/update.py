@@ -33,15 +33,27 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import sys
+import time
+import traceback
+from queue import Empty
 from queue import Queue
 
 import click
 from github.GithubException import RateLimitExceededException
 
+from .provider.provider import cached_manifest
 from .provider.types import ListProviderType
+from kraft.const import KRAFTRC_LIST_CONCURRENCY
 from kraft.const import KRAFTRC_LIST_ORIGINS
+from kraft.const import KRAFTRC_LIST_TIMEOUT
+from kraft.const import LIST_CONCURRENCY
+from kraft.const import LIST_POLL_INTERVAL
+from kraft.const import LIST_TIMEOUT
 from kraft.logger import logger
 from kraft.manifest import Manifest
+from kraft.util import ConcurrencyBudget
+from kraft.util import ErrorPropagatingThread
+from kraft.util import pretty_columns
 
 
 @click.command('update', short_help='Update the list of remote components.')
@@ -61,68 +73,205 @@ def kraft_update(ctx):
         logger.error("No source origins available.  Please see: kraft list add --help")
         sys.exit(1)
 
-    try:
-        for origin in origins:
-            manifest = ctx.obj.cache.get(origin)
+    # All origins are updated at once, with the number of repositories which
+    # are probed at the same time bounded across all of them
+    budget = ConcurrencyBudget(ctx.obj.settings.get(
+        KRAFTRC_LIST_CONCURRENCY, LIST_CONCURRENCY
+    ))
+    timeout = float(ctx.obj.settings.get(KRAFTRC_LIST_TIMEOUT, LIST_TIMEOUT))
 
-            if manifest is None:
-                manifest = Manifest(
-                    manifest=origin
-                )
+    results = Queue()
+    pending = dict()
+
+    for origin in origins:
+        pending[origin] = budget.share()
+        ErrorPropagatingThread(
+            target=kraft_update_origin,
+            args=(ctx, origin, pending[origin], results),
+            daemon=True
+        ).start()
+
+    # Each origin is saved as soon as it completes.  Origins wait for slots
+    # of the shared budget, so each one is given its own deadline which
+    # starts once its first job is run.
+    report = list()
+    failed = False
+
+    while len(pending) > 0:
+        expired, wait = kraft_update_expire(pending, timeout)
+        for origin in expired:
+            report.append((origin, "timed out after %ds" % timeout))
+            failed = True
+
+        if len(pending) == 0:
+            break
+
+        try:
+            origin, items, error, tb = results.get(timeout=wait)
+        except Empty:
+            continue
+
+        # Origins which were cancelled may still complete afterwards
+        if pending.pop(origin, None) is None:
+            continue
+
+        status, ok = kraft_update_result(origin, items, error, tb)
+        report.append((origin, status))
+        failed = failed or not ok
+
+    logger.info("Updated origins:\n%s" % pretty_columns(report).rstrip())
+
+    if failed:
+        sys.exit(1)
+
+
+@click.pass_context
+def kraft_update_result(ctx, origin=None, items=None, error=None, tb=None):
+    """
+    Save the components found for an origin, or report the error which
+    prevented it from being updated.
+
+    Returns:
+        tuple: The status of the origin and whether it was updated.
+    """
+    if isinstance(error, RateLimitExceededException):
+        logger.warning("".join([
+            "GitHub rate limit exceeded while updating %s.  " % origin,
+            "You can tell kraft to use a personal access token by ",
+            "setting the UK_KRAFT_GITHUB_TOKEN environmental variable."]))
+        status = "rate limited"
+
+    elif error is not None:
+        logger.error("Could not update %s: %s" % (origin, error))
+        if ctx.obj.verbose:
+            logger.critical(tb)
+
+        return "failed: %s" % error, False
+
+    else:
+        status = "ok"
+
+    found = kraft_save_origin(origin, items)
+    return "%s (%d components)" % (status, found), True
+
+
+def kraft_update_expire(pending=None, timeout=None):
+    """
+    Cancel and remove the pending origins which have run for longer than the
+    timeout.
+
+    Returns:
+        tuple: The origins which were cancelled and how long to wait for the
+            remaining ones.  Origins which have not started yet are checked
+            on periodically.
+    """
+    now = time.time()
+    expired = list()
+    wait = LIST_POLL_INTERVAL
+
+    for origin, budget in list(pending.items()):
+        if budget.started is None:
+            continue
+
+        deadline = budget.started + timeout
+        if deadline <= now:
+            pending.pop(origin).cancel()
+            expired.append(origin)
+        else:
+            wait = min(wait, deadline - now)
+
+    return expired, wait
+
+
+def kraft_update_origin(ctx, origin=None, budget=None, results=None):
+    """
+    Probe a single origin and place the components found into results,
+    together with any error which occurred.
+    """
+    # A result is always posted, as the origin would otherwise be waited on
+    # forever
+    result = (origin, None, RuntimeError("update stopped unexpectedly"), None)
 
-            threads, items = kraft_update_from_source_threads(origin)
+    with ctx:
+        try:
+            threads, items = kraft_update_from_source_threads(
+                origin, budget=budget
+            )
 
             for thread in threads:
                 thread.join()
 
-            # Check thread's return value
-            while not items.empty():
-                result = items.get()
-                if result is not None:
-                    manifest.add_item(result)
-                    logger.info(
-                        "Found %s/%s via %s..." % (
-                            click.style(result.type.shortname, fg="blue"),
-                            click.style(result.name, fg="blue"),
-                            manifest.manifest
-                        )
-                    )
-                    ctx.obj.cache.save(origin, manifest)
-
-    except RateLimitExceededException:
-        logger.error("".join([
-            "GitHub rate limit exceeded.  You can tell kraft to use a ",
-            "personal access token by setting the UK_KRAFT_GITHUB_TOKEN ",
-            "environmental variable."]))
-
-    except Exception as e:
-        logger.critical(str(e))
+            result = (origin, items, None, None)
 
-        if ctx.obj.verbose:
-            import traceback
-            logger.critical(traceback.format_exc())
+        except Exception as e:
+            result = (origin, None, e, traceback.format_exc())
 
-        sys.exit(1)
+        finally:
+            results.put(result)
 
 
 @click.pass_context
-def kraft_update_from_source_threads(ctx, origin=None):
+def kraft_save_origin(ctx, origin=None, items=None):
+    """
+    Add the components found for an origin to its manifest and save it.
+
+    Returns:
+        int: The number of components found.
+    """
+    manifest = cached_manifest(ctx, origin)
+
+    if manifest is None:
+        manifest = Manifest(
+            manifest=origin
+        )
+
+    found = 0
+    while items is not None and not items.empty():
+        result = items.get()
+        if result is not None:
+            found += 1
+            manifest.add_item(result)
+            logger.info(
+                "Found %s/%s via %s..." % (
+                    click.style(result.type.shortname, fg="blue"),
+                    click.style(result.name, fg="blue"),
+                    manifest.manifest
+                )
+            )
+
+    # The manifest of each origin is written once all of its components
+    # have been found, rather than after each one
+    if found > 0:
+        ctx.obj.cache.save(origin, manifest)
+
+    return found
+
+
+@click.pass_context
+def kraft_update_from_source_threads(ctx, origin=None, budget=None):
     threads = list()
     items = Queue()
 
-    for _, provider in ListProviderType.__members__.items():
-        if provider.is_type(origin):
-            provider = provider.cls()
-            with ctx:
-                extra_items, extra_threads = provider.probe(
-                    origin=origin,
-                    items=items,
-                    return_threads=True
-                )
-            if extra_threads is not None and isinstance(extra_threads, list):
-                threads.extend(extra_threads)
+    if budget is None:
+        budget = ConcurrencyBudget()
 
-            break
+    # Determining the type of an origin may contact it, so it is done within
+    # the budget and counts towards the origin's deadline
+    with budget:
+        provider = next((provider for _, provider
+                         in ListProviderType.__members__.items()
+                         if provider.is_type(origin)), None)
+
+    if provider is not None:
+        with ctx:
+            extra_items, extra_threads = provider.cls().probe(
+                origin=origin,
+                items=items,
+                return_threads=True,
+                budget=budget
+            )
+        if extra_threads is not None and isinstance(extra_threads, list):
+            threads.extend(extra_threads)
 
     return threads, items
 
@@ -36,7 +36,6 @@ import os
 import sys
 
 import click
-import inquirer
 
 from kraft.app import Application
 from kraft.logger import logger
@@ -92,6 +91,7 @@ def kraft_run(ctx, appdir=None, target=None, plat=None, arch=None, initrd=None,
 
         # Prompt user for binary selection
         if len(binaries) > 1:
+            import inquirer
             answers = inquirer.prompt([
                 inquirer.List(
                     'target',
@@ -167,13 +167,8 @@ class Component(object):
             self._kconfig = kwargs.get("kconfig", list())
 
         if self._manifest is None and self._type is not None:
-            name = self._name
-            if self._type is ComponentType.CORE:
-                name = "unikraft"
-
-            self._manifest = ctx.obj.cache.find_item_by_name(
-                type=self._type.shortname,
-                name=name
+            self._manifest = self._resolve_manifest(
+                kwargs.get("manifests", None)
             )
 
         if self._manifest is None and self.localdir is not None:
@@ -218,6 +213,26 @@ class Component(object):
                 # TODO indicate component type in error message
                 raise UnknownVersionError(version, self._manifest)
 
+    @click.pass_context
+    def _resolve_manifest(ctx, self, manifests=None):
+        """
+        Find the manifest of this component by its type and name.  The
+        manifest is taken from manifests if it was resolved together with
+        those of the other components, see `resolve_manifests`.
+        """
+        name = self._name
+        if self._type is ComponentType.CORE:
+            name = "unikraft"
+
+        key = (self._type.shortname, name)
+        if manifests is not None and key in manifests:
+            return manifests[key]
+
+        return ctx.obj.cache.find_item_by_name(
+            type=self._type.shortname,
+            name=name
+        )
+
     def is_downloaded(self):
         return self.localdir is not None \
             and os.path.exists(self._localdir) \
@@ -275,6 +290,32 @@ class Component(object):
         return True if not config else config
 
 
+@click.pass_context
+def resolve_manifests(ctx, specs=None):
+    """
+    Resolve the manifests of many components at once against the cache, such
+    that loading an application does not look up each of its components
+    separately.  The result can be passed to components via `manifests`.
+
+    Args:
+        specs (list):  The (ComponentType, name) pairs of the components.
+
+    Returns:
+        dict: The ManifestItem of each (type, name) pair, where the type is
+            the component type's short name, or None if it is unknown.
+    """
+    specs = [
+        (type.shortname, "unikraft" if type is ComponentType.CORE else name)
+        for type, name in specs or list()
+        if type is not None and name is not None
+    ]
+
+    if len(specs) == 0:
+        return dict()
+
+    return ctx.obj.cache.find_items_by_names(specs)
+
+
 class ComponentManager(object):
     _components = []
     @property
@@ -313,6 +354,7 @@ class ComponentManager(object):
                     inst = self.cls(
                         name=component,
                         version=config,
+                        **extra
                     )
                 elif isinstance(config, dict):
                     inst = self.cls(
@@ -47,9 +47,12 @@ from .environment import Environment
 from .interpolation import interpolate_environment_variables
 from .validation import validate_against_config_schema
 from .version import SpecificationVersion
+from kraft.component import resolve_manifests
 from kraft.const import KRAFT_SPEC_LATEST
 from kraft.const import KRAFT_SPEC_V04
 from kraft.const import SUPPORTED_FILENAMES
+from kraft.const import UK_CORE_ARCHS
+from kraft.const import UK_CORE_PLATS
 from kraft.error import CannotReadKraftfile
 from kraft.error import KraftError
 from kraft.error import KraftFileNotFound
@@ -58,6 +61,7 @@ from kraft.logger import logger
 from kraft.plat.network import NetworkManager
 from kraft.plat.volume import VolumeManager
 from kraft.target import TargetManager
+from kraft.types import ComponentType
 from kraft.unikraft import Unikraft
 
 
@@ -523,6 +527,40 @@ def load_mapping(config_files, get_func, entity_type, working_dir=None):
     return mapping
 
 
+def component_specs(targets=None, libraries=None):
+    """
+    Collect the (type, name) pairs of the components used by an application,
+    i.e. its core, external architectures and platforms and libraries.
+    """
+    specs = [(ComponentType.CORE, "unikraft")]
+
+    for target in targets or list():
+        if not isinstance(target, dict):
+            continue
+
+        arch = target.get('architecture', None)
+        if isinstance(arch, six.string_types) and arch not in UK_CORE_ARCHS:
+            specs.append((ComponentType.ARCH, arch))
+
+        plat = target.get('platform', None)
+        if isinstance(plat, six.string_types) and plat not in UK_CORE_PLATS:
+            specs.append((ComponentType.PLAT, plat))
+
+    if isinstance(libraries, dict):
+        libraries = [
+            name for name, config in libraries.items()
+            if config is not False
+        ]
+
+    for library in libraries or list():
+        if isinstance(library, dict):
+            library = library.get('name', None)
+        if isinstance(library, six.string_types):
+            specs.append((ComponentType.LIB, library))
+
+    return specs
+
+
 def load_config(config_details):
     """Load the configuration from a working directory and a list of
     configuration files.  Files are loaded in order, and merged on top
@@ -600,12 +638,17 @@ def load_config(config_details):
         config_details.working_dir
     )
 
+    # Resolve the manifests of all components together before any of them is
+    # instantiated, rather than looking up each component on its own
+    manifests = resolve_manifests(component_specs(targets, libraries))
+
     if isinstance(unikraft, six.string_types):
         core = Unikraft(
-            version=unikraft
+            version=unikraft,
+            manifests=manifests
         )
     else:
-        core = Unikraft(**unikraft)
+        core = Unikraft(manifests=manifests, **unikraft)
 
     return Config(
         specification=main_file.version,
@@ -614,8 +657,8 @@ def load_config(config_details):
         before=before,
         after=after,
         unikraft=core,
-        targets=TargetManager(targets, core),
-        libraries=LibraryManager(libraries),
+        targets=TargetManager(targets, core, manifests=manifests),
+        libraries=LibraryManager(libraries, manifests=manifests),
         volumes=VolumeManager(volumes),
         networks=NetworkManager(networks),
     )
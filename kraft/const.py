@@ -44,6 +44,10 @@ UNIKRAFT_RELEASE_STABLE_VARIATIONS = [
 
 UK_GITHUB_ORG = 'unikraft'
 
+# Version of the format in which manifests are cached.  Manifests cached as
+# dictionaries, prior to the format being versioned, are version 1.
+MANIFEST_SCHEMA_VERSION = 2
+
 # Match against dereferenced tags only
 # https://stackoverflow.com/a/15472310
 GIT_UNIKRAFT_TAG_PATTERN = re.compile(r'RELEASE-([\d\.]+)')
@@ -51,6 +55,9 @@ GIT_UNIKRAFT_TAG_RELEASE = 'RELEASE-%s'
 # GIT_UNIKRAFT_TAG_PATTERN = re.compile(r'refs/tags/RELEASE-([\d\.]+)\^\{\}')
 GIT_TAG_PATTERN = re.compile(r'refs/tags/([\w\d\.-]+)[\^\{\}]?')
 GIT_BRANCH_PATTERN = re.compile(r'refs/heads/(.*)')
+GIT_LS_REMOTE_TTL = 300
+GIT_FETCH_DEPTH = 1
+GIT_SHA_PATTERN = re.compile(r'^[0-9a-f]{40}$')
 VSEMVER_PATTERN = re.compile(r'^v\d')
 SEMVER_PATTERN = re.compile(
     r"""
@@ -71,8 +78,29 @@ SEMVER_PATTERN = re.compile(
     re.VERBOSE,
 )
 
+HTTP_TIMEOUT = 30
+HTTP_RETRIES = 3
+HTTP_RETRY_BACKOFF = 0.5
+HTTP_RETRY_STATUSES = [500, 502, 503, 504]
+HTTP_POOL_HOSTS = 16
+HTTP_POOL_MAXSIZE = 8
+
 GITHUB_ORIGIN = "github.com"
 GITHUB_TARBALL = "https://github.com/%s/%s/archive/%s.tar.gz"
+GITHUB_TARBALL_PATTERN = re.compile(
+    r'^https://(github\.com/[^/]+/[^/]+/archive|codeload\.github\.com)/'
+)
+TARBALL_CHUNK_SIZE = 1024 * 1024
+ARTIFACT_CACHE_MAX_SIZE = "2G"
+GITHUB_API_REPO = "https://api.github.com/repos/%s/%s"
+GITHUB_API_GRAPHQL = "https://api.github.com/graphql"
+GITHUB_GIT_URL = "git://github.com/%s/%s.git"
+GITHUB_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+GITHUB_PER_PAGE = 100
+GITHUB_RATELIMIT_RETRIES = 3
+GITHUB_RATELIMIT_MAX_WAIT = 60
+GITHUB_GRAPHQL_REPOS_PER_PAGE = 50
+GITHUB_GRAPHQL_REFS_PER_REPO = 100
 UNIKRAFT_ORG = "unikraft"
 UNIKRAFT_CORE = "%s/%s/%s" % (GITHUB_ORIGIN, UNIKRAFT_ORG, "unikraft.git")
 UNIKRAFT_ORIGIN = "%s/%s" % (GITHUB_ORIGIN, UNIKRAFT_ORG)
@@ -112,6 +140,11 @@ SOURCEFORGE_DOWNLOAD = '/download'
 UNIKERNEL_IMAGE_FORMAT = "%s_%s-%s"
 UNIKERNEL_IMAGE_FORMAT_DBG = "%s.dbg"
 
+# Built images are kept in the artifact cache under this URL
+BUILD_ARTIFACT_URL = "kraft-build://%s/%s"
+BUILD_ARTIFACT_IMAGES = "images.json"
+BUILD_FINGERPRINT_VERSION = 2
+
 DOT_CONFIG = ".config"
 DEFCONFIG = "defconfig"
 MAKEFILE_UK = "Makefile.uk"
@@ -119,6 +152,9 @@ CONFIG_UK = "Config.uk"
 ENV_VAR_PATTERN = re.compile(r'([A-Z_^=]+)=(\'[/\w\.\-\s]+\')')
 
 UNIKRAFT_CACHEDIR = ".kraftcache"
+UNIKRAFT_GIT_MIRRORDIR = "git"
+UNIKRAFT_ARTIFACTDIR = "artifacts"
+UNIKRAFT_MAKEVARSDIR = "make"
 UNIKRAFT_WORKDIR = ".unikraft"
 UNIKRAFT_COREDIR = "unikraft"
 UNIKRAFT_ARCHSDIR = "archs"
@@ -126,6 +162,9 @@ UNIKRAFT_PLATSDIR = "plats"
 UNIKRAFT_LIBSDIR = "libs"
 UNIKRAFT_APPSDIR = "apps"
 UNIKRAFT_BUILDDIR = "build"
+UNIKRAFT_BUILD_FINGERPRINT = ".kraft-fingerprint"
+UNIKRAFT_PREPARE_STAMP = ".kraft-prepared"
+UNIKRAFT_PATCHESDIR = "patches"
 
 UNIKRAFT_LIB_MAKEFILE_VERSION_EXT = '_VERSION'
 UNIKRAFT_LIB_MAKEFILE_URL_EXT = '_URL'
@@ -140,12 +179,29 @@ GITCONFIG_GLOBAL = "~/.gitconfig"
 GITCONFIG_LOCAL = ".git/config"
 URL_VERSION = '$VERSION'
 
+LIST_CONCURRENCY = 8
+LIB_PROBE_CONCURRENCY = 8
+LIB_BUILD_CONCURRENCY = 4
+LIB_BUILD_TEMPLATE = "helloworld"
+LIST_TIMEOUT = 600
+LIST_POLL_INTERVAL = 1
+
 KRAFTRC = ".kraftrc"
 KRAFTRC_DELIMETER = "/"
 KRAFTRC_LIST_ORIGINS = "list/origins"
+KRAFTRC_LIST_CONCURRENCY = "list/concurrency"
+KRAFTRC_LIST_TIMEOUT = "list/timeout"
+KRAFTRC_LIST_GITHUB_API = "list/github_api"
+KRAFTRC_LIST_GIT_DEPTH = "list/git_depth"
+KRAFTRC_LIST_GIT_FILTER = "list/git_filter"
+KRAFTRC_LIST_GIT_MIRROR = "list/git_mirror"
 KRAFTRC_INIT_WORKDIR = "init/workdir"
 KRAFTRC_CONFIGURE_PLATFORM = "configure/platform"
 KRAFTRC_CONFIGURE_ARCHITECTURE = "configure/architecture"
+KRAFTRC_CACHE_BACKEND = "cache/backend"
+KRAFTRC_CACHE_MAX_SIZE = "cache/max_size"
+KRAFTRC_LIB_CONCURRENCY = "lib/concurrency"
+KRAFTRC_LIB_BUILD_CONCURRENCY = "lib/build_concurrency"
 
 KCONFIG = "CONFIG_%s"
 KCONFIG_Y = 'y'
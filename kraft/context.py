@@ -35,11 +35,16 @@ from __future__ import unicode_literals
 import logging
 import os
 import pkgutil
+import threading
 from pathlib import Path
 
-from kraft.cache import Cache
+from kraft.cache import ArtifactCache
+from kraft.cache import new_cache
 from kraft.config.environment import Environment
+from kraft.const import ARTIFACT_CACHE_MAX_SIZE
 from kraft.const import KRAFTRC
+from kraft.const import KRAFTRC_CACHE_BACKEND
+from kraft.const import KRAFTRC_CACHE_MAX_SIZE
 from kraft.const import UNIKRAFT_APPSDIR
 from kraft.const import UNIKRAFT_ARCHSDIR
 from kraft.const import UNIKRAFT_CACHEDIR
@@ -49,6 +54,7 @@ from kraft.const import UNIKRAFT_PLATSDIR
 from kraft.const import UNIKRAFT_WORKDIR
 from kraft.logger import logger
 from kraft.settings import Settings
+from kraft.util import http_stats
 
 
 class KraftContext:
@@ -127,13 +133,65 @@ class KraftContext:
                 kraftrc.close()
 
         self._env = Environment.from_env_file(self._workdir, None)
-        self._cache = Cache(self.env)
         self._settings = Settings(os.environ['KRAFTRC'])
 
+        # The cache is only opened once it is first used, since many
+        # commands, e.g. `kraft clean` or `kraft run`, never read from it.
+        self._cache = None
+        self._artifacts = None
+        self._cache_lock = threading.Lock()
+
     @property
     def cache(self):
+        if self._cache is None:
+            with self._cache_lock:
+                if self._cache is None:
+                    self._cache = new_cache(self.env, self.env.get(
+                        'UK_CACHE_BACKEND',
+                        self._settings.get(KRAFTRC_CACHE_BACKEND)
+                    ))
+
         return self._cache
 
+    @property
+    def artifacts(self):
+        if self._artifacts is None:
+            with self._cache_lock:
+                if self._artifacts is None:
+                    self._artifacts = ArtifactCache(
+                        self.env.get('UK_CACHEDIR'),
+                        self._settings.get(
+                            KRAFTRC_CACHE_MAX_SIZE, ARTIFACT_CACHE_MAX_SIZE
+                        )
+                    )
+
+        return self._artifacts
+
+    def close(self):
+        """
+        Called once the invoked command has finished executing.
+        """
+        for host, stats in sorted(http_stats().items()):
+            logger.debug(
+                "HTTP %s: %d requests, %d retries, %d connections, %.2fs" % (
+                    host,
+                    stats.get('requests', 0),
+                    stats.get('retries', 0),
+                    stats.get('connections', 0),
+                    stats.get('elapsed', 0)
+                )
+            )
+
+        if self._cache is None:
+            return
+
+        if self._cache.dirty:
+            self._cache.sync()
+
+        logger.debug("Cache hits: %d, misses: %d" % (
+            self._cache.hits, self._cache.misses
+        ))
+
     @property
     def verbose(self):
         return self._verbose
@@ -218,7 +218,7 @@ class RunnerError(KraftError):
 
 class UnknownLibraryProvider(KraftError):
     def __init__(self, name):
-        from kraft.lib.provider.type import LibraryProviderType
+        from kraft.lib.provider.types import LibraryProviderType
         super(UnknownLibraryProvider, self).__init__(
             "The provided origin provider is not known: %s\nValid providers include: %s" % (
                 name,
@@ -361,3 +361,51 @@ class CannotDetermineRemoteVersion(KraftError):
         super(NoRemoteVersionsAvailable, self).__init__(
             "Unable to determine latest version: %s" % origin
         )
+
+
+class GitHubGraphQLError(KraftError):
+    def __init__(self, errors):
+        super(GitHubGraphQLError, self).__init__(
+            "GitHub GraphQL query failed: %s"
+            % "; ".join([e.get("message", str(e)) for e in errors])
+        )
+
+
+class TarballChecksumError(KraftError):
+    def __init__(self, url, expected, actual):
+        super(TarballChecksumError, self).__init__(
+            "Checksum mismatch for %s: expected %s, got %s"
+            % (url, expected, actual)
+        )
+
+
+class UnsafeTarballError(KraftError):
+    def __init__(self, url, member):
+        super(UnsafeTarballError, self).__init__(
+            "Refusing to extract %s from %s: outside of target directory"
+            % (member, url)
+        )
+
+
+class UnknownManifestSchemaError(KraftError):
+    def __init__(self, kind, schema):
+        super(UnknownManifestSchemaError, self).__init__(
+            "Cannot read %s written with schema %s.  Please update kraft or "
+            "run: kraft list update" % (kind, schema)
+        )
+
+
+class UnsupportedMakefileConstruct(KraftError):
+    def __init__(self, makefile, lineno, reason):
+        super(UnsupportedMakefileConstruct, self).__init__(
+            "Cannot statically read %s, line %d: %s"
+            % (makefile, lineno, reason)
+        )
+
+
+class LibraryBuildError(KraftError):
+    def __init__(self, name, code):
+        super(LibraryBuildError, self).__init__(
+            "Could not build %s against the template application: make "
+            "returned %s" % (name, code)
+        )
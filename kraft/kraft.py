@@ -34,19 +34,10 @@ from __future__ import unicode_literals
 
 import click
 
-from kraft.cmd import cmd_build
-from kraft.cmd import cmd_clean
-from kraft.cmd import cmd_configure
-from kraft.cmd import cmd_init
-from kraft.cmd import cmd_list
-from kraft.cmd import cmd_menuconfig
-from kraft.cmd import cmd_run
-from kraft.cmd import cmd_up
-from kraft.cmd import grp_lib
-from kraft.context import KraftContext
+from kraft import __version__
 from kraft.logger import logger
 from kraft.util.cli import CONTEXT_SETTINGS
-from kraft.util.cli import KraftHelpGroup
+from kraft.util.cli import KraftLazyGroup
 
 
 @click.option(
@@ -68,7 +59,7 @@ from kraft.util.cli import KraftHelpGroup
     help='Do not use colour in output logs.',
     is_flag=True
 )
-@click.group(cls=KraftHelpGroup, context_settings=CONTEXT_SETTINGS, epilog="""
+@click.group(cls=KraftLazyGroup, context_settings=CONTEXT_SETTINGS, epilog="""
 Influential Environmental Variables:
   env::UK_WORKDIR The working directory for all Unikraft
              source code [default: ~/.unikraft]
@@ -80,32 +71,41 @@ Influential Environmental Variables:
              [default: $UK_WORKDIR/apps]
   env::KRAFTRC  The location of kraft's preferences file
              [default: ~/.kraftrc]
+  env::UK_CACHE_BACKEND The storage used for kraft's cache, either
+             file or sqlite [default: file]
 
 Help:
   For help using this tool, please open an issue on Github:
   https://github.com/unikraft/kraft
 """)
-@click.version_option()
+@click.version_option(version=__version__)
 @click.pass_context
 def kraft(ctx, verbose=False, assume_yes=False, use_timestamps=False,
           no_color=False):
     logger.use_timestamps = use_timestamps
     logger.use_color = not no_color
 
+    # The context is imported here, rather than at the top of this module,
+    # so that `kraft --version` and `kraft --help` do not have to load it.
+    from kraft.context import KraftContext
+
     ctx.obj = KraftContext(
         verbose=verbose,
         assume_yes=assume_yes
     )
 
-    ctx.obj.cache.sync()
+    ctx.call_on_close(ctx.obj.close)
 
 
-kraft.add_command(cmd_list)
-kraft.add_command(cmd_up)
-kraft.add_command(cmd_init)
-kraft.add_command(cmd_configure)
-kraft.add_command(cmd_menuconfig)
-kraft.add_command(cmd_build)
-kraft.add_command(cmd_run)
-kraft.add_command(cmd_clean)
-kraft.add_command(grp_lib)
+# Commands are only imported when they are invoked, since together they depend
+# on most of kraft's (slow to import) third-party libraries.
+kraft.add_lazy_command('list', 'kraft.cmd.list:cmd_list')
+kraft.add_lazy_command('up', 'kraft.cmd.up:cmd_up')
+kraft.add_lazy_command('init', 'kraft.cmd.init:cmd_init')
+kraft.add_lazy_command('configure', 'kraft.cmd.configure:cmd_configure')
+kraft.add_lazy_command('menuconfig', 'kraft.cmd.menuconfig:cmd_menuconfig')
+kraft.add_lazy_command('build', 'kraft.cmd.build:cmd_build')
+kraft.add_lazy_command('cache', 'kraft.cmd.cache:grp_cache')
+kraft.add_lazy_command('run', 'kraft.cmd.run:cmd_run')
+kraft.add_lazy_command('clean', 'kraft.cmd.clean:cmd_clean')
+kraft.add_lazy_command('lib', 'kraft.cmd.lib:grp_lib')
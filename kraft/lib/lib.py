@@ -35,19 +35,16 @@ from __future__ import unicode_literals
 import datetime
 import fileinput
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import click
 import semver
-from cookiecutter.generate import generate_context
-from cookiecutter.generate import generate_files
-from cookiecutter.prompt import prompt_for_config
-from cookiecutter.prompt import read_user_choice
-from git import Repo as GitRepo
 
-from .provider import determine_lib_provider
 from kraft.component import Component
 from kraft.component import ComponentManager
+from kraft.component import resolve_manifests
+from kraft.const import LIB_PROBE_CONCURRENCY
 from kraft.const import MAKEFILE_UK
 from kraft.const import SEMVER_PATTERN
 from kraft.const import TEMPLATE_LIB
@@ -69,6 +66,19 @@ from kraft.types import ComponentType
 from kraft.util import make_list_vars
 
 
+@click.pass_context
+def lib_makefile_vars(ctx, makefile_uk=None):
+    """
+    Return the variables defined by a library's Makefile.uk.  These are kept
+    in UK_CACHEDIR, such that make is only run again once it changes.
+    """
+    return make_list_vars(
+        makefile_uk,
+        origin=['makefile'],
+        cachedir=ctx.obj.env.get('UK_CACHEDIR', None)
+    )['makefile']
+
+
 def intrusively_determine_lib_origin_url(localdir=None):
     """
     Intrusively determine the origin code's source URL if there is access to
@@ -88,7 +98,7 @@ def intrusively_determine_lib_origin_url(localdir=None):
     if os.path.exists(makefile_uk) is False:
         raise CannotReadMakefilefile(makefile_uk)
 
-    makefile_vars = make_list_vars(makefile_uk)['makefile']
+    makefile_vars = lib_makefile_vars(makefile_uk)
 
     for var in makefile_vars:
         if var.endswith(UNIKRAFT_LIB_MAKEFILE_URL_EXT):
@@ -116,7 +126,7 @@ def intrusively_determine_lib_origin_version(localdir=None):
     if os.path.exists(makefile_uk) is False:
         raise CannotReadMakefilefile(makefile_uk)
 
-    makefile_vars = make_list_vars(makefile_uk)['makefile']
+    makefile_vars = lib_makefile_vars(makefile_uk)
 
     for var in makefile_vars:
         if var.endswith(UNIKRAFT_LIB_MAKEFILE_VERSION_EXT):
@@ -150,14 +160,26 @@ class Library(Component):
     @property
     def origin_provider(self):
         if self._origin_provider is None and self.origin_url is not None:
+            from .provider import determine_lib_provider
             provider_cls = determine_lib_provider(self._origin_url)
-            self._origin_provider = provider_cls(
-                source=self._origin_url,
-                current_version=self.origin_version
-            )
+            if provider_cls is not None:
+                self._origin_provider = provider_cls(
+                    source=self._origin_url,
+                    current_version=self.origin_version
+                )
 
         return self._origin_provider
 
+    _remote_versions = None
+
+    @property
+    def remote_versions(self):
+        """The versions of the origin known by its provider."""
+        if self._remote_versions is None and self.origin_provider is not None:
+            self._remote_versions = self.origin_provider.probe_remote_versions()
+
+        return self._remote_versions
+
     _dependencies = None
 
     @property
@@ -221,6 +243,10 @@ class Library(Component):
              no_input=False):
         """
         """
+        from cookiecutter.generate import generate_context
+        from cookiecutter.generate import generate_files
+        from cookiecutter.prompt import prompt_for_config
+        from git import Repo as GitRepo
 
         context = generate_context(
             context_file=get_template_config(TEMPLATE_LIB),
@@ -312,7 +338,7 @@ class Library(Component):
             raise UnknownLibraryProvider(self.name)
 
         # Retrieve known versions
-        versions = self.origin_provider.probe_remote_versions()
+        versions = self.remote_versions
 
         semversions = []
 
@@ -394,6 +420,7 @@ class Library(Component):
 
             # Prompt user for a version
             else:
+                from cookiecutter.prompt import read_user_choice
                 version = read_user_choice(
                     'version',
                     sorted(list(versions.keys()), reverse=True)
@@ -435,7 +462,7 @@ class Library(Component):
         makefile_uk = os.path.join(self.localdir, MAKEFILE_UK)
         logger.debug("Reading %s..." % makefile_uk)
 
-        makefile_vars = make_list_vars(makefile_uk)['makefile']
+        makefile_vars = lib_makefile_vars(makefile_uk)
         version_var = None
 
         for var in makefile_vars:
@@ -473,5 +500,74 @@ class Library(Component):
 
 
 class LibraryManager(ComponentManager):
-    def __init__(self, components=[], cls=None):
-        super(LibraryManager, self).__init__(components, Library)
+    def __init__(self, components=[], cls=None, **extra):
+        super(LibraryManager, self).__init__(components, Library, **extra)
+
+    @classmethod
+    @click.pass_context
+    def from_libsdir(ctx, cls, libsdir=None):
+        """
+        Find every library downloaded to libsdir, UK_LIBS by default.
+        """
+        if libsdir is None:
+            libsdir = ctx.obj.env.get('UK_LIBS')
+
+        libraries = cls(None)
+        if libsdir is None or not os.path.isdir(libsdir):
+            return libraries
+
+        names = [
+            name for name in sorted(os.listdir(libsdir))
+            if os.path.isfile(os.path.join(libsdir, name, MAKEFILE_UK))
+        ]
+
+        manifests = resolve_manifests([
+            (ComponentType.LIB, name) for name in names
+        ])
+
+        for name in names:
+            libraries.add(Library(
+                name=name,
+                localdir=os.path.join(libsdir, name),
+                manifests=manifests,
+                ignore_version=True
+            ))
+
+        return libraries
+
+    @click.pass_context
+    def probe_remote_versions(ctx, self, concurrency=LIB_PROBE_CONCURRENCY):
+        """
+        Retrieve the versions known by the origin of every downloaded library
+        using a pool of workers.  Each worker first determines the origin of
+        its library, by running make on the library's Makefile.uk, and then
+        probes the remote, such that both overlap across libraries.
+
+        Args:
+            concurrency (int):  The number of libraries probed at once.
+
+        Returns:
+            list: The libraries which could not be probed and their error.
+        """
+        def probe(lib):
+            with ctx:
+                if lib.origin_provider is None:
+                    raise UnknownLibraryProvider(lib.name)
+
+                lib.remote_versions
+
+        errors = list()
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            futures = [
+                (lib, executor.submit(probe, lib)) for lib in self.all()
+                if lib.is_downloaded()
+            ]
+
+            for lib, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.debug("Could not probe %s: %s" % (lib.name, e))
+                    errors.append((lib, e))
+
+        return errors
@@ -34,7 +34,6 @@ from __future__ import unicode_literals
 
 from git import GitCommandError
 from git import Repo as GitRepo
-from git.cmd import Git as GitCmd
 
 from .provider import LibraryProvider
 from kraft.const import GIT_BRANCH_PATTERN
@@ -43,6 +42,7 @@ from kraft.const import GIT_UNIKRAFT_TAG_PATTERN
 from kraft.const import UNIKRAFT_ORIGIN
 from kraft.const import VSEMVER_PATTERN
 from kraft.logger import logger
+from kraft.util import git_ls_remote
 
 
 def git_probe_remote_versions(source=None):  # noqa: C901
@@ -64,18 +64,16 @@ def git_probe_remote_versions(source=None):  # noqa: C901
     if source.startswith("file://"):
         source = source[7:]
 
-    g = GitCmd()
-
     logger.debug("Probing remote git repository: %s..." % source)
 
     try:
-        g.ls_remote(source)
+        remote_refs = git_ls_remote(source)
 
     except GitCommandError as e:
         logger.fatal("Could not connect to repository: %s" % str(e))
         return versions
 
-    for refs in g.ls_remote(source).split('\n'):
+    for refs in remote_refs.split('\n'):
         hash_ref_list = refs.split('\t')
 
         # Empty repository
@@ -128,7 +126,7 @@ class GitLibraryProvider(LibraryProvider):
             pass
 
         try:
-            GitCmd().ls_remote(source)
+            git_ls_remote(source)
             return True
 
         except Exception:
@@ -33,6 +33,7 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import feedparser
+import requests
 
 from .tarball import TarballLibraryProvider
 from kraft.const import SEMVER_PATTERN
@@ -40,6 +41,8 @@ from kraft.const import SOURCEFORGE_DOWNLOAD
 from kraft.const import SOURCEFORGE_PROJECT_FEED
 from kraft.const import SOURCEFORGE_PROJECT_NAME
 from kraft.const import TARBALL_SUPPORTED_EXTENSIONS
+from kraft.logger import logger
+from kraft.util import http_get
 
 
 def sourceforge_probe_remote_versions(source=None):
@@ -60,7 +63,14 @@ def sourceforge_probe_remote_versions(source=None):
         return versions
 
     project_name = project_name.group(1)
-    feed = feedparser.parse(SOURCEFORGE_PROJECT_FEED % project_name)
+
+    try:
+        response = http_get(SOURCEFORGE_PROJECT_FEED % project_name)
+    except requests.RequestException as e:
+        logger.debug("Could not fetch feed of %s: %s" % (project_name, e))
+        return versions
+
+    feed = feedparser.parse(response.content)
 
     for entry in feed.entries:
         url_parts = entry.links[0].href
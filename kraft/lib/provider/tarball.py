@@ -32,12 +32,14 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import bs4
 import htmllistparse
 
 from .provider import LibraryProvider
 from kraft.const import SEMVER_PATTERN
 from kraft.const import TARBALL_SUPPORTED_EXTENSIONS
 from kraft.logger import logger
+from kraft.util import http_get
 
 
 def tarball_probe_remote_versions(source=None):
@@ -59,7 +61,12 @@ def tarball_probe_remote_versions(source=None):
                 break
 
     try:
-        cwd, listings = htmllistparse.fetch_listing(source, timeout=30)
+        response = http_get(source)
+        response.raise_for_status()
+
+        cwd, listings = htmllistparse.parse(
+            bs4.BeautifulSoup(response.content, 'html5lib')
+        )
 
         for listing in listings:
             if listing.name.endswith(tuple(TARBALL_SUPPORTED_EXTENSIONS)):
@@ -71,8 +78,6 @@ def tarball_probe_remote_versions(source=None):
         logger.warn(e)
         pass
 
-    print(versions)
-
     return versions
 
 
@@ -33,26 +33,113 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import bisect
 import os
 import pickle
 import sys
 import threading
 import uuid
 from datetime import datetime
+from datetime import timedelta
 from enum import Enum
 
 import click
 import dateutil.parser
 import semver
 import six
+from dateutil import tz
 
+from kraft.const import MANIFEST_SCHEMA_VERSION
 from kraft.const import UNIKRAFT_RELEASE_STABLE
 from kraft.const import UNIKRAFT_RELEASE_STAGING
 from kraft.error import KraftError
+from kraft.error import UnknownManifestSchemaError
 from kraft.error import UnknownVersionError
 from kraft.error import UnknownVersionFormatError
 from kraft.logger import logger
 
+EPOCH = datetime(1970, 1, 1)
+
+
+def parse_version(version=None):
+    """
+    Parse a version as a semantic version so that versions can be ordered.
+
+    Returns:
+        semver.VersionInfo: The parsed version, or None if version is not a
+            semantic version, e.g. a commit sha.
+    """
+    if not isinstance(version, six.string_types):
+        return None
+
+    # This accounts for the fact that some unikraft releases are not
+    # corresponding to semver, e.g. 0.4, and so we add an extra .0:
+    if version.count('.') == 1:
+        version += ".0"
+
+    try:
+        return semver.VersionInfo.parse(version)
+    except ValueError:
+        return None
+
+
+def to_epoch(timestamp=None):
+    """
+    Convert a timestamp to the number of seconds since the epoch, which is how
+    timestamps of the manifest are kept in memory and in the cache.  Naive
+    timestamps are taken to be in UTC.
+
+    Args:
+        timestamp (datetime, str or int):  The timestamp to convert.
+
+    Returns:
+        int: The number of seconds since the epoch, or None.
+    """
+    if timestamp is None or isinstance(timestamp, six.integer_types):
+        return timestamp
+
+    if isinstance(timestamp, float):
+        return int(timestamp)
+
+    if isinstance(timestamp, six.string_types):
+        # Unset timestamps were previously cached as the string "None"
+        if timestamp == "None":
+            return None
+
+        timestamp = dateutil.parser.parse(timestamp)
+
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(tz.tzutc()).replace(tzinfo=None)
+
+    return int((timestamp - EPOCH).total_seconds())
+
+
+def from_epoch(timestamp=None):
+    if timestamp is None:
+        return None
+
+    return EPOCH + timedelta(seconds=timestamp)
+
+
+def intern_string(value=None):
+    """
+    Intern strings which are repeated across many items of the manifest, e.g.
+    the names of versions and distributions, such that they are only kept in
+    memory once.
+    """
+    if isinstance(value, six.string_types):
+        return sys.intern(value)
+
+    return value
+
+
+def check_manifest_schema(obj=None, state=None):
+    if not isinstance(state, tuple) or len(state) == 0:
+        raise UnknownManifestSchemaError(type(obj).__name__, None)
+
+    if state[0] != MANIFEST_SCHEMA_VERSION:
+        raise UnknownManifestSchemaError(type(obj).__name__, state[0])
+
 
 class ManifestVersionEquality(Enum):
     EQ = ("==", "@")
@@ -88,36 +175,45 @@ class ManifestVersionEquality(Enum):
 
 
 class ManifestItemVersion(object):
-    _version = None
+    __slots__ = (
+        '_version',
+        '_git_sha',
+        '_timestamp',
+        '_tarball',
+        '_tarball_size',
+        '_tarball_checksum',
+    )
+
     @property
     def version(self): return self._version
 
-    _git_sha = None
     @property
     def git_sha(self): return self._git_sha
 
-    _timestamp = None
     @property
-    def timestamp(self): return self._timestamp
+    def timestamp(self): return from_epoch(self._timestamp)
 
-    _tarball = None
     @property
     def tarball(self): return self._tarball
 
-    _tarball_size = None
     @property
     def tarball_size(self): return self._tarball_size
 
-    _tarball_checksum = None
+    @tarball_size.setter
+    def tarball_size(self, tarball_size=None):
+        self._tarball_size = tarball_size
+
     @property
     def tarball_checksum(self): return self._tarball_checksum
 
+    @tarball_checksum.setter
+    def tarball_checksum(self, tarball_checksum=None):
+        self._tarball_checksum = tarball_checksum
+
     def __init__(self, **kwargs):
-        self._version = kwargs.get('version', None)
+        self._version = intern_string(kwargs.get('version', None))
         self._git_sha = kwargs.get('git_sha', None)
-        self._timestamp = kwargs.get('timestamp', None)
-        if self._timestamp is not None and isinstance(self._timestamp, six.string_types):
-            self._timestamp = dateutil.parser.parse(self._timestamp)
+        self._timestamp = to_epoch(kwargs.get('timestamp', None))
         self._tarball = kwargs.get('tarball', None)
         self._tarball_size = kwargs.get('tarball_size', None)
         self._tarball_checksum = kwargs.get('tarball_checksum', None)
@@ -126,16 +222,29 @@ class ManifestItemVersion(object):
         return "<ManifestItemVersion %s>" % (self._version)
 
     def __setstate__(self, state):
+        if isinstance(state, dict):
+            self.__init__()
+            self._setstate_dict(state)
+            return
+
+        check_manifest_schema(self, state)
+        (_, version, self._git_sha, self._timestamp, self._tarball,
+            self._tarball_size, self._tarball_checksum) = state
+        self._version = intern_string(version)
+
+    def _setstate_dict(self, state):
+        """
+        Restore the state of a version written by `to_dict`, which is also
+        how versions were cached before the schema was versioned.
+        """
         if "meta" in state:
             meta = state["meta"]
-            self._version = meta.get("name", None)
+            self._version = intern_string(meta.get("name", None))
 
         if "data" in state:
             data = state["data"]
             self._git_sha = data.get("git_sha", None)
-            self._timestamp = data.get("timestamp", None)
-            if self._timestamp is not None and isinstance(self._timestamp, six.string_types):
-                self._timestamp = dateutil.parser.parse(self._timestamp)
+            self._timestamp = to_epoch(data.get("timestamp", None))
             self._tarball = data.get("tarball", None)
             self._tarball_size = data.get("tarball_size", None)
             self._tarball_checksum = data.get("tarball_checksum", None)
@@ -147,13 +256,28 @@ class ManifestItemVersion(object):
         """
         Return state values to be pickled.
         """
+        return (
+            MANIFEST_SCHEMA_VERSION,
+            self._version,
+            self._git_sha,
+            self._timestamp,
+            self._tarball,
+            self._tarball_size,
+            self._tarball_checksum
+        )
+
+    def to_dict(self):
+        """
+        Return a readable representation of this version, e.g. to be output
+        as JSON.
+        """
         return {
             "meta": {
                 "name": self._version
             },
             "data": {
                 "git_sha": self._git_sha,
-                "timestamp": str(self._timestamp),
+                "timestamp": str(self.timestamp),
                 "tarball": self._tarball,
                 "tarball_size": self._tarball_size,
                 "tarball_checksum": self._tarball_checksum
@@ -162,35 +286,34 @@ class ManifestItemVersion(object):
 
 
 class ManifestItemDistribution(object):
-    _name = None
+    __slots__ = (
+        '_name',
+        '_manifest',
+        '_manifest_checksum',
+        '_latest',
+        '_versions',
+        '_index',
+    )
+
     @property
     def name(self): return self._name
 
-    _manifest = None
     @property
     def manifest(self): return self._manifest
 
-    _manifest_checksum = None
     @property
     def manifest_checksum(self): return self._manifest_checksum
 
-    _latest = None
     @property
     def latest(self):
-        # Pick the latest version if we have known versions, ordered by semver
-        if self._latest is None and \
-                self._versions is not None and \
-                len(self._versions) > 0:
-            self._latest = self.versions[
-                sorted(self._versions.keys(), reverse=True)[0]
-            ]
+        # Pick the latest version by semver if there are semantic versions,
+        # otherwise fall back to the first version which was added
+        index = self.index
+        if len(index) > 0:
+            return self._versions[index[-1][1]]
 
         return self._latest
 
-    _versions = None
-    @property
-    def versions(self): return self._versions
-
     @latest.setter
     def latest(self, version=None):
         if version is None:
@@ -198,16 +321,42 @@ class ManifestItemDistribution(object):
         if not isinstance(version, ManifestItemVersion):
             raise TypeError("expected ManifestItemVersion")
 
-        self._latest = version.version
+        self._latest = version
+
+    @property
+    def versions(self): return self._versions
+
+    @property
+    def index(self):
+        """
+        The semantic versions of the distribution as a sorted list of (parsed
+        version, version) pairs.  The index is built the first time it is
+        needed, rather than whenever a distribution is loaded from the
+        cache, and is then kept up to date as versions are added.
+        """
+        if self._index is None:
+            index = list()
+            for version in self._versions:
+                parsed = parse_version(version)
+                if parsed is not None:
+                    index.append((parsed, version))
+
+            index.sort()
+            self._index = index
+
+        return self._index
 
     def __init__(self, **kwargs):
-        self._manifest = kwargs.get('manifest', None)
+        self._manifest = intern_string(kwargs.get('manifest', None))
         self._manifest_checksum = kwargs.get('manifest_checksum', None)
-        self._name = kwargs.get('name', None)
+        self._name = intern_string(kwargs.get('name', None))
+        self._latest = None
+        self._versions = dict()
+        self._index = None
         self.latest = kwargs.get('latest', None)
 
-        if self.latest is not None \
-            and not isinstance(self.latest, ManifestItemDistribution):
+        if self._latest is not None \
+            and not isinstance(self._latest, ManifestItemDistribution):
             raise TypeError("expected ManifestItemDistribution")
 
         elif kwargs.get("latest_version", None) is not None:
@@ -220,7 +369,13 @@ class ManifestItemDistribution(object):
                 tarball_checksum=kwargs.get("latest_tarball_checksum", None)
             )
 
-        self._versions = dict()
+    def _index_version(self, version=None):
+        if self._index is None:
+            return
+
+        parsed = parse_version(version)
+        if parsed is not None:
+            bisect.insort(self._index, (parsed, version))
 
     def add_version(self, version=None):
         if isinstance(version, list):
@@ -233,39 +388,89 @@ class ManifestItemDistribution(object):
 
         if version.version not in self.versions.keys():
             self._versions[version.version] = version
+            self._index_version(version.version)
 
         if self._latest is None:
             self._latest = version
-            return
 
-        # This accounts for the fact that some unikraft releases are not
-        # corresponding to semver, e.g. 0.4, and so we add an extra .0:
-        current_version = version.version
-        if current_version.count('.') == 1:
-            current_version += ".0"
+    def get_version(self, version=None):
+        if version in self._versions.keys():
+            return self._versions[version]
 
-        latest_version = self._latest.version
-        if latest_version.count('.') == 1:
-            latest_version += ".0"
+        # Semantic versions are also matched if written differently, e.g. 0.4
+        # and 0.4.0 are the same version
+        parsed = parse_version(version)
+        if parsed is None:
+            return None
 
-        try:
-            if semver.compare(current_version, latest_version) > 0:
-                self._latest = version
+        index = self.index
+        i = bisect.bisect_left(index, (parsed,))
+        if i < len(index) and index[i][0] == parsed:
+            return self._versions[index[i][1]]
 
-        # If not a semantic version, maybe it's a commit sha
-        except ValueError:
-            pass
+        return None
+
+    def find_version(self, version=None,
+                     equality=ManifestVersionEquality.EQ):
+        """
+        Find the version of this distribution which satisfies a requirement.
+
+        Args:
+            version (str):  The required version.
+            equality (ManifestVersionEquality):  Whether exactly this version
+                is required, or this version or any later one.
+
+        Returns:
+            ManifestItemVersion: The matching version, being the latest one
+                if any later version satisfies the requirement, or None.
+        """
+        if equality == ManifestVersionEquality.EQ:
+            return self.get_version(version)
+
+        parsed = parse_version(version)
+        index = self.index
+        if parsed is None or len(index) == 0:
+            return None
+
+        if index[-1][0] >= parsed:
+            return self._versions[index[-1][1]]
 
-    def get_version(self, version=None):
-        if version in self._versions.keys():
-            return self._versions[version]
         return None
 
     def __setstate__(self, state):
+        self.__init__()
+
+        if isinstance(state, dict):
+            self._setstate_dict(state)
+            return
+
+        check_manifest_schema(self, state)
+        _, name, manifest, self._manifest_checksum, latest, versions = state
+        self._name = intern_string(name)
+        self._manifest = intern_string(manifest)
+
+        for data in versions:
+            version = ManifestItemVersion.__new__(ManifestItemVersion)
+            version.__setstate__(data)
+            self._versions[version.version] = version
+
+        # The first version added is only stored separately if it is not
+        # one of the versions of the distribution
+        if isinstance(latest, tuple):
+            self._latest = ManifestItemVersion.__new__(ManifestItemVersion)
+            self._latest.__setstate__(latest)
+        elif latest is not None:
+            self._latest = self._versions[latest]
+
+    def _setstate_dict(self, state):
+        """
+        Restore the state of a distribution written by `to_dict`, which is
+        also how distributions were cached before the schema was versioned.
+        """
         if "meta" in state:
             meta = state["meta"]
-            self._name = meta.get("name", None)
-            self._manifest = meta.get("manifest", None)
+            self._name = intern_string(meta.get("name", None))
+            self._manifest = intern_string(meta.get("manifest", None))
             self._manifest_checksum = meta.get("manifest_checksum", None)
 
         if "data" in state:
@@ -282,7 +487,6 @@ class ManifestItemDistribution(object):
 
             versions = data.get("versions", None)
             if versions is not None:
-                self._versions = dict()
                 for d in versions:
                     version = ManifestItemVersion()
                     version.__setstate__(versions[d])
@@ -292,18 +496,40 @@ class ManifestItemDistribution(object):
         """
         Return state values to be pickled.
         """
+        latest = self._latest
+        if latest is not None:
+            if self._versions.get(latest.version, None) is latest:
+                latest = latest.version
+            else:
+                latest = latest.__getstate__()
+
+        return (
+            MANIFEST_SCHEMA_VERSION,
+            self._name,
+            self._manifest,
+            self._manifest_checksum,
+            latest,
+            [version.__getstate__() for version in self._versions.values()]
+        )
+
+    def to_dict(self):
+        """
+        Return a readable representation of this distribution, e.g. to be
+        output as JSON.
+        """
         data = dict()
-        if self._latest is not None:
-            data["latest_git_sha"] = self._latest.git_sha
-            data["latest_version"] = self._latest.version
-            data["latest_timestamp"] = str(self._latest.timestamp)
-            data["latest_tarball"] = self._latest.tarball
-            data["latest_tarball_size "] = self._latest.tarball_size
-            data["latest_tarball_checksum"] = self._latest.tarball_checksum
+        latest = self.latest
+        if latest is not None:
+            data["latest_git_sha"] = latest.git_sha
+            data["latest_version"] = latest.version
+            data["latest_timestamp"] = str(latest.timestamp)
+            data["latest_tarball"] = latest.tarball
+            data["latest_tarball_size"] = latest.tarball_size
+            data["latest_tarball_checksum"] = latest.tarball_checksum
 
         if len(self._versions) > 0:
             data["versions"] = {
-                v: self._versions[v].__getstate__() for v in self._versions
+                v: self._versions[v].to_dict() for v in self._versions
             }
 
         return {
@@ -317,15 +543,28 @@ class ManifestItemDistribution(object):
 
 
 class ManifestItem(object):
-    _name = None
+    __slots__ = (
+        '_name',
+        '_description',
+        '_type',
+        '_manifest',
+        '_manifest_checksum',
+        '_dists',
+        '_git',
+        '_last_checked',
+        '_etag',
+        '_pushed_at',
+        '_refs_hash',
+        '_provider',
+        '_localdir',
+    )
+
     @property
     def name(self): return self._name
 
-    _description = None
     @property
     def description(self): return self._description
 
-    _type = None
     @property
     def type(self):
         if self._type is not None and isinstance(self._type, six.string_types):
@@ -335,27 +574,36 @@ class ManifestItem(object):
                 self._type = type
         return self._type
 
-    _manifest = None
     @property
     def manifest(self): return self._manifest
 
-    _manifest_checksum = None
     @property
     def manifest_checksum(self): return self._manifest_checksum
 
-    _dists = None
     @property
     def dists(self): return self._dists
 
-    _git = None
     @property
     def git(self): return self._git
 
-    _last_checked = None
     @property
-    def last_checked(self): return self._last_checked
+    def last_checked(self): return from_epoch(self._last_checked)
+
+    # The following are used to detect whether the upstream repository has
+    # changed since this item was last updated
+    @property
+    def etag(self): return self._etag
+
+    @etag.setter
+    def etag(self, etag=None):
+        self._etag = etag
+
+    @property
+    def pushed_at(self): return self._pushed_at
+
+    @property
+    def refs_hash(self): return self._refs_hash
 
-    _provider = None
     @property
     def provider(self):
         if self._provider is not None and isinstance(self._provider, six.string_types):
@@ -365,7 +613,6 @@ class ManifestItem(object):
                 self._provider = provider
         return self._provider
 
-    _localdir = None
     @property
     def localdir(self):
         """
@@ -383,13 +630,16 @@ class ManifestItem(object):
 
     def __init__(self, **kwargs):
         self._name = kwargs.get('name', None)
-        self._type = kwargs.get('type', None)
+        self._type = intern_string(kwargs.get('type', None))
         self._description = kwargs.get('description', None)
         self._dists = kwargs.get('dists', dict())
         self._git = kwargs.get('git', None)
-        self._last_checked = kwargs.get('last_checked', datetime.now())
-        self._provider = kwargs.get('provider', None)
-        self._manifest = kwargs.get('manifest', None)
+        self._last_checked = to_epoch(kwargs.get('last_checked', datetime.now()))
+        self._etag = kwargs.get('etag', None)
+        self._pushed_at = kwargs.get('pushed_at', None)
+        self._refs_hash = kwargs.get('refs_hash', None)
+        self._provider = intern_string(kwargs.get('provider', None))
+        self._manifest = intern_string(kwargs.get('manifest', None))
         self._manifest_checksum = kwargs.get('manifest_checksum', None)
         self._localdir = kwargs.get('localdir', None)
 
@@ -423,22 +673,18 @@ class ManifestItem(object):
             return self._dists[version].latest
 
         for dist in self._dists.keys():
-            if version in self._dists[dist].versions.keys():
-                return self._dists[dist].get_version(version)
+            found = self._dists[dist].get_version(version)
+            if found is not None:
+                return found
 
         return None
 
     @click.pass_context
     def download(ctx, self, localdir=None, equality=ManifestVersionEquality.EQ,
-            version=None, use_git=False, override_existing=False):
+            version=None, use_git=False, override_existing=False,
+            **kwargs):
         dist = None
 
-        # This accounts for the fact that some unikraft releases are not
-        # corresponding to semver, e.g. 0.4, and so we add an extra .0:
-        version_semver = version
-        if version is not None and version.count('.') == 1:
-            version_semver += ".0"
-
         # Select the distribution's latest if only the distribution is known
         if version is not None and version in self._dists:
             dist = self._dists[version]
@@ -446,37 +692,28 @@ class ManifestItem(object):
 
         # Find the distribution based on the version
         elif version is not None and dist is None:
+            found = None
+
             for d in self._dists:
+                match = self._dists[d].find_version(version, equality)
+                if match is None:
+                    continue
+
+                # This will ALSO select the distribution, based on whether the
+                # version matches or not. BE CAREFUL! e.g. staging@0.5 >
+                # stable@0.4
+                if found is None or (
+                        equality == ManifestVersionEquality.GT and
+                        parse_version(match.version) >
+                        parse_version(found.version)):
+                    dist = self._dists[d]
+                    found = match
+
                 if equality == ManifestVersionEquality.EQ:
-                    if version in self._dists[d].versions:
-                        dist = self._dists[d]
-                        version = dist.versions[version]
-                        break
-
-                else:
-                    for v in self._dists[d].versions:
-                        # This accounts for the fact that some unikraft releases
-                        # are not corresponding to semver, e.g. 0.4, and so we
-                        # add an extra .0:
-                        curr_semver = v
-                        if curr_semver.count('.') == 1:
-                            curr_semver += ".0"
-
-                        try:
-                            # This will ALSO select the distribution, based on
-                            # whether the version matches or not. BE CAREFUL!
-                            # e.g. staging@0.5 > stable@0.4
-                            if semver.compare(curr_semver, version_semver) >= 0:
-                                version_semver = curr_semver
-                                dist = self._dists[d]
-                                version = dist.versions[v]
-
-                                # don't break here, keep iterating to find
-                                # bigger and better versions.
-
-                        # If not a semantic version, maybe it's a commit sha
-                        except ValueError:
-                            pass
+                    break
+
+            if found is not None:
+                version = found
 
         # Set stable as the default distribution and choose its latest version
         elif UNIKRAFT_RELEASE_STABLE in self._dists:
@@ -502,31 +739,57 @@ class ManifestItem(object):
             localdir=localdir,
             version=version,
             use_git=use_git,
-            override_existing=override_existing
+            override_existing=override_existing,
+            **kwargs
         )
 
     def __str__(self):
         return "%s/%s" % (self.type.shortname, self.name)
 
     def __setstate__(self, state):
+        self.__init__(last_checked=None)
+
+        if isinstance(state, dict):
+            self._setstate_dict(state)
+            return
+
+        check_manifest_schema(self, state)
+        (_, self._name, type, self._description, manifest,
+            self._manifest_checksum, self._last_checked, self._etag,
+            self._pushed_at, self._refs_hash, provider, self._git,
+            dists) = state
+        self._type = intern_string(type)
+        self._manifest = intern_string(manifest)
+        self._provider = intern_string(provider)
+
+        for data in dists:
+            dist = ManifestItemDistribution.__new__(ManifestItemDistribution)
+            dist.__setstate__(data)
+            self._dists[dist.name] = dist
+
+    def _setstate_dict(self, state):
+        """
+        Restore the state of an item written by `to_dict`, which is also how
+        items were cached before the schema was versioned.
+        """
         if "meta" in state:
             meta = state["meta"]
             self._name = meta.get("name", None)
-            self._manifest = meta.get("manifest", None)
+            self._manifest = intern_string(meta.get("manifest", None))
             self._manifest_checksum = meta.get("manifest_checksum", None)
-            self._last_checked = meta.get("last_checked", None)
-            if self._last_checked is not None:
-                self._last_checked = dateutil.parser.parse(self._last_checked)
-            self._provider = meta.get("provider", None)
+            self._last_checked = to_epoch(meta.get("last_checked", None))
+            self._etag = meta.get("etag", None)
+            self._pushed_at = meta.get("pushed_at", None)
+            self._refs_hash = meta.get("refs_hash", None)
+            self._provider = intern_string(meta.get("provider", None))
 
         if "data" in state:
             data = state["data"]
             self._description = data.get("description", None)
-            self._type = data.get("type", None)
+            self._type = intern_string(data.get("type", None))
 
             dists = data.get("dists", None)
             if dists is not None:
-                self._dists = dict()
                 for d in dists:
                     dist = ManifestItemDistribution()
                     dist.__setstate__(dists[d])
@@ -538,13 +801,46 @@ class ManifestItem(object):
         """
         Return state values to be pickled.
         """
-        from kraft.cmd.list.provider.types import ListProviderType
+        # The type and provider are stored by name so that their modules do
+        # not need to be imported to read or write the cache
+        type = self._type
+        if type is not None and not isinstance(type, six.string_types):
+            type = type.shortname
+
+        provider = self._provider
+        if provider is not None and not isinstance(provider, six.string_types):
+            provider = provider.name
+
+        return (
+            MANIFEST_SCHEMA_VERSION,
+            self._name,
+            type,
+            self._description,
+            self._manifest,
+            self._manifest_checksum,
+            self._last_checked,
+            self._etag,
+            self._pushed_at,
+            self._refs_hash,
+            provider,
+            self._git,
+            [dist.__getstate__() for dist in self._dists.values()]
+        )
+
+    def to_dict(self):
+        """
+        Return a readable representation of this item, e.g. to be output as
+        JSON.
+        """
         return {
             "meta": {
                 "name": self._name,
                 "manifest": self._manifest,
                 "manifest_checksum": self._manifest_checksum,
-                "last_checked": str(self._last_checked),
+                "last_checked": str(self.last_checked),
+                "etag": self._etag,
+                "pushed_at": self._pushed_at,
+                "refs_hash": self._refs_hash,
                 "provider": self.provider.name,
                 "localdir": self.localdir
             },
@@ -552,7 +848,7 @@ class ManifestItem(object):
                 "description": self._description,
                 "type": self.type.shortname,
                 "dists": {
-                    d: self._dists[d].__getstate__() for d in self._dists
+                    d: self._dists[d].to_dict() for d in self._dists
                 },
                 "git": self._git
             }
@@ -560,19 +856,23 @@ class ManifestItem(object):
 
 
 class Manifest(object):
-    _manifest = None
+    __slots__ = (
+        '_manifest',
+        '_manifest_checksum',
+        '_items',
+        '_items_lock',
+    )
+
     @property
     def manifest(self): return self._manifest
 
-    _manifest_checksum = None
     @property
     def manifest_checksum(self): return self._manifest_checksum
 
-    _items = None
     def items(self): return self._items.items()
 
     def __init__(self, **kwargs):
-        self._manifest = kwargs.get('manifest', None)
+        self._manifest = intern_string(kwargs.get('manifest', None))
         self._manifest_checksum = kwargs.get('manifest_checksum', None)
         self._items = dict()
         self._items_lock = threading.Lock()
@@ -599,25 +899,38 @@ class Manifest(object):
         return "<Manifest %s>" % (self._manifest)
 
     def __setstate__(self, state):
-        if "meta" in state:
-            meta = state["meta"]
-            self._manifest = meta.get("manifest", None)
-            self._manifest_checksum = meta.get("manifest_checksum", None)
+        self.__init__()
 
-        self._items = state.get("data", dict())
-        self._items_lock = threading.Lock()
+        # Manifests cached before the schema was versioned hold the items
+        # themselves rather than their state
+        if isinstance(state, dict):
+            if "meta" in state:
+                meta = state["meta"]
+                self._manifest = intern_string(meta.get("manifest", None))
+                self._manifest_checksum = meta.get("manifest_checksum", None)
+
+            self._items = state.get("data", dict())
+            return
+
+        check_manifest_schema(self, state)
+        _, manifest, self._manifest_checksum, items = state
+        self._manifest = intern_string(manifest)
+
+        for data in items:
+            item = ManifestItem.__new__(ManifestItem)
+            item.__setstate__(data)
+            self._items[item.name] = item
 
     def __getstate__(self):
         """
         Return state values to be pickled.
         """
-        return {
-            "meta": {
-                "manifest": self._manifest,
-                "manifest_checksum": self._manifest_checksum
-            },
-            "data": self._items
-        }
+        return (
+            MANIFEST_SCHEMA_VERSION,
+            self._manifest,
+            self._manifest_checksum,
+            [item.__getstate__() for item in self._items.values()]
+        )
 
 
 class ManifestIndex(object):
@@ -637,34 +950,17 @@ class ManifestIndex(object):
 def maniest_from_name(ctx, name=None):
     from kraft.types import break_component_naming_format
 
-    components = list()
     if name is None:
-        return components
+        return list()
 
     type, name, _, _ = break_component_naming_format(name)
 
-    for manifest_origin in ctx.obj.cache.all():
-        manifest = ctx.obj.cache.get(manifest_origin)
-
-        for _, component in manifest.items():
-            if (type is None or \
-                    (type is not None \
-                        and type == component.type)) \
-                    and component.name == name:
-                components.append(component)
+    return ctx.obj.cache.find_items_by_name(type=type, name=name)
 
-    return components
 
 @click.pass_context
 def manifest_from_localdir(ctx, localdir=None):
     if localdir is None or not os.path.isdir(localdir):
         return None
 
-    for manifest_origin in ctx.obj.cache.all():
-        manifest = ctx.obj.cache.get(manifest_origin)
-
-        for _, component in manifest.items():
-            if component.localdir == localdir:
-                return component
-
-    return None
+    return ctx.obj.cache.find_item_by_localdir(localdir)
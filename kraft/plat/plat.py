@@ -51,9 +51,14 @@ class Platform(Component):
 
     @click.pass_context
     def __init__(ctx, self, *args, **kwargs):
-        self._name = kwargs.get("name", None)
+        # External platforms are resolved like any other component, e.g.
+        # from the manifests resolved together with those of the application
+        super(Platform, self).__init__(*args, **kwargs)
+
         self._core = kwargs.get("core", None)
+        self._init_runner()
 
+    def _init_runner(self):
         runner = str_to_runner(self.name)
         if runner is not None:
             self._runner = runner.cls()
@@ -83,10 +88,10 @@ class InternalPlatform(Platform):
 
     @click.pass_context
     def __init__(ctx, self, *args, **kwargs):
-        super(InternalPlatform, self).__init__(*args, **kwargs)
-
+        self._name = kwargs.get("name", None)
         self._core = kwargs.get("core", None)
         self._kconfig = list()
+        self._init_runner()
 
         config = kwargs.get("config", None)
 
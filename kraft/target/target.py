@@ -83,6 +83,7 @@ class Target(object):
         self._config = kwargs
         self._name = kwargs.get('name', None)
         self._core = kwargs.get('core', None)
+        manifests = kwargs.get('manifests', None)
 
         arch = kwargs.get('architecture', None)
         if isinstance(arch, Architecture):
@@ -96,7 +97,8 @@ class Target(object):
                 )
             else:
                 self._architecture = Architecture(
-                    name=arch
+                    name=arch,
+                    manifests=manifests
                 )
 
         plat = kwargs.get('platform', None)
@@ -111,7 +113,8 @@ class Target(object):
                 )
             else:
                 self._platform = Platform(
-                    name=plat
+                    name=plat,
+                    manifests=manifests
                 )
 
     def binary_name(self, appname=None, debug=False):
@@ -142,11 +145,12 @@ class Target(object):
 class TargetManager(ComponentManager):
     _core = None
 
-    def __init__(self, components=[], core=None):
+    def __init__(self, components=[], core=None, **extra):
         super(TargetManager, self).__init__(
             components=components,
             cls=Target,
             core=core,
+            **extra
         )
 
         self._core = core
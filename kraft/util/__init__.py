@@ -39,12 +39,27 @@ from .cli import ClickWriterCommand
 from .cli import ClickWriterOption
 from .cli import KraftHelpCommand
 from .cli import KraftHelpGroup
+from .cli import KraftLazyGroup
 from .dir import delete_resource
 from .dir import is_dir_empty
 from .dir import recursively_copy
+from .git import git_borrow_objects
+from .git import git_ls_remote
+from .git import git_mirror
+from .git import git_mirror_path
+from .http import http_get
+from .http import http_post
+from .http import http_request
+from .http import http_reset
+from .http import http_session
+from .http import http_stats
 from .make import make_list_vars
+from .make import make_version
 from .op import execute
 from .op import merge_dicts
+from .text import parse_size
 from .text import pretty_columns
+from .text import pretty_size
 from .text import prettydate
+from .threading import ConcurrencyBudget
 from .threading import ErrorPropagatingThread
@@ -173,6 +173,33 @@ class KraftHelpGroup(KraftHelpMixin, click.Group):
             formatter.write(self.epilog)
 
 
+class KraftLazyGroup(KraftHelpGroup):
+    """
+    A group whose sub-commands are only imported once they are needed, such
+    that invoking one command does not import the dependencies of all others.
+    Sub-commands are registered by name with the path to the command in the
+    form "module:attribute".
+    """
+    def __init__(self, *args, **kwargs):
+        self.lazy_commands = kwargs.pop('lazy_commands', dict())
+        super(KraftLazyGroup, self).__init__(*args, **kwargs)
+
+    def add_lazy_command(self, name, import_path):
+        self.lazy_commands[name] = import_path
+
+    def list_commands(self, ctx):
+        commands = super(KraftLazyGroup, self).list_commands(ctx)
+        return sorted(set(commands) | set(self.lazy_commands.keys()))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            module_name, attr = self.lazy_commands[cmd_name].split(':', 1)
+            module = __import__(module_name, fromlist=[attr])
+            self.add_command(getattr(module, attr), cmd_name)
+
+        return super(KraftLazyGroup, self).get_command(ctx, cmd_name)
+
+
 class KraftHelpCommand(KraftHelpMixin, click.Command):
     def __init__(self, *args, **kwargs):
         super(KraftHelpCommand, self).__init__(*args, **kwargs)
@@ -0,0 +1,210 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Laboratories GmbH., NEC Corporation.
+#                     All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from kraft.const import GIT_LS_REMOTE_TTL
+from kraft.const import GIT_SHA_PATTERN
+from kraft.const import UNIKRAFT_GIT_MIRRORDIR
+from kraft.logger import logger
+
+_ls_remote_cache = dict()
+_locks = dict()
+_locks_lock = threading.Lock()
+
+
+def _named_lock(name=None):
+    with _locks_lock:
+        if name not in _locks:
+            _locks[name] = threading.Lock()
+
+        return _locks[name]
+
+
+def git_ls_remote(remote=None, ttl=GIT_LS_REMOTE_TTL):
+    """
+    List the references advertised by a remote repository, as output by
+    `git ls-remote`.  The result for each remote is shared for ttl seconds,
+    such that detecting, probing and listing the versions of a remote costs
+    a single round trip.  Failures are shared in the same way.
+
+    Args:
+        remote (str):  The URL or path of the remote repository.
+        ttl (int):  The number of seconds a previous result may be re-used.
+
+    Returns:
+        str: The output of `git ls-remote`.
+
+    Raises:
+        GitCommandError: The remote could not be listed.
+    """
+    # GitPython is only imported once needed as it is slow to import
+    from git.cmd import Git
+
+    # Concurrent requests for the same remote wait for the first to complete
+    with _named_lock(remote):
+        entry = _ls_remote_cache.get(remote, None)
+        if entry is not None and time.time() - entry[0] < ttl:
+            refs, error = entry[1], entry[2]
+
+        else:
+            logger.debug("Listing references of %s..." % remote)
+            refs, error = None, None
+
+            try:
+                refs = Git().ls_remote(remote)
+            except Exception as e:
+                error = e
+
+            _ls_remote_cache[remote] = (time.time(), refs, error)
+
+    if error is not None:
+        raise error
+
+    return refs
+
+
+def git_mirror_path(cachedir=None, remote=None):
+    """
+    Return the path of the mirror of a remote repository within cachedir.
+    """
+    return os.path.join(cachedir, UNIKRAFT_GIT_MIRRORDIR, "%s.git" % (
+        hashlib.sha1(remote.encode('utf-8')).hexdigest()
+    ))
+
+
+@contextmanager
+def git_mirror_lock(mirrordir=None):
+    """
+    Hold exclusive access to a mirror, both within this process and across
+    other kraft processes sharing the same cache directory.
+    """
+    import fcntl
+
+    os.makedirs(os.path.dirname(mirrordir), exist_ok=True)
+
+    with _named_lock(mirrordir):
+        with open("%s.lock" % mirrordir, "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def git_mirror(remote=None, mirrordir=None, ref=None, depth=0,
+               progress=None):
+    """
+    Fetch a reference of a remote repository into a bare mirror of it, which
+    is created if it does not yet exist.  Only what is missing from the mirror
+    is fetched.  Each fetched commit stays referenced under refs/kraft/ and
+    garbage collection is disabled in the mirror, such that repositories
+    which borrow its objects via git alternates never lose them.
+
+    Args:
+        remote (str):  The URL or path of the remote repository.
+        mirrordir (str):  The path of the bare mirror.
+        ref (str):  The tag, branch or commit to fetch.
+        depth (int):  The number of commits of history to fetch, 0 for all.
+        progress (RemoteProgress):  Reports the progress of the fetch.
+
+    Returns:
+        str: The hash of the commit ref refers to.
+
+    Raises:
+        GitCommandError: The reference could not be fetched.
+    """
+    from git import GitCommandError
+    from git import Repo as GitRepo
+
+    with git_mirror_lock(mirrordir):
+        if os.path.isdir(mirrordir):
+            repo = GitRepo(mirrordir)
+        else:
+            logger.debug("Creating mirror of %s..." % remote)
+            repo = GitRepo.init(mirrordir, bare=True)
+            with repo.config_writer() as config:
+                config.set_value("gc", "auto", "0")
+
+        if "origin" not in [r.name for r in repo.remotes]:
+            repo.create_remote("origin", remote)
+
+        shallow = os.path.exists(os.path.join(mirrordir, "shallow"))
+
+        # Tags and branches may have moved upstream, so only commits which
+        # are already mirrored with enough history are not fetched again
+        if GIT_SHA_PATTERN.match(ref) is not None \
+                and (not shallow or depth == 1):
+            try:
+                repo.git.cat_file("-e", "%s^{commit}" % ref)
+                return ref
+            except GitCommandError:
+                pass
+
+        options = dict()
+        if depth > 0:
+            options["depth"] = depth
+        elif shallow:
+            options["unshallow"] = True
+
+        logger.debug("Updating mirror of %s with %s..." % (remote, ref))
+        repo.remotes.origin.fetch(refspec=[ref], progress=progress, **options)
+
+        sha = repo.git.rev_parse("FETCH_HEAD^{commit}")
+        repo.git.update_ref("refs/kraft/%s" % sha, sha)
+
+    return sha
+
+
+def git_borrow_objects(repo=None, mirrordir=None):
+    """
+    Let repo use the objects of a mirror via git alternates, rather than
+    storing its own copy of them.
+    """
+    objects = os.path.join(os.path.abspath(mirrordir), "objects")
+    alternates = os.path.join(repo.git_dir, "objects", "info", "alternates")
+
+    existing = list()
+    if os.path.exists(alternates):
+        with open(alternates, "r") as f:
+            existing = f.read().splitlines()
+
+    if objects not in existing:
+        os.makedirs(os.path.dirname(alternates), exist_ok=True)
+        with open(alternates, "a") as f:
+            f.write("%s\n" % objects)
@@ -0,0 +1,174 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Laboratories GmbH., NEC Corporation.
+#                     All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import threading
+from collections import defaultdict
+
+from kraft.const import HTTP_POOL_HOSTS
+from kraft.const import HTTP_POOL_MAXSIZE
+from kraft.const import HTTP_RETRIES
+from kraft.const import HTTP_RETRY_BACKOFF
+from kraft.const import HTTP_RETRY_STATUSES
+from kraft.const import HTTP_TIMEOUT
+
+_session = None
+_session_lock = threading.Lock()
+_stats = defaultdict(lambda: defaultdict(float))
+_stats_lock = threading.Lock()
+
+
+def _record(response, *args, **kwargs):
+    """
+    Response hook which accounts for every request made via the session.
+    """
+    # requests is only imported once needed as it is slow to import
+    from requests.utils import urlparse
+
+    retries = getattr(response.raw, 'retries', None)
+
+    with _stats_lock:
+        host = _stats[urlparse(response.url).netloc]
+        host['requests'] += 1
+        host['elapsed'] += response.elapsed.total_seconds()
+        if retries is not None:
+            host['retries'] += len(retries.history)
+
+
+def http_session():
+    """
+    Return the HTTP session shared by the plain HTTP requests of every
+    provider, e.g. tarball downloads, directory listings, feeds and GraphQL
+    queries.  Connections are kept alive and pooled per host, with at most
+    HTTP_POOL_MAXSIZE connections to the same host at once, and idempotent
+    requests are retried with an exponential backoff on connection errors
+    and server errors.  Requests made with PyGithub to GitHub's REST API do
+    not use this session, as PyGithub manages its own connections.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_HOSTS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                    pool_block=True,
+                    max_retries=Retry(
+                        total=HTTP_RETRIES,
+                        backoff_factor=HTTP_RETRY_BACKOFF,
+                        status_forcelist=HTTP_RETRY_STATUSES,
+                        raise_on_status=False
+                    )
+                )
+
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.hooks['response'].append(_record)
+                _session = session
+
+    return _session
+
+
+def http_request(method=None, url=None, timeout=HTTP_TIMEOUT, **kwargs):
+    """
+    Perform a request via the shared session.  Unlike requests itself, a
+    request never waits indefinitely: timeout applies to connecting and to
+    each read from the server.
+
+    Returns:
+        requests.Response: The response of the server.
+    """
+    return http_session().request(method, url, timeout=timeout, **kwargs)
+
+
+def http_get(url=None, **kwargs):
+    return http_request('GET', url, **kwargs)
+
+
+def http_post(url=None, **kwargs):
+    return http_request('POST', url, **kwargs)
+
+
+def http_stats():
+    """
+    Return, for each host contacted, the number of requests made, how many
+    of them were retried, the connections which had to be opened and the
+    total time spent waiting for responses.
+
+    Returns:
+        dict: The statistics of each host, keyed by its name.
+    """
+    if _session is None:
+        return dict()
+
+    with _stats_lock:
+        stats = dict((host, dict(values)) for host, values in _stats.items())
+
+    # Connections which were re-used from the pool are not counted
+    poolmanager = _session.get_adapter('https://').poolmanager
+    for key in list(poolmanager.pools.keys()):
+        pool = poolmanager.pools.get(key)
+        if pool is None:
+            continue
+
+        host = pool.host
+        if pool.port not in [None, 80, 443]:
+            host = "%s:%d" % (host, pool.port)
+
+        stats.setdefault(host, dict())['connections'] = pool.num_connections
+
+    return stats
+
+
+def http_reset():
+    """
+    Close all pooled connections and forget the statistics collected so far.
+    """
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+    with _stats_lock:
+        _stats.clear()
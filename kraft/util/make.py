@@ -32,33 +32,102 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import hashlib
+import json
+import os
 import re
 import subprocess
+import tempfile
+import threading
 
+from kraft.const import UNIKRAFT_MAKEVARSDIR
+from kraft.error import UnsupportedMakefileConstruct
+from kraft.logger import logger
 
-def make_list_vars(Makefile=None, origin=None):
+# Only variables defined by the Makefile itself are cached, since those of
+# the other origins, e.g. the environment, may differ between invocations
+MAKE_CACHED_ORIGINS = ['makefile', 'override']
+
+# Environment variables which may affect the variables of a Makefile, in
+# addition to those it references by name, e.g. via $(shell ...)
+MAKE_ENVIRONMENT = ['PATH', 'MAKEFLAGS']
+MAKE_ENVIRONMENT_PREFIXES = ('CONFIG_', 'UK_')
+
+# Variables which the shell changes on its own and which Makefiles do not
+# depend on
+MAKE_ENVIRONMENT_VOLATILE = frozenset(['_', 'OLDPWD', 'PWD', 'SHLVL'])
+
+# References to a variable: $(NAME), ${NAME}, $N, the functions which take
+# the name of a variable, and the conditionals which test whether it is set
+MAKE_REFERENCE = re.compile(
+    br"(?<!\$)\$[({](?:(?:origin|value|flavor)\s+)?([A-Za-z0-9_]+)"
+    br"|(?<!\$)\$([A-Za-z0-9_])"
+    br"|\b(?:ifdef|ifndef)\s+([A-Za-z0-9_]+)"
+)
+
+# Variables which make defines itself, whose values can only be known by
+# running it.  Those of names which contain a period, e.g. COMPILE.c, and the
+# automatic variables are recognised separately.
+MAKE_DEFAULT_VARIABLES = frozenset([
+    'AR', 'ARFLAGS', 'AS', 'CC', 'CO', 'COFLAGS', 'CPP', 'CTANGLE', 'CURDIR',
+    'CWEAVE', 'CXX', 'F77', 'F77FLAGS', 'FC', 'GET', 'GNUMAKEFLAGS', 'LD',
+    'LEX', 'LINT', 'M2C', 'MAKE', 'MAKECMDGOALS', 'MAKEFILES',
+    'MAKEFILE_LIST', 'MAKEFLAGS', 'MAKEINFO', 'MAKELEVEL', 'MAKE_COMMAND',
+    'MAKE_HOST', 'MAKE_RESTARTS', 'MAKE_TERMERR', 'MAKE_TERMOUT',
+    'MAKE_VERSION', 'MFLAGS', 'OBJC', 'OUTPUT_OPTION', 'PC', 'RM', 'SHELL',
+    'SUFFIXES', 'TANGLE', 'TEX', 'TEXI2DVI', 'VPATH', 'WEAVE', 'YACC',
+])
+
+MAKE_CONDITIONALS = ['ifeq', 'ifneq', 'ifdef', 'ifndef']
+
+# Directives which are not evaluated statically
+MAKE_UNSUPPORTED_DIRECTIVES = [
+    'define', 'endef', 'include', '-include', 'sinclude', 'override',
+    'export', 'unexport', 'undefine', 'vpath', 'private', 'load'
+]
+
+MAKE_ASSIGNMENT = re.compile(r"(::?=|:::=|\+=|\?=|!=|=)")
+MAKE_DIRECTIVE = re.compile(r"^(-?[a-z]+)(?=[\s(]|$)")
+
+_make_version = None
+_make_vars = dict()
+_make_lock = threading.Lock()
+
+
+def make_version():
     """
-    Generate the (key, value) dict of all variables defined in make process.
+    Return the version of make, as the first line of `make --version`.  This
+    is determined once per process.
+    """
+    global _make_version
 
-    Args:
-        Makefile:  The location of the Makefile to expand.
-        origin:  The means of selecting where the variable is derived from.
-            Choose from: 'automatic', 'environment', 'default', 'override',
-            'makefile'.  Setting to None returns all origins.
+    with _make_lock:
+        if _make_version is None:
+            _make_version = subprocess.getoutput("make --version") \
+                .split("\n")[0]
 
-    Returns:
-        A dict mapping keys to the corresponding variable.
+    return _make_version
+
+
+def make_parse_vars(lines=None, origin=None):
     """
+    Parse the variables of the database printed by `make -p`.
 
-    p = subprocess.getoutput("make -pnB -f %s" % Makefile)
+    Args:
+        lines:  An iterable of the lines of the database.
+        origin:  The origins of the variables to parse.  Setting to None
+            parses all origins.
 
+    Returns:
+        A dict mapping each origin to the variables derived from it.
+    """
     M = {}
     re_var = re.compile(r"^#\s*Variables\b")  # start of variable segment
     re_varend = re.compile(r"^#\s*variable")  # end of variables
     state = None  # state of parser
     mname = None
 
-    for line in p.splitlines():
+    for line in lines:
         if state is None and re_var.search(line):
             state = 'var'
 
@@ -75,6 +144,7 @@ def make_list_vars(Makefile=None, origin=None):
 
             elif mname is not None:
                 if origin is not None and mname not in origin:
+                    mname = None
                     continue
 
                 if mname not in M:
@@ -90,3 +160,489 @@ def make_list_vars(Makefile=None, origin=None):
                 mname = None
 
     return M
+
+
+def make_dump_vars(Makefile=None, origin=None):
+    """
+    Run `make -pnB` on a Makefile and parse its variables.  The variables are
+    printed before the rest of make's database, so make is stopped as soon as
+    they have all been read.
+    """
+    proc = subprocess.Popen(
+        ["make", "-pnB", "-f", Makefile],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        stdin=subprocess.DEVNULL,
+        universal_newlines=True
+    )
+
+    try:
+        return make_parse_vars(proc.stdout, origin)
+
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+
+
+class MakefileReader(object):
+    """
+    Read the variables assigned in a Makefile without running make, as
+    `make -pnB` would report them for the makefile origin: the assignments
+    `=`, `:=`, `::=`, `?=` and `+=`, the conditionals and references to other
+    variables are evaluated.  Calls to functions are not, except for those
+    which have no effect when read standalone, like the registration of a
+    Unikraft library with `$(eval $(call addlib_s,...))`.
+
+    Raises UnsupportedMakefileConstruct for anything else, such that make can
+    be run instead.
+    """
+
+    def __init__(self, Makefile=None):
+        self._makefile = Makefile
+        self._lineno = 0
+        self._vars = dict()
+        self._expanding = set()
+        self._conditionals = list()
+
+    def unsupported(self, reason):
+        raise UnsupportedMakefileConstruct(self._makefile, self._lineno, reason)
+
+    def lines(self):
+        """
+        Yield each logical line of the Makefile, with continuations joined and
+        comments removed.
+        """
+        with open(self._makefile, 'r') as f:
+            physical = f.read().split("\n")
+
+        i = 0
+        while i < len(physical):
+            self._lineno = i + 1
+            line = physical[i]
+            i += 1
+
+            while line.endswith("\\") and i < len(physical):
+                line = line[:-1].rstrip() + " " + physical[i].lstrip()
+                i += 1
+
+            if "\\#" in line:
+                self.unsupported("escaped comment")
+
+            yield line.split("#", 1)[0]
+
+    def find_closing(self, text, start):
+        """Return the index of the parenthesis closing that at start."""
+        stack = list()
+        for i in range(start, len(text)):
+            if text[i] in "({":
+                stack.append(")" if text[i] == "(" else "}")
+            elif len(stack) > 0 and text[i] == stack[-1]:
+                stack.pop()
+                if len(stack) == 0:
+                    return i
+
+        self.unsupported("unterminated variable reference")
+
+    def split_args(self, text):
+        """Split the arguments of a function at commas outside references."""
+        args = list()
+        depth = 0
+        last = 0
+        for i, c in enumerate(text):
+            if c in "({":
+                depth += 1
+            elif c in ")}":
+                depth -= 1
+            elif c == "," and depth == 0:
+                args.append(text[last:i])
+                last = i + 1
+
+        args.append(text[last:])
+        return args
+
+    def is_builtin(self, name):
+        return name in MAKE_DEFAULT_VARIABLES or name in os.environ \
+            or "." in name or len(name) == 0 or name[0] in "%*+<?@^"
+
+    def variable(self, name):
+        """Return the expanded value of a variable."""
+        if name not in self._vars:
+            if self.is_builtin(name):
+                self.unsupported("reference to %s" % name)
+
+            return ''
+
+        flavor, value = self._vars[name]
+        if flavor == 'simple':
+            return value
+
+        if name in self._expanding:
+            self.unsupported("recursive reference to %s" % name)
+
+        self._expanding.add(name)
+        try:
+            return self.expand(value)
+        finally:
+            self._expanding.discard(name)
+
+    def function(self, name, text):
+        args = self.split_args(text)
+
+        # Calling a variable which is not defined expands to nothing, but
+        # its arguments are still expanded
+        if name == 'call':
+            if self.expand(args[0]).strip() in self._vars:
+                self.unsupported("call of %s" % args[0].strip())
+
+            for arg in args[1:]:
+                self.expand(arg)
+
+            return ''
+
+        # Evaluating nothing has no effect
+        elif name == 'eval':
+            if self.expand(text).strip() != '':
+                self.unsupported("eval of %s" % text.strip())
+
+            return ''
+
+        self.unsupported("function %s" % name)
+
+    def reference(self, text):
+        parts = text.split(None, 1)
+        if len(parts) == 2 and "$" not in parts[0] \
+                and not text[0].isspace():
+            return self.function(parts[0], parts[1])
+
+        if ":" in text and "=" in text:
+            self.unsupported("substitution reference %s" % text)
+
+        return self.variable(self.expand(text))
+
+    def expand(self, text):
+        """Expand the references to variables in text."""
+        if "$" not in text:
+            return text
+
+        out = list()
+        i = 0
+        while i < len(text):
+            c = text[i]
+            if c != "$":
+                out.append(c)
+                i += 1
+                continue
+
+            if i + 1 == len(text):
+                self.unsupported("trailing $")
+
+            n = text[i + 1]
+            if n == "$":
+                out.append("$")
+                i += 2
+
+            elif n in "({":
+                end = self.find_closing(text, i + 1)
+                out.append(self.reference(text[i + 2:end]))
+                i = end + 1
+
+            else:
+                out.append(self.variable(n))
+                i += 2
+
+        return "".join(out)
+
+    def condition(self, directive, text):
+        """Evaluate the condition of an ifeq, ifneq, ifdef or ifndef."""
+        text = text.strip()
+
+        if directive in ['ifdef', 'ifndef']:
+            name = self.expand(text).strip()
+            if name not in self._vars and self.is_builtin(name):
+                self.unsupported("%s %s" % (directive, name))
+
+            defined = self._vars.get(name, (None, ''))[1] != ''
+            return defined if directive == 'ifdef' else not defined
+
+        if text.startswith("(") and text.endswith(")"):
+            args = self.split_args(text[1:-1])
+            if len(args) != 2:
+                self.unsupported("%s %s" % (directive, text))
+
+            a, b = args[0].rstrip(), args[1].lstrip()
+
+        else:
+            quoted = re.match(r"""^("[^"]*"|'[^']*')\s+("[^"]*"|'[^']*')$""",
+                              text)
+            if quoted is None:
+                self.unsupported("%s %s" % (directive, text))
+
+            a, b = quoted.group(1)[1:-1], quoted.group(2)[1:-1]
+
+        equal = self.expand(a) == self.expand(b)
+        return equal if directive == 'ifeq' else not equal
+
+    def assign(self, name, op, value):
+        name = self.expand(name).strip()
+        if name == '' or len(name.split()) > 1:
+            self.unsupported("variable name %s" % name)
+
+        if op in ['=', ':=', '::=']:
+            if op == '=':
+                self._vars[name] = ('recursive', value)
+            else:
+                self._vars[name] = ('simple', self.expand(value))
+
+        elif name not in self._vars and self.is_builtin(name):
+            self.unsupported("%s of %s" % (op, name))
+
+        elif op == '?=':
+            if name not in self._vars:
+                self._vars[name] = ('recursive', value)
+
+        elif op == '+=':
+            flavor, old = self._vars.get(name, ('recursive', ''))
+            if flavor == 'simple':
+                value = self.expand(value)
+            if old != '':
+                value = old + " " + value
+
+            self._vars[name] = (flavor, value)
+
+        else:
+            self.unsupported("%s assignment" % op)
+
+    def reading(self):
+        return len(self._conditionals) == 0 or self._conditionals[-1][2]
+
+    def branch(self, directive, rest):
+        """
+        Enter, switch or leave the branch of a conditional.  Each conditional
+        on the stack records whether its enclosing block is read, whether one
+        of its branches was taken and whether the current branch is read.
+        """
+        if directive in MAKE_CONDITIONALS:
+            reading = self.reading()
+            taken = not reading or self.condition(directive, rest)
+            self._conditionals.append((reading, taken, reading and taken))
+            return
+
+        if len(self._conditionals) == 0:
+            self.unsupported("%s without conditional" % directive)
+
+        parent, taken, _ = self._conditionals.pop()
+        rest = rest.strip()
+
+        if directive == 'endif':
+            return
+
+        if rest == '':
+            self._conditionals.append((parent, True, parent and not taken))
+            return
+
+        match = MAKE_DIRECTIVE.match(rest)
+        if match is None or match.group(1) not in MAKE_CONDITIONALS:
+            self.unsupported("else %s" % rest)
+
+        read = parent and not taken and self.condition(
+            match.group(1), rest[len(match.group(1)):]
+        )
+        self._conditionals.append((parent, taken or read, read))
+
+    def read(self):
+        """
+        Returns:
+            A dict mapping the makefile origin to the variables assigned.
+        """
+        for line in self.lines():
+            stripped = line.strip()
+            if stripped == '':
+                continue
+
+            match = MAKE_DIRECTIVE.match(stripped)
+            directive = match.group(1) if match is not None else None
+
+            if directive in MAKE_CONDITIONALS + ['else', 'endif']:
+                self.branch(directive, stripped[len(directive):])
+
+            elif not self.reading():
+                pass
+
+            elif directive in MAKE_UNSUPPORTED_DIRECTIVES:
+                self.unsupported(directive)
+
+            else:
+                self.statement(line.lstrip())
+
+        if len(self._conditionals) > 0:
+            self.unsupported("missing endif")
+
+        return {
+            'makefile': {
+                name: value.strip() for name, (_, value) in self._vars.items()
+            }
+        }
+
+    def statement(self, line):
+        """Read an assignment or a line which only expands references."""
+        depth = 0
+        for i, c in enumerate(line):
+            if c in "({":
+                depth += 1
+            elif c in ")}":
+                depth -= 1
+            elif depth == 0 and c in "+?!:=":
+                op = MAKE_ASSIGNMENT.match(line, i)
+                if op is not None:
+                    self.assign(line[:i], op.group(1),
+                                line[op.end():].lstrip())
+                    return
+
+                if c == ":":
+                    self.unsupported("rule")
+
+        if self.expand(line).strip() != '':
+            self.unsupported("missing separator")
+
+
+def make_read_vars(Makefile=None):
+    """
+    Read the variables assigned in a Makefile without running make.
+
+    Raises:
+        UnsupportedMakefileConstruct: The Makefile cannot be read without
+            running make.
+    """
+    return MakefileReader(Makefile).read()
+
+
+def make_references(content=None):
+    """
+    Returns:
+        set: The names of the variables referenced by the content of a
+            Makefile.
+    """
+    return set(
+        name.decode('utf-8', 'replace')
+        for match in MAKE_REFERENCE.finditer(content)
+        for name in match.groups() if name is not None
+    )
+
+
+def make_vars_key(Makefile=None):
+    """
+    Return the key by which the variables of a Makefile are cached: the
+    digest of its content, the version of make, the working directory and
+    the environment which may affect its variables, i.e. the variables
+    referenced by the Makefile, those of Unikraft and the configuration,
+    and the search path of the commands it runs.
+    """
+    with open(Makefile, 'rb') as f:
+        content = f.read()
+
+    h = hashlib.sha256(content)
+    h.update(b"\0")
+    h.update(make_version().encode('utf-8'))
+    h.update(b"\0")
+    h.update(os.getcwd().encode('utf-8'))
+
+    references = make_references(content)
+
+    for name in sorted(os.environ):
+        if name in MAKE_ENVIRONMENT_VOLATILE:
+            continue
+
+        if name in MAKE_ENVIRONMENT \
+                or name.startswith(MAKE_ENVIRONMENT_PREFIXES) \
+                or name in references:
+            h.update(b"\0%s=%s" % (
+                name.encode('utf-8'), os.environ[name].encode('utf-8')
+            ))
+
+    return h.hexdigest()
+
+
+def make_vars_path(cachedir=None, key=None):
+    return os.path.join(cachedir, UNIKRAFT_MAKEVARSDIR, "%s.json" % key)
+
+
+def make_read_cached_vars(cachedir=None, key=None):
+    try:
+        with open(make_vars_path(cachedir, key), 'r') as f:
+            return json.load(f)
+
+    except (OSError, ValueError):
+        return None
+
+
+def make_write_cached_vars(cachedir=None, key=None, variables=None):
+    path = make_vars_path(cachedir, key)
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(
+            dir=os.path.dirname(path),
+            prefix=".%s." % os.path.basename(path)
+        )
+
+        with os.fdopen(fd, 'w') as f:
+            json.dump(variables, f)
+
+        os.replace(tmp, path)
+
+    except OSError as e:
+        logger.debug("Could not cache variables of make: %s" % e)
+
+
+def make_list_vars(Makefile=None, origin=None, cachedir=None):
+    """
+    Generate the (key, value) dict of all variables defined in make process.
+
+    The variables defined by the Makefile itself are read without running
+    make where possible.  Otherwise, they are cached, in memory and in
+    cachedir if set, by the content of the Makefile, the version of make and
+    the environment it is run in, such that make is only run again once any
+    of them changes.  See `make_vars_key`.
+
+    Args:
+        Makefile:  The location of the Makefile to expand.
+        origin:  The means of selecting where the variable is derived from.
+            Choose from: 'automatic', 'environment', 'default', 'override',
+            'makefile'.  Setting to None returns all origins.
+        cachedir:  The directory in which to keep the variables between runs
+            of kraft.
+
+    Returns:
+        A dict mapping keys to the corresponding variable.
+    """
+    if origin is None or any(o not in MAKE_CACHED_ORIGINS for o in origin):
+        return make_dump_vars(Makefile, origin)
+
+    try:
+        M = make_read_vars(Makefile)
+        return {o: M.get(o, dict()) for o in origin}
+
+    except (UnsupportedMakefileConstruct, UnicodeDecodeError) as e:
+        logger.debug("Running make instead: %s" % e)
+
+    key = make_vars_key(Makefile)
+
+    with _make_lock:
+        M = _make_vars.get(key, None)
+
+    if M is None and cachedir is not None:
+        M = make_read_cached_vars(cachedir, key)
+
+    if M is None:
+        logger.debug("Reading variables of %s..." % Makefile)
+        M = make_dump_vars(Makefile, MAKE_CACHED_ORIGINS)
+
+        if cachedir is not None:
+            make_write_cached_vars(cachedir, key, M)
+
+    with _make_lock:
+        _make_vars[key] = M
+
+    return {o: M.get(o, dict()) for o in origin}
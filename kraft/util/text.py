@@ -32,8 +32,12 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import re
 from datetime import datetime
 
+SIZE_UNITS = ["B", "K", "M", "G", "T"]
+SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([BKMGT]?)i?B?\s*$', re.I)
+
 
 def pretty_columns(data=[]):
     widths = [max(map(len, col)) for col in zip(*data)]
@@ -70,3 +74,31 @@ def prettydate(date=None):
         return '1 hour ago'
     else:
         return '{} hours ago'.format(round(s/3600))
+
+
+def parse_size(size=None):
+    """
+    Convert a size such as 512M or 2G into a number of bytes.  Numbers
+    without a unit are taken as bytes.
+    """
+    if size is None or isinstance(size, int):
+        return size
+
+    match = SIZE_PATTERN.match(str(size))
+    if match is None:
+        raise ValueError("Invalid size: %s" % size)
+
+    unit = match.group(2).upper() or "B"
+    return int(float(match.group(1)) * 1024 ** SIZE_UNITS.index(unit))
+
+
+def pretty_size(size=0):
+    for unit in SIZE_UNITS:
+        if size < 1024 or unit == SIZE_UNITS[-1]:
+            break
+        size /= 1024.0
+
+    if unit == "B":
+        return "%dB" % size
+
+    return "%.1f%s" % (size, unit)
@@ -33,6 +33,7 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import threading
+import time
 
 
 class ErrorPropagatingThread(threading.Thread):
@@ -58,3 +59,58 @@ class ErrorPropagatingThread(threading.Thread):
             raise self.exc
 
         return self.ret
+
+
+class ConcurrencyBudget(object):
+    """
+    Bounds the number of jobs which run at once across several independent
+    producers, e.g. all origins being updated at the same time.  Each
+    producer should use its own share of the budget so that its outstanding
+    jobs can be cancelled without affecting the others.
+
+    Jobs are run by entering the budget as a context manager, which blocks
+    until a slot is free.
+    """
+
+    _semaphore = None
+    _cancelled = None
+    _started = None
+
+    def __init__(self, concurrency=1, semaphore=None):
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(max(int(concurrency), 1))
+
+        self._semaphore = semaphore
+        self._cancelled = threading.Event()
+        self._started = None
+
+    def share(self):
+        """
+        Return a budget which draws from the same slots as this one but which
+        can be cancelled independently.
+        """
+        return ConcurrencyBudget(semaphore=self._semaphore)
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def started(self):
+        """
+        The time at which the first job of this budget was given a slot, or
+        None if it is still waiting for one.
+        """
+        return self._started
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        if self._started is None:
+            self._started = time.time()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self._semaphore.release()
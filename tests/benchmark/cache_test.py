@@ -0,0 +1,147 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import time
+
+import click
+
+from .. import mock
+from .. import unittest
+from kraft.cache import Cache
+from kraft.cache import SQLiteCache
+from kraft.manifest import Manifest
+from kraft.manifest import ManifestItem
+from kraft.manifest import ManifestItemDistribution
+from kraft.manifest import ManifestItemVersion
+from kraft.types import ComponentType
+
+ORIGINS = 4
+ITEMS_PER_ORIGIN = 100
+VERSIONS_PER_ITEM = 10
+LOOKUPS = 25
+
+
+def make_manifest(origin):
+    manifest = Manifest(manifest=origin)
+
+    for i in range(ITEMS_PER_ORIGIN):
+        item = ManifestItem(
+            name="%s-%d" % (origin, i),
+            type=ComponentType.LIB.shortname,
+            provider="github",
+            manifest=origin
+        )
+
+        dist = ManifestItemDistribution(name="stable")
+        for v in range(VERSIONS_PER_ITEM):
+            dist.add_version(ManifestItemVersion(
+                version="0.%d.0" % v,
+                git_sha="%040x" % v,
+                timestamp="2020-01-01 00:00:00"
+            ))
+
+        item.add_distribution(dist)
+        manifest.add_item(item)
+
+    return manifest
+
+
+class CacheBackendBenchmark(unittest.TestCase):
+    """
+    Compare the file and SQLite cache backends for the access patterns kraft
+    uses: loading an application's components by name from a fresh process
+    and updating a single component of an origin.
+    """
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.ctx = click.Context(click.Command('benchmark'), obj=mock.Mock(
+            workdir=self.cachedir,
+            env={'UK_LIBS': os.path.join(self.cachedir, 'libs')}
+        ))
+        self.ctx.__enter__()
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+        shutil.rmtree(self.cachedir)
+
+    def run_backend(self, backend):
+        env = {'UK_CACHEDIR': os.path.join(self.cachedir, backend.__name__)}
+        manifests = {
+            "origin%d" % o: make_manifest("origin%d" % o)
+            for o in range(ORIGINS)
+        }
+
+        results = dict()
+
+        start = time.perf_counter()
+        cache = backend(env)
+        for origin, manifest in manifests.items():
+            cache.save(origin, manifest)
+        results['populate'] = time.perf_counter() - start
+
+        # A fresh instance is used to simulate a new kraft invocation
+        start = time.perf_counter()
+        cache = backend(env)
+        for i in range(LOOKUPS):
+            origin = "origin%d" % (i % ORIGINS)
+            item = cache.find_item_by_name(
+                type="lib", name="%s-%d" % (origin, i)
+            )
+            assert item is not None
+        results['lookup'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cache.save_item("origin0", manifests["origin0"].get_item("origin0-0"))
+        results['save_item'] = time.perf_counter() - start
+
+        return results
+
+    def test_backends(self):
+        results = {
+            backend.__name__: self.run_backend(backend)
+            for backend in [Cache, SQLiteCache]
+        }
+
+        print("\n%-12s %10s %10s %10s" % ("backend", "populate", "lookup",
+                                          "save_item"))
+        for name, result in results.items():
+            print("%-12s %9.1fms %9.1fms %9.1fms" % (
+                name,
+                result['populate'] * 1000,
+                result['lookup'] * 1000,
+                result['save_item'] * 1000,
+            ))
@@ -0,0 +1,144 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import time
+
+import click
+from git import Repo as GitRepo
+
+from .. import mock
+from .. import unittest
+from kraft.cmd.list.provider.git import GitListProvider
+from kraft.manifest import ManifestItem
+from kraft.manifest import ManifestItemVersion
+
+COMMITS = 20
+BYTES_PER_COMMIT = 256 * 1024
+
+
+def du(path):
+    size = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            size += os.path.getsize(os.path.join(root, f))
+
+    return size
+
+
+class GitFetchBenchmark(unittest.TestCase):
+    """
+    Compare the bytes transferred and the time taken to download a version
+    of a component with its full history, with only its own commit and from
+    an up-to-date shared mirror.
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        origin = os.path.join(self.tmpdir, "lib-newlib")
+
+        # Every commit replaces an incompressible blob, such that the size of
+        # the history grows with each commit
+        repo = GitRepo.init(origin)
+        with repo.config_writer() as config:
+            config.set_value("user", "name", "kraft")
+            config.set_value("user", "email", "kraft@localhost")
+            config.set_value("uploadpack", "allowFilter", "true")
+        for i in range(COMMITS):
+            with open(os.path.join(origin, "blob"), "wb") as f:
+                f.write(os.urandom(BYTES_PER_COMMIT))
+            repo.index.add(["blob"])
+            repo.index.commit("Commit %d" % i)
+        repo.create_tag("RELEASE-0.1")
+
+        self.manifest = ManifestItem(
+            name="newlib",
+            type="lib",
+            provider="git",
+            git="file://%s" % origin,
+            manifest=origin
+        )
+        self.version = ManifestItemVersion(
+            git_sha="RELEASE-0.1",
+            version="0.1"
+        )
+
+        # Checkouts only share a mirror when it is explicitly requested
+        self.env = dict()
+        obj = mock.Mock(env=self.env)
+        obj.settings.get.side_effect = lambda prop, default=None: default
+        self.ctx = click.Context(click.Command('benchmark'), obj=obj)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def run_download(self, name, **kwargs):
+        localdir = os.path.join(self.tmpdir, name)
+
+        start = time.perf_counter()
+        with self.ctx:
+            GitListProvider().download(
+                manifest=self.manifest,
+                localdir=localdir,
+                version=self.version,
+                **kwargs
+            )
+        elapsed = time.perf_counter() - start
+
+        return du(os.path.join(localdir, ".git", "objects")), elapsed
+
+    def test_fetch_modes(self):
+        results = [
+            ("full", self.run_download("full", depth=0)),
+            ("shallow", self.run_download("shallow")),
+            ("blob:none", self.run_download(
+                "filtered", depth=0, git_filter="blob:none"
+            )),
+        ]
+
+        # Once the mirror has the version, further checkouts of it neither
+        # transfer nor store any objects
+        self.env['UK_CACHEDIR'] = os.path.join(self.tmpdir, "cache")
+        self.run_download("mirror", depth=0)
+        results.append(("mirrored", self.run_download("mirrored", depth=0)))
+
+        print("\n%-12s %12s %10s" % ("mode", "objects", "time"))
+        for name, (size, elapsed) in results:
+            print("%-12s %10.1fMB %9.1fms" % (
+                name, size / (1024 * 1024), elapsed * 1000
+            ))
+
+        assert results[1][1][0] < results[0][1][0]
+        assert results[3][1][0] < results[1][1][0]
@@ -0,0 +1,76 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import glob
+import os
+import shutil
+import time
+
+from .. import unittest
+from kraft.error import UnsupportedMakefileConstruct
+from kraft.util import make as make_util
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'makefiles')
+ROUNDS = 20
+
+
+@unittest.skipIf(shutil.which('make') is None, "make is not installed")
+class MakefileReaderBenchmark(unittest.TestCase):
+    """
+    Compare reading the variables of each library Makefile in the corpus by
+    running make and by reading the Makefile directly.
+    """
+
+    def measure(self, fn, makefile):
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            fn(makefile)
+        return (time.perf_counter() - start) / ROUNDS
+
+    def test_corpus(self):
+        print("\n%-24s %10s %10s" % ("makefile", "make", "static"))
+
+        for makefile in sorted(glob.glob(os.path.join(FIXTURES, '*.uk'))):
+            try:
+                make_util.make_read_vars(makefile)
+            except UnsupportedMakefileConstruct:
+                continue
+
+            dump = self.measure(
+                lambda m: make_util.make_dump_vars(m, ['makefile']), makefile
+            )
+            static = self.measure(make_util.make_read_vars, makefile)
+
+            print("%-24s %9.2fms %9.2fms" % (
+                os.path.basename(makefile), dump * 1000, static * 1000
+            ))
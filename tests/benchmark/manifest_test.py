@@ -0,0 +1,143 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import gc
+import pickle
+import time
+import tracemalloc
+from datetime import datetime
+
+from .. import mock
+from .. import unittest
+from kraft.manifest import Manifest
+from kraft.manifest import ManifestItem
+from kraft.manifest import ManifestItemDistribution
+from kraft.manifest import ManifestItemVersion
+from kraft.types import ComponentType
+
+ITEMS = 100
+VERSIONS_PER_ITEM = 50
+LOADS = 5
+
+
+def make_manifest(origin="github.com/unikraft/*"):
+    manifest = Manifest(manifest=origin)
+
+    for i in range(ITEMS):
+        item = ManifestItem(
+            name="lib-%d" % i,
+            type=ComponentType.LIB.shortname,
+            provider="github",
+            manifest=origin
+        )
+
+        dist = ManifestItemDistribution(name="stable", manifest=origin)
+        for v in range(VERSIONS_PER_ITEM):
+            dist.add_version(ManifestItemVersion(
+                version="0.%d.0" % v,
+                git_sha="%040x" % (i * VERSIONS_PER_ITEM + v),
+                timestamp=datetime(2020, 1, 1, v % 24)
+            ))
+
+        item.add_distribution(dist)
+        manifest.add_item(item)
+
+    return manifest
+
+
+def dumps_v1(manifest):
+    """
+    Pickle a manifest in the format used before the schema was versioned,
+    i.e. nested dictionaries with timestamps as strings.
+    """
+    def manifest_state(self):
+        return {
+            "meta": {
+                "manifest": self.manifest,
+                "manifest_checksum": self.manifest_checksum
+            },
+            "data": dict(self.items())
+        }
+
+    with mock.patch.object(Manifest, '__getstate__', manifest_state), \
+            mock.patch.object(ManifestItem, '__getstate__',
+                              ManifestItem.to_dict), \
+            mock.patch.object(ManifestItem, 'localdir', None):
+        return pickle.dumps(manifest, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def measure_load(data):
+    gc.collect()
+    tracemalloc.start()
+    manifest = pickle.loads(data)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(LOADS):
+        pickle.loads(data)
+    elapsed = (time.perf_counter() - start) / LOADS
+
+    assert len(manifest.get_item("lib-0").dists["stable"].versions) == \
+        VERSIONS_PER_ITEM
+
+    return len(data), elapsed, retained
+
+
+class ManifestSerializationBenchmark(unittest.TestCase):
+    """
+    Compare the size on disk, the time to load and the memory retained by a
+    cached manifest with thousands of versions in the format used before the
+    schema was versioned and in the current, compact format.
+    """
+
+    def test_formats(self):
+        manifest = make_manifest()
+
+        results = {
+            "v1 (dict)": measure_load(dumps_v1(manifest)),
+            "v2 (compact)": measure_load(pickle.dumps(
+                manifest, protocol=pickle.HIGHEST_PROTOCOL
+            )),
+        }
+
+        print("\n%d versions" % (ITEMS * VERSIONS_PER_ITEM))
+        print("%-14s %10s %10s %10s" % ("format", "size", "load", "memory"))
+        for name, (size, elapsed, retained) in results.items():
+            print("%-14s %8.1fKB %8.1fms %8.1fKB" % (
+                name, size / 1024, elapsed * 1000, retained / 1024
+            ))
+
+        v1, v2 = results["v1 (dict)"], results["v2 (compact)"]
+        assert v2[0] < v1[0]
+        assert v2[1] < v1[1]
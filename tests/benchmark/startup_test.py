@@ -0,0 +1,144 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from .. import unittest
+
+IMPORTTIME_PATTERN = re.compile(
+    r'^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$'
+)
+
+# Third-party libraries which are slow to import and which should only be
+# loaded by the commands which need them.
+HEAVY_MODULES = [
+    'atpbar',
+    'cookiecutter',
+    'feedparser',
+    'git',
+    'github',
+    'htmllistparse',
+    'inquirer',
+    'requests',
+]
+
+
+def importtime(args, cwd=None, env=None):
+    """
+    Run kraft in a fresh interpreter with `-X importtime` and parse its
+    report.
+
+    Returns:
+        tuple: The wall-clock time of the invocation in seconds and a dict
+            mapping each imported module to its cumulative import time and
+            depth in the import tree.
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         'from kraft.kraft import kraft; kraft()'] + args,
+        cwd=cwd,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True
+    )
+    elapsed = time.perf_counter() - start
+
+    modules = dict()
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match is None:
+            continue
+
+        modules[match.group(4)] = (
+            int(match.group(2)), (len(match.group(3)) - 1) // 2
+        )
+
+    return elapsed, modules
+
+
+class StartupBenchmark(unittest.TestCase):
+    """
+    Track the cold-start time of commands which are commonly scripted and
+    make sure they do not import the dependencies of unrelated commands.
+    """
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.env = dict(os.environ)
+        self.env['HOME'] = self.home
+        for var in ['UK_WORKDIR', 'UK_ROOT', 'UK_LIBS', 'UK_APPS',
+                    'UK_ARCHS', 'UK_PLATS', 'UK_CACHEDIR', 'KRAFTRC']:
+            self.env.pop(var, None)
+
+    def tearDown(self):
+        shutil.rmtree(self.home)
+
+    def report(self, name, elapsed, modules):
+        total = sum(t for t, depth in modules.values() if depth == 0)
+        print("\n%s: %.1fms wall, %.1fms importing %d modules" % (
+            name, elapsed * 1000, total / 1000, len(modules)
+        ))
+
+        slowest = sorted(
+            [(t, m) for m, (t, depth) in modules.items() if depth <= 1],
+            reverse=True
+        )
+        for t, module in slowest[:5]:
+            print("  %9.1fms  %s" % (t / 1000, module))
+
+    def test_version(self):
+        elapsed, modules = importtime(['--version'], env=self.env)
+        self.report('kraft --version', elapsed, modules)
+
+        assert 'kraft.kraft' in modules
+        for module in HEAVY_MODULES + ['kraft.cmd.run', 'kraft.context']:
+            assert module not in modules, "%s was imported" % module
+
+    def test_run_dry_run(self):
+        elapsed, modules = importtime(
+            ['run', '--dry-run'], cwd=self.home, env=self.env
+        )
+        self.report('kraft run --dry-run', elapsed, modules)
+
+        assert 'kraft.cmd.run' in modules
+        for module in HEAVY_MODULES + ['kraft.cmd.list']:
+            assert module not in modules, "%s was imported" % module
@@ -0,0 +1,102 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+from .. import mock
+from .. import unittest
+from kraft.cache import ArtifactCache
+
+
+class ArtifactCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.artifacts = ArtifactCache(self.cachedir, max_size="3K")
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir)
+
+    def add(self, url, data):
+        path = self.artifacts.incoming(url)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        checksum = hashlib.sha256(data).hexdigest()
+        self.artifacts.add(url, checksum, path)
+        return checksum
+
+    def test_lookup(self):
+        checksum = self.add("https://example.com/a.tar.gz", b"a" * 1024)
+
+        assert self.artifacts.lookup(checksum=checksum) == \
+            self.artifacts.path(checksum)
+        assert self.artifacts.lookup(url="https://example.com/a.tar.gz") == \
+            self.artifacts.path(checksum)
+        assert self.artifacts.lookup(url="https://example.com/b.tar.gz") \
+            is None
+
+    def test_missing_artifact_is_forgotten(self):
+        checksum = self.add("https://example.com/a.tar.gz", b"a" * 1024)
+        os.remove(self.artifacts.path(checksum))
+
+        assert self.artifacts.lookup(checksum=checksum) is None
+        assert self.artifacts.usage() == (0, 0)
+
+    def test_least_recently_used_are_evicted(self):
+        with mock.patch('time.time', side_effect=range(100)):
+            a = self.add("https://example.com/a.tar.gz", b"a" * 1024)
+            b = self.add("https://example.com/b.tar.gz", b"b" * 1024)
+            self.artifacts.lookup(checksum=a)
+
+            # Adding a third and a fourth artifact exceeds the maximum size
+            c = self.add("https://example.com/c.tar.gz", b"c" * 1024)
+            d = self.add("https://example.com/d.tar.gz", b"d" * 1024)
+
+        assert self.artifacts.lookup(checksum=b) is None
+        for checksum in [a, c, d]:
+            assert self.artifacts.lookup(checksum=checksum) is not None
+        assert self.artifacts.usage() == (3, 3072)
+
+    def test_prune(self):
+        with mock.patch('time.time', return_value=0):
+            old = self.add("https://example.com/a.tar.gz", b"a" * 1024)
+        new = self.add("https://example.com/b.tar.gz", b"b" * 1024)
+
+        assert self.artifacts.prune(older_than=60) == [old]
+        assert self.artifacts.lookup(checksum=new) is not None
+
+        assert self.artifacts.prune() == [new]
+        assert self.artifacts.usage() == (0, 0)
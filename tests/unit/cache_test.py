@@ -0,0 +1,266 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import threading
+
+import click
+
+from .. import mock
+from .. import unittest
+from kraft.cache import Cache
+from kraft.cache import SQLiteCache
+from kraft.cache.cache import AtomicFileCache
+from kraft.manifest import Manifest
+from kraft.manifest import ManifestItem
+from kraft.types import ComponentType
+
+
+def make_manifest(origin, *names):
+    manifest = Manifest(manifest=origin)
+    for name in names:
+        manifest.add_item(ManifestItem(
+            name=name,
+            type=ComponentType.LIB.shortname,
+            provider="github",
+            manifest=origin
+        ))
+
+    return manifest
+
+
+class CacheTestCase(unittest.TestCase):
+    backend = Cache
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.cache = self.backend({'UK_CACHEDIR': self.cachedir})
+
+        # Component local directories are resolved against kraft's context
+        self.ctx = click.Context(click.Command('test'), obj=mock.Mock(
+            workdir=self.cachedir,
+            env={'UK_LIBS': os.path.join(self.cachedir, 'libs')}
+        ))
+        self.ctx.__enter__()
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+        shutil.rmtree(self.cachedir)
+
+    def test_find_item_by_name(self):
+        self.cache.save("a", make_manifest("a", "newlib", "lwip"))
+        self.cache.save("b", make_manifest("b", "python3"))
+
+        item = self.cache.find_item_by_name(type="lib", name="python3")
+        assert item is not None
+        assert item.manifest == "b"
+
+        assert self.cache.find_item_by_name(type="plat", name="lwip") is None
+        assert len(self.cache.find_items_by_name(name="lwip")) == 1
+        assert len(self.cache.find_items_by_name(
+            type=ComponentType.LIB, name="newlib")) == 1
+
+    def test_find_items_by_names(self):
+        self.cache.save("a", make_manifest("a", "newlib", "lwip"))
+        self.cache.save("b", make_manifest("b", "python3"))
+
+        items = self.cache.find_items_by_names([
+            (ComponentType.LIB, "newlib"),
+            ("lib", "python3"),
+            (None, "lwip"),
+            ("plat", "lwip"),
+            ("lib", "unknown"),
+        ])
+
+        assert items[("lib", "newlib")].manifest == "a"
+        assert items[("lib", "python3")].manifest == "b"
+        assert items[(None, "lwip")].name == "lwip"
+        assert items[("plat", "lwip")] is None
+        assert items[("lib", "unknown")] is None
+
+    def test_find_item_by_localdir(self):
+        self.cache.save("a", make_manifest("a", "newlib"))
+
+        item = self.cache.find_item_by_localdir(
+            os.path.join(self.cachedir, 'libs', 'newlib')
+        )
+        assert item is not None
+        assert item.name == "newlib"
+
+    def test_reindex_existing_cache(self):
+        if self.backend is not Cache:
+            self.skipTest("only the file cache keeps a separate index")
+
+        self.cache.save("a", make_manifest("a", "newlib"))
+        self.cache.purge()
+        Cache({'UK_CACHEDIR': self.cachedir})._cache["a"] = \
+            make_manifest("a", "newlib")
+
+        cache = Cache({'UK_CACHEDIR': self.cachedir})
+        assert cache.find_item_by_name(type="lib", name="newlib") is not None
+
+    def test_save_removes_stale_index_entries(self):
+        self.cache.save("a", make_manifest("a", "newlib", "lwip"))
+        self.cache.save("a", make_manifest("a", "newlib"))
+
+        assert self.cache.find_items_by_name(name="lwip") == []
+        assert len(self.cache.find_items_by_name(name="newlib")) == 1
+
+        if self.backend is Cache:
+            entries = self.cache._index_entries_or_reindex()
+            assert "name:lib/lwip" not in entries
+            assert entries["name:lib/newlib"] == [("a", "newlib")]
+
+    def test_purge(self):
+        self.cache.save("a", make_manifest("a", "newlib"))
+        self.cache.purge()
+
+        assert self.cache.find_item_by_name(name="newlib") is None
+
+    def test_repeated_get_is_a_hit(self):
+        self.cache.save("a", make_manifest("a", "newlib"))
+
+        cache = self.backend({'UK_CACHEDIR': self.cachedir})
+        first = cache.get("a")
+        assert cache.get("a") is first
+        assert cache.misses == 1
+        assert cache.hits == 1
+
+    def test_get_after_external_write(self):
+        self.cache.save("a", make_manifest("a", "newlib"))
+
+        cache = self.backend({'UK_CACHEDIR': self.cachedir})
+        cache.get("a")
+
+        self.cache.save("a", make_manifest("a", "newlib", "lwip"))
+
+        assert cache.get("a").get_item("lwip") is not None
+        assert cache.misses == 2
+
+    def test_save_item(self):
+        self.cache.save("a", make_manifest("a", "newlib"))
+        self.cache.save_item("a", make_manifest("a", "lwip").get_item("lwip"))
+
+        assert self.cache.get("a").get_item("newlib") is not None
+        assert self.cache.find_item_by_name(name="lwip") is not None
+
+    def test_concurrent_save_item(self):
+        self.cache.save("a", make_manifest("a", "newlib"))
+
+        def save_item(name):
+            with self.ctx:
+                self.cache.save_item(
+                    "a", make_manifest("a", name).get_item(name)
+                )
+
+        names = ["lib%d" % i for i in range(16)]
+        threads = [
+            threading.Thread(target=save_item, args=(name,))
+            for name in names
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        cache = self.backend({'UK_CACHEDIR': self.cachedir})
+        for name in names + ["newlib"]:
+            assert cache.get("a").get_item(name) is not None
+
+    def test_interrupted_save(self):
+        if self.backend is not Cache:
+            self.skipTest("the SQLite cache writes in a transaction")
+
+        self.cache.save("a", make_manifest("a", "newlib"))
+
+        with mock.patch.object(AtomicFileCache, '_dumps',
+                               side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.cache.save("a", make_manifest("a", "newlib", "lwip"))
+
+        cache = Cache({'UK_CACHEDIR': self.cachedir})
+        assert cache.get("a").get_item("newlib") is not None
+        assert cache.get("a").get_item("lwip") is None
+        assert list(cache.all()) == ["a"]
+
+    def test_dirty_until_synced(self):
+        assert not self.cache.dirty
+
+        self.cache.save("a", make_manifest("a", "newlib"))
+        assert self.cache.dirty
+
+        self.cache.sync()
+        assert not self.cache.dirty
+
+
+class SQLiteCacheTestCase(CacheTestCase):
+    backend = SQLiteCache
+
+    def test_migrate_from_file_cache(self):
+        Cache({'UK_CACHEDIR': self.cachedir}).save(
+            "a", make_manifest("a", "newlib")
+        )
+
+        cache = SQLiteCache({'UK_CACHEDIR': self.cachedir})
+        assert cache.all() == ["a"]
+        assert cache.find_item_by_name(type="lib", name="newlib") is not None
+
+    def test_find_item_newer_than_memo(self):
+        self.cache.save("a", make_manifest("a", "newlib"))
+        self.cache.get("a")
+
+        # A row which the memoized manifest of its origin does not know of
+        with self.cache.cache:
+            self.cache._save_item("a", make_manifest("a", "lwip").get_item("lwip"))
+
+        item = self.cache.find_item_by_name(type="lib", name="lwip")
+        assert item is not None
+        assert item.name == "lwip"
+
+    def test_interrupted_migration_is_retried(self):
+        Cache({'UK_CACHEDIR': self.cachedir}).save(
+            "a", make_manifest("a", "newlib")
+        )
+
+        cache = SQLiteCache({'UK_CACHEDIR': self.cachedir})
+        with mock.patch.object(SQLiteCache, '_save_manifest',
+                               side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                cache.all()
+
+        assert not cache._migrated
+
+        cache = SQLiteCache({'UK_CACHEDIR': self.cachedir})
+        assert cache.all() == ["a"]
@@ -0,0 +1,176 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import click
+
+from .. import mock
+from .. import unittest
+from kraft.component import resolve_manifests
+from kraft.config.config import component_specs
+from kraft.const import MAKEFILE_UK
+from kraft.lib import Library
+from kraft.lib import LibraryManager
+from kraft.manifest import ManifestItem
+from kraft.manifest import ManifestItemDistribution
+from kraft.manifest import ManifestItemVersion
+from kraft.target import Target
+from kraft.types import ComponentType
+
+
+def make_item(type, name):
+    item = ManifestItem(name=name, type=type.shortname, provider="github")
+    dist = ManifestItemDistribution(name="stable")
+    dist.add_version(ManifestItemVersion(version="0.4", git_sha="abc"))
+    item.add_distribution(dist)
+    return item
+
+
+class ResolveManifestsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.items = {
+            ("core", "unikraft"): make_item(ComponentType.CORE, "unikraft"),
+            ("lib", "newlib"): make_item(ComponentType.LIB, "newlib"),
+            ("lib", "lwip"): make_item(ComponentType.LIB, "lwip"),
+        }
+
+        cache = mock.Mock()
+        cache.find_items_by_names.side_effect = lambda specs: {
+            spec: self.items.get(spec, None) for spec in specs
+        }
+
+        self.ctx = click.Context(click.Command('test'), obj=mock.Mock(
+            cache=cache,
+            workdir=self.tmpdir,
+            env={'UK_LIBS': self.tmpdir}
+        ))
+        self.ctx.__enter__()
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+        shutil.rmtree(self.tmpdir)
+
+    def test_component_specs(self):
+        specs = component_specs(
+            targets=[
+                {"architecture": "x86_64", "platform": "kvm"},
+                {"architecture": "riscv64", "platform": "solo5"},
+            ],
+            libraries={"newlib": "stable", "lwip": {}, "pthreads": False}
+        )
+
+        assert specs == [
+            (ComponentType.CORE, "unikraft"),
+            (ComponentType.ARCH, "riscv64"),
+            (ComponentType.PLAT, "solo5"),
+            (ComponentType.LIB, "newlib"),
+            (ComponentType.LIB, "lwip"),
+        ]
+
+    def test_libraries_are_resolved_together(self):
+        cache = self.ctx.obj.cache
+        manifests = resolve_manifests([
+            (ComponentType.LIB, "newlib"),
+            (ComponentType.LIB, "lwip"),
+        ])
+
+        libraries = LibraryManager({
+            "newlib": "stable",
+            "lwip": {"version": "0.4"},
+        }, manifests=manifests)
+
+        assert cache.find_items_by_names.call_count == 1
+        assert cache.find_item_by_name.call_count == 0
+        assert libraries.get("newlib").version.version == "0.4"
+        assert libraries.get("lwip").manifest is self.items[("lib", "lwip")]
+
+    def test_platforms_are_resolved_together(self):
+        self.items[("plat", "solo5")] = make_item(ComponentType.PLAT, "solo5")
+        manifests = resolve_manifests([
+            (ComponentType.ARCH, "riscv64"),
+            (ComponentType.PLAT, "solo5"),
+        ])
+
+        target = Target(
+            architecture="x86_64",
+            platform="solo5",
+            manifests=manifests
+        )
+
+        assert self.ctx.obj.cache.find_item_by_name.call_count == 0
+        assert target.platform.manifest is self.items[("plat", "solo5")]
+        assert target.platform.version.version == "0.4"
+
+    def test_origins_are_probed_concurrently(self):
+        for name in ["newlib", "lwip"]:
+            os.makedirs(os.path.join(self.tmpdir, name))
+            with open(os.path.join(self.tmpdir, name, MAKEFILE_UK), 'w') as f:
+                f.write("LIB%s_VERSION = 0.4\n" % name.upper())
+
+        libraries = LibraryManager({
+            "newlib": {"localdir": os.path.join(self.tmpdir, "newlib")},
+            "lwip": {"localdir": os.path.join(self.tmpdir, "lwip")},
+        }, manifests=resolve_manifests([
+            (ComponentType.LIB, "newlib"),
+            (ComponentType.LIB, "lwip"),
+        ]))
+
+        running = set()
+        overlapped = threading.Event()
+
+        def make_list_vars(makefile, **kwargs):
+            running.add(makefile)
+            if len(running) > 1:
+                overlapped.set()
+            time.sleep(0.1)
+            running.discard(makefile)
+            return {'makefile': {
+                'LIB_VERSION': '0.4',
+                'LIB_URL': 'https://github.com/unikraft/lib-x/archive/0.4.tar.gz'
+            }}
+
+        # The origin of each library is determined by the worker probing it
+        with mock.patch('kraft.lib.lib.make_list_vars', make_list_vars), \
+                mock.patch.object(Library, 'remote_versions',
+                                  new_callable=mock.PropertyMock,
+                                  return_value=["0.4"]):
+            assert libraries.probe_remote_versions() == list()
+
+        assert overlapped.is_set()
+        assert libraries.get("lwip").origin_version == "0.4"
@@ -0,0 +1,359 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import click
+
+from .. import mock
+from .. import unittest
+from kraft.app import Application
+from kraft.app.fingerprint import build_fingerprint
+from kraft.app.fingerprint import changed_since_prepare
+from kraft.app.fingerprint import compiler_version
+from kraft.app.fingerprint import git_head
+from kraft.app.fingerprint import prepare_digests
+from kraft.app.fingerprint import restore_build
+from kraft.app.fingerprint import store_build
+from kraft.app.fingerprint import toolchain_identity
+from kraft.app.fingerprint import write_prepare_stamp
+from kraft.cache import ArtifactCache
+from kraft.const import BUILD_ARTIFACT_URL
+from kraft.manifest import ManifestItemVersion
+from kraft.types import ComponentType
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+class BuildFingerprintTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.appdir = os.path.join(self.tmpdir, "app")
+        self.libdir = os.path.join(self.tmpdir, "lwip")
+
+        write(os.path.join(self.appdir, ".config"), "CONFIG_LIBLWIP=y\n")
+        write(os.path.join(self.appdir, "kraft.yaml"), "specification: '0.5'\n")
+        write(os.path.join(self.appdir, "main.c"), "int main() {}\n")
+        write(os.path.join(self.libdir, "Makefile.uk"), "LIBLWIP_VERSION=2.1.2\n")
+
+        self.lib = mock.Mock(
+            type=ComponentType.LIB,
+            localdir=self.libdir,
+            version=ManifestItemVersion(version="2.1.2", git_sha="abc"),
+        )
+        self.lib.name = "lwip"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def fingerprint(self):
+        return build_fingerprint(
+            self.appdir,
+            [os.path.join(self.appdir, "kraft.yaml")],
+            [self.lib]
+        )
+
+    def test_unconfigured(self):
+        os.remove(os.path.join(self.appdir, ".config"))
+        assert self.fingerprint() is None
+
+    def test_unchanged(self):
+        fingerprint = self.fingerprint()
+
+        # Outputs of the build are not part of the fingerprint
+        write(os.path.join(self.appdir, "build", "app_kvm-x86_64"), "image")
+        assert self.fingerprint() == fingerprint
+
+    def test_configuration_changed(self):
+        fingerprint = self.fingerprint()
+        write(os.path.join(self.appdir, ".config"), "CONFIG_LIBLWIP=n\n")
+        assert self.fingerprint() != fingerprint
+
+    def test_sources_changed(self):
+        fingerprint = self.fingerprint()
+        write(os.path.join(self.appdir, "main.c"), "int main() { }\n")
+        assert self.fingerprint() != fingerprint
+
+    def test_component_changed(self):
+        fingerprint = self.fingerprint()
+
+        self.lib.version = ManifestItemVersion(version="2.1.3", git_sha="abd")
+        bumped = self.fingerprint()
+        assert bumped != fingerprint
+
+        makefile_uk = os.path.join(self.libdir, "Makefile.uk")
+        st = os.stat(makefile_uk)
+        os.utime(makefile_uk, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        assert self.fingerprint() != bumped
+
+    def test_changed_since_prepare(self):
+        builddir = os.path.join(self.appdir, "build")
+        digests = prepare_digests(self.appdir, [self.lib])
+        assert changed_since_prepare(builddir, digests) is None
+
+        write_prepare_stamp(builddir, digests)
+        assert changed_since_prepare(builddir, digests) == []
+
+        # Only the version, Makefile.uk and patches of components matter
+        write(os.path.join(self.appdir, "main.c"), "int main() { }\n")
+        write(os.path.join(self.libdir, "Makefile.uk"), "LIBLWIP_VERSION=2.1.3\n")
+        assert changed_since_prepare(
+            builddir, prepare_digests(self.appdir, [self.lib])
+        ) == ["lib/lwip"]
+
+    def test_changed_since_prepare_in_app(self):
+        builddir = os.path.join(self.appdir, "build")
+        write(os.path.join(self.appdir, "Makefile.uk"), "$(eval $(call addlib,appfoo))\n")
+        write(os.path.join(self.appdir, "libs", "bar", "Makefile.uk"),
+              "$(eval $(call addlib,libbar))\n")
+        write_prepare_stamp(builddir, prepare_digests(self.appdir, [self.lib]))
+
+        write(os.path.join(self.appdir, "Makefile.uk"), "$(eval $(call addlib,appbar))\n")
+        write(os.path.join(self.appdir, "libs", "bar", "patches", "0001.patch"), "+\n")
+        assert changed_since_prepare(
+            builddir, prepare_digests(self.appdir, [self.lib])
+        ) == ["Makefile.uk", "libs/bar/Makefile.uk"]
+
+    def test_removed_prepare_outputs(self):
+        builddir = os.path.join(self.appdir, "build")
+        os.makedirs(os.path.join(builddir, "liblwip", "origin"))
+        write(os.path.join(builddir, "liblwip", ".prepared"), "")
+        write(os.path.join(builddir, "liblwip", "liblwip.o"), "")
+
+        digests = prepare_digests(self.appdir, [self.lib])
+        write_prepare_stamp(builddir, digests)
+
+        # Objects written by the build are not outputs of fetch and prepare
+        os.remove(os.path.join(builddir, "liblwip", "liblwip.o"))
+        assert changed_since_prepare(builddir, digests) == []
+
+        shutil.rmtree(os.path.join(builddir, "liblwip"))
+        assert changed_since_prepare(builddir, digests) == \
+            ["liblwip/.prepared", "liblwip/origin"]
+
+    def test_git_head(self):
+        gitdir = os.path.join(self.libdir, ".git")
+        write(os.path.join(gitdir, "HEAD"), "ref: refs/heads/stable\n")
+        write(os.path.join(gitdir, "packed-refs"),
+              "# pack-refs with: peeled\n%s refs/heads/stable\n" % ("a" * 40))
+        assert git_head(self.libdir) == "a" * 40
+
+        write(os.path.join(gitdir, "refs", "heads", "stable"), "b" * 40)
+        assert git_head(self.libdir) == "b" * 40
+
+        write(os.path.join(gitdir, "HEAD"), "c" * 40)
+        assert git_head(self.libdir) == "c" * 40
+        assert git_head(self.appdir) is None
+
+    def test_git_component(self):
+        env = dict(os.environ, GIT_AUTHOR_NAME="kraft", GIT_AUTHOR_EMAIL="kraft@localhost",
+                   GIT_COMMITTER_NAME="kraft", GIT_COMMITTER_EMAIL="kraft@localhost")
+        for args in [["init", "-q"], ["add", "-A"], ["commit", "-q", "-m", "lwip"]]:
+            subprocess.run(["git", "-C", self.libdir] + args, env=env, check=True)
+
+        # The tree of a git checkout is not walked
+        with mock.patch('kraft.app.fingerprint.tree_digest') as tree_digest:
+            self.fingerprint()
+            assert tree_digest.call_args_list == [
+                mock.call(mock.ANY, self.appdir, exclude=mock.ANY, content=True)
+            ]
+
+        fingerprint = self.fingerprint()
+        write(os.path.join(self.libdir, "lwip.c"), "int lwip;\n")
+        untracked = self.fingerprint()
+        assert untracked != fingerprint
+
+        write(os.path.join(self.libdir, "lwip.c"), "int lwip = 1;\n")
+        assert self.fingerprint() != untracked
+
+        os.remove(os.path.join(self.libdir, "lwip.c"))
+        assert self.fingerprint() == fingerprint
+
+    def test_toolchain_identity(self):
+        dotconfig = os.path.join(self.appdir, ".config")
+
+        with mock.patch('kraft.app.fingerprint.compiler_version',
+                        return_value="cc 1.0") as version, \
+                mock.patch.dict('kraft.app.fingerprint._toolchains', clear=True), \
+                mock.patch.dict(os.environ, UK_BUILD_ENGINE="clang"):
+            os.environ.pop('CROSS_COMPILE', None)
+            identity = toolchain_identity(dotconfig)
+            assert identity == toolchain_identity(dotconfig)
+            assert version.call_args_list == [mock.call("clang")]
+
+            write(dotconfig, 'CONFIG_CROSS_COMPILE="aarch64-linux-gnu-"\n')
+            assert toolchain_identity(dotconfig) != identity
+            assert version.call_args == mock.call("aarch64-linux-gnu-clang")
+
+            os.environ['CROSS_COMPILE'] = "arm-linux-gnueabihf-"
+            toolchain_identity(dotconfig)
+            assert version.call_args == mock.call("arm-linux-gnueabihf-clang")
+
+    def test_compiler_version(self):
+        marker = os.path.join(self.tmpdir, "marker")
+
+        # The compiler is not run through a shell
+        assert compiler_version("gcc; touch %s" % marker) is None
+        assert not os.path.exists(marker)
+
+        assert compiler_version(sys.executable) is not None
+
+
+class BuildCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.builddir = os.path.join(self.tmpdir, "app", "build")
+        self.binary = os.path.join(self.builddir, "app_kvm-x86_64")
+
+        self.ctx = click.Context(click.Command('test'), obj=mock.Mock(
+            artifacts=ArtifactCache(os.path.join(self.tmpdir, "cache"))
+        ))
+        self.ctx.__enter__()
+
+        self.app = mock.Mock(
+            localdir=os.path.join(self.tmpdir, "app"),
+            binaries=[mock.Mock(binary=self.binary)],
+        )
+        self.app.fingerprint.return_value = "f" * 64
+        self.app.components = list()
+        self.app.fetch_and_prepare = lambda *args: \
+            Application.fetch_and_prepare(self.app, *args)
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+        shutil.rmtree(self.tmpdir)
+
+    def test_round_trip(self):
+        write(self.binary, "image")
+        write(self.binary + ".dbg", "debug image")
+        store_build("f" * 64, [self.binary])
+
+        shutil.rmtree(self.builddir)
+        assert restore_build("e" * 64, [self.binary]) is False
+        assert restore_build("f" * 64, [self.binary]) is True
+
+        with open(self.binary) as f:
+            assert f.read() == "image"
+        with open(self.binary + ".dbg") as f:
+            assert f.read() == "debug image"
+
+    def test_partial_restore(self):
+        write(self.binary, "image")
+        write(self.binary + ".dbg", "debug image")
+        store_build("f" * 64, [self.binary])
+        shutil.rmtree(self.builddir)
+
+        # Only the debug image is left in the artifact cache
+        artifacts = self.ctx.obj.artifacts
+        os.remove(artifacts.lookup(
+            url=BUILD_ARTIFACT_URL % ("f" * 64, os.path.basename(self.binary))
+        ))
+        assert restore_build("f" * 64, [self.binary]) is False
+        assert not os.path.exists(self.binary + ".dbg")
+
+        # Another binary was never built
+        other = os.path.join(self.builddir, "app_linuxu-x86_64")
+        write(self.binary, "image")
+        store_build("e" * 64, [self.binary])
+        shutil.rmtree(self.builddir)
+        assert restore_build("e" * 64, [self.binary, other]) is False
+        assert not os.path.exists(self.binary)
+
+    def test_up_to_date(self):
+        assert Application.restore_build(self.app) == (False, "f" * 64)
+
+        write(self.binary, "image")
+        Application.store_build(self.app)
+        assert Application.restore_build(self.app) == (True, "f" * 64)
+
+        # Restored from the artifact cache once the build has been cleaned
+        shutil.rmtree(self.builddir)
+        assert Application.restore_build(self.app) == (True, "f" * 64)
+        assert os.path.isfile(self.binary)
+
+    def test_build_skips_make(self):
+        write(self.binary, "image")
+        Application.store_build(self.app)
+        self.app.restore_build = lambda: Application.restore_build(self.app)
+
+        Application.build(self.app)
+        assert self.app.make.call_count == 0
+
+        Application.build(self.app, use_cache=False)
+        assert self.app.make.call_count == 3
+
+    def test_fetch_and_prepare_once(self):
+        write(os.path.join(self.app.localdir, ".config"), "CONFIG_A=y\n")
+
+        Application.fetch_and_prepare(self.app)
+        assert self.app.make.call_count == 2
+
+        Application.fetch_and_prepare(self.app)
+        assert self.app.make.call_count == 2
+
+        write(os.path.join(self.app.localdir, ".config"), "CONFIG_A=n\n")
+        Application.fetch_and_prepare(self.app)
+        assert self.app.make.call_count == 4
+
+        Application.fetch_and_prepare(self.app, use_cache=False)
+        assert self.app.make.call_count == 6
+
+        # The build directory has been cleaned
+        Application.clean(self.app)
+        self.app.make.reset_mock()
+        Application.fetch_and_prepare(self.app)
+        assert self.app.make.call_count == 2
+
+    def test_fetch_and_prepare_after_removing_origin(self):
+        write(os.path.join(self.app.localdir, ".config"), "CONFIG_LIBLWIP=y\n")
+        self.app.make.side_effect = lambda target: os.makedirs(
+            os.path.join(self.builddir, "liblwip", "origin"), exist_ok=True
+        )
+
+        Application.fetch_and_prepare(self.app)
+        Application.fetch_and_prepare(self.app)
+        assert self.app.make.call_count == 2
+
+        # Fetch and prepare run again once the origin of a library is gone
+        shutil.rmtree(os.path.join(self.builddir, "liblwip"))
+        Application.fetch_and_prepare(self.app)
+        assert self.app.make.call_count == 4
+        assert os.path.isdir(os.path.join(self.builddir, "liblwip", "origin"))
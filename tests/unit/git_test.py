@@ -0,0 +1,198 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+import click
+from git import Repo as GitRepo
+
+from .. import mock
+from .. import unittest
+from kraft.cache import Cache
+from kraft.cmd.list.provider.git import get_component_from_git_repo
+from kraft.cmd.list.provider.git import GitListProvider
+from kraft.manifest import ManifestItem
+from kraft.manifest import ManifestItemVersion
+from kraft.util.git import _ls_remote_cache
+
+
+class GetComponentFromGitRepoTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.origin = os.path.join(self.tmpdir, "lib-newlib")
+
+        repo = GitRepo.init(self.origin)
+        with repo.config_writer() as config:
+            config.set_value("user", "name", "kraft")
+            config.set_value("user", "email", "kraft@localhost")
+        repo.index.commit("Initial commit")
+        repo.create_tag("RELEASE-0.1")
+
+        self.ctx = mock.Mock()
+        self.ctx.obj.cache = Cache({
+            'UK_CACHEDIR': os.path.join(self.tmpdir, "cache")
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def save(self, item):
+        self.ctx.obj.cache.save_item(self.origin, item)
+
+    def test_unchanged_repo_is_reused(self):
+        item = get_component_from_git_repo(self.ctx, self.origin)
+        assert item.refs_hash is not None
+        self.save(item)
+
+        cached = self.ctx.obj.cache.get(self.origin).get_item("newlib")
+        assert get_component_from_git_repo(self.ctx, self.origin) is cached
+
+    def test_new_tag_is_detected(self):
+        item = get_component_from_git_repo(self.ctx, self.origin)
+        self.save(item)
+
+        GitRepo(self.origin).create_tag("RELEASE-0.2")
+
+        # Forget the references listed within this invocation
+        _ls_remote_cache.clear()
+
+        updated = get_component_from_git_repo(self.ctx, self.origin)
+        assert updated.refs_hash != item.refs_hash
+        assert len(updated.get_distribution("stable").versions) == 2
+
+
+class GitListProviderDownloadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        origin = os.path.join(self.tmpdir, "lib-newlib")
+
+        repo = GitRepo.init(origin)
+        with repo.config_writer() as config:
+            config.set_value("user", "name", "kraft")
+            config.set_value("user", "email", "kraft@localhost")
+        for i in range(3):
+            repo.index.commit("Commit %d" % i)
+            if i == 1:
+                repo.create_tag("RELEASE-0.1")
+        self.head = repo.head.commit.hexsha
+
+        self.manifest = ManifestItem(
+            name="newlib",
+            type="lib",
+            provider="git",
+            git="file://%s" % origin,
+            manifest=origin
+        )
+        self.localdir = os.path.join(self.tmpdir, "libs", "newlib")
+
+        self.settings = dict()
+        obj = mock.Mock(env={
+            'UK_CACHEDIR': os.path.join(self.tmpdir, "cache")
+        })
+        obj.settings.get.side_effect = \
+            lambda prop, default=None: self.settings.get(prop, default)
+        self.ctx = click.Context(click.Command('pull'), obj=obj)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def download(self, ref, localdir=None, **kwargs):
+        if localdir is None:
+            localdir = self.localdir
+
+        with self.ctx:
+            GitListProvider().download(
+                manifest=self.manifest,
+                localdir=localdir,
+                version=ManifestItemVersion(git_sha=ref, version=ref),
+                **kwargs
+            )
+
+        return GitRepo(localdir)
+
+    def history(self, repo):
+        return int(repo.git.rev_list('--count', 'HEAD'))
+
+    def test_tag_is_fetched_shallow(self):
+        repo = self.download("RELEASE-0.1")
+        assert self.history(repo) == 1
+        assert repo.head.commit.message == "Commit 1"
+
+    def test_commit_is_fetched_shallow(self):
+        repo = self.download(self.head)
+        assert self.history(repo) == 1
+        assert repo.head.commit.hexsha == self.head
+
+    def test_history_is_only_deepened_on_request(self):
+        repo = self.download(self.head)
+        assert self.history(repo) == 1
+
+        repo = self.download(self.head)
+        assert self.history(repo) == 1
+
+        repo = self.download(self.head, depth=0)
+        assert self.history(repo) == 3
+        assert repo.head.commit.hexsha == self.head
+
+    def test_depth_from_settings(self):
+        self.settings["list/git_depth"] = 2
+        repo = self.download("RELEASE-0.1")
+        assert self.history(repo) == 2
+
+    def test_checkouts_share_mirror(self):
+        first = self.download("RELEASE-0.1")
+        second = self.download("RELEASE-0.1", os.path.join(self.tmpdir, "app"))
+        assert second.head.commit.hexsha == first.head.commit.hexsha
+
+        # Neither checkout stores any objects of its own
+        for repo in [first, second]:
+            alternates = os.path.join(
+                repo.git_dir, "objects", "info", "alternates"
+            )
+            assert os.path.exists(alternates)
+            assert "count: 0" in repo.git.count_objects("-v")
+
+        # The mirror is updated with only what is missing
+        repo = self.download(self.head, os.path.join(self.tmpdir, "app2"))
+        assert repo.head.commit.hexsha == self.head
+
+    def test_download_without_mirror(self):
+        self.settings["list/git_mirror"] = False
+        repo = self.download("RELEASE-0.1")
+
+        assert not os.path.exists(os.path.join(
+            repo.git_dir, "objects", "info", "alternates"
+        ))
+        assert self.history(repo) == 1
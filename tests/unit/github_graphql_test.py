@@ -0,0 +1,184 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from queue import Queue
+
+from github.GithubException import RateLimitExceededException
+
+from .. import mock
+from .. import unittest
+from kraft.cmd.list.provider.github_graphql import \
+    get_components_from_github_graphql
+from kraft.error import GitHubGraphQLError
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'github')
+
+
+class GitHubGraphQLStub(BaseHTTPRequestHandler):
+    """
+    Answers GraphQL queries with responses recorded from GitHub's API, keyed
+    by the pagination cursor of the query.
+    """
+    responses = dict()
+    requests = list()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(
+            int(self.headers['Content-Length'])
+        ).decode('utf-8'))
+        self.requests.append((dict(self.headers), body))
+
+        cursor = body["variables"].get("cursor", None)
+        response = self.responses.get(cursor or "null", None)
+        if response is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        payload = json.dumps(response).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GitHubGraphQLTestCase(unittest.TestCase):
+    origin = "https://github.com/unikraft/lib-*"
+
+    def setUp(self):
+        with open(os.path.join(FIXTURES, 'graphql_organization.json')) as f:
+            GitHubGraphQLStub.responses = json.load(f)
+        GitHubGraphQLStub.requests = list()
+
+        self.server = HTTPServer(('127.0.0.1', 0), GitHubGraphQLStub)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+        self.ctx = mock.Mock()
+        self.ctx.obj.env = {
+            'UK_KRAFT_GITHUB_TOKEN': 'token',
+            'UK_KRAFT_GITHUB_GRAPHQL': 'http://127.0.0.1:%d/graphql' %
+            self.server.server_address[1]
+        }
+        self.ctx.obj.cache.get.return_value = None
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def probe(self):
+        items = get_components_from_github_graphql(
+            self.ctx, self.origin, "unikraft", "lib-*", Queue()
+        )
+
+        return {item.name: item for item in list(items.queue)}
+
+    def test_paginated_organization(self):
+        items = self.probe()
+
+        # Both pages are fetched and non-matching repositories are skipped
+        organizations = [
+            body for _, body in GitHubGraphQLStub.requests
+            if "organization" in body["query"]
+        ]
+        assert len(organizations) == 2
+        assert sorted(items.keys()) == ["lwip", "newlib"]
+
+        headers, _ = GitHubGraphQLStub.requests[0]
+        assert headers['Authorization'] == 'bearer token'
+
+    def test_versions_from_tags_and_releases(self):
+        newlib = self.probe()["newlib"]
+
+        assert newlib.pushed_at == "2020-07-10T12:00:00Z"
+        assert sorted(newlib.dists.keys()) == ["stable", "staging"]
+
+        stable = newlib.get_distribution("stable")
+        assert sorted(stable.versions.keys()) == ["0.3", "0.4", "0.5"]
+        assert stable.get_version("0.4").tarball == \
+            "https://github.com/unikraft/lib-newlib/archive/RELEASE-0.4.tar.gz"
+
+        staging = newlib.get_distribution("staging")
+        assert list(staging.versions.keys()) == ["0b9c8d7"]
+
+    def test_paginated_refs(self):
+        self.probe()
+
+        # Only the tags of lib-newlib span more than one page
+        refs = [
+            body for _, body in GitHubGraphQLStub.requests
+            if "organization" not in body["query"]
+        ]
+        assert len(refs) == 1
+        assert refs[0]["variables"] == {
+            "org": "unikraft",
+            "repo": "lib-newlib",
+            "prefix": "refs/tags/",
+            "cursor": "dGFnczoy"
+        }
+
+    def test_unchanged_repository_is_reused(self):
+        cached = self.probe()["lwip"]
+
+        manifest = mock.Mock()
+        manifest.get_item.side_effect = \
+            lambda name: cached if name == "lwip" else None
+        self.ctx.obj.cache.get.return_value = manifest
+
+        assert self.probe()["lwip"] is cached
+
+    def test_rate_limited(self):
+        GitHubGraphQLStub.responses = {"null": {
+            "errors": [{"type": "RATE_LIMITED", "message": "limited"}]
+        }}
+
+        with self.assertRaises(RateLimitExceededException):
+            self.probe()
+
+    def test_query_error(self):
+        GitHubGraphQLStub.responses = {"null": {
+            "errors": [{"message": "Could not resolve to an Organization"}]
+        }}
+
+        with self.assertRaises(GitHubGraphQLError):
+            self.probe()
@@ -0,0 +1,203 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import datetime
+import time
+from queue import Queue
+
+import click
+from github.GithubException import RateLimitExceededException
+from github.Repository import Repository
+
+from .. import mock
+from .. import unittest
+from kraft.cmd.list.provider.github import get_component_from_github
+from kraft.cmd.list.provider.github import get_components_from_github
+from kraft.cmd.list.provider.github import GitHubRateLimit
+from kraft.manifest import Manifest
+from kraft.manifest import ManifestItem
+from kraft.types import ComponentType
+from kraft.util import ConcurrencyBudget
+
+
+def rate_limit_exceeded(headers):
+    return RateLimitExceededException(403, {"message": "rate limited"}, headers)
+
+
+class GitHubRateLimitTestCase(unittest.TestCase):
+    def setUp(self):
+        self.github_api = mock.Mock(
+            rate_limiting=(5000, 5000),
+            rate_limiting_resettime=int(time.time()) + 3600
+        )
+
+    @mock.patch('kraft.cmd.list.provider.github.time.sleep')
+    def test_retry_after_backoff(self, sleep):
+        fn = mock.Mock(side_effect=[
+            rate_limit_exceeded({"Retry-After": "2"}),
+            "item"
+        ])
+
+        ratelimit = GitHubRateLimit(self.github_api)
+        assert ratelimit.call(fn) == "item"
+        assert not ratelimit.exceeded
+        sleep.assert_called_once_with(2)
+
+    @mock.patch('kraft.cmd.list.provider.github.time.sleep')
+    def test_exceeded_until_reset(self, sleep):
+        fn = mock.Mock(side_effect=rate_limit_exceeded({}))
+
+        ratelimit = GitHubRateLimit(self.github_api)
+        assert ratelimit.call(fn) is None
+        assert ratelimit.exceeded
+
+        # Once exceeded, no further requests are made
+        assert ratelimit.call(fn) is None
+        assert fn.call_count == 1
+        sleep.assert_not_called()
+
+    @mock.patch('kraft.cmd.list.provider.github.time.sleep')
+    def test_throttle_when_running_low(self, sleep):
+        self.github_api.rate_limiting = (10, 5000)
+        self.github_api.rate_limiting_resettime = int(time.time()) + 100
+
+        ratelimit = GitHubRateLimit(self.github_api, reserve=20)
+        ratelimit.call(mock.Mock(return_value="item"))
+
+        assert sleep.call_count == 1
+        assert 0 < sleep.call_args[0][0] <= 10
+
+
+class GetComponentFromGitHubTestCase(unittest.TestCase):
+    origin = "https://github.com/unikraft/lib-*"
+
+    def setUp(self):
+        self.repo = mock.Mock(spec=Repository)
+        self.repo.name = "lib-newlib"
+        self.repo.pushed_at = datetime.datetime(2020, 1, 1)
+
+        self.manifest = Manifest(manifest=self.origin)
+        self.manifest.add_item(ManifestItem(
+            name="newlib",
+            type=ComponentType.LIB.shortname,
+            provider="github",
+            manifest=self.origin,
+            pushed_at="2020-01-01T00:00:00Z"
+        ))
+
+    def test_unchanged_repo_is_not_enumerated(self):
+        item = get_component_from_github(
+            mock.Mock(), self.origin, "unikraft", self.repo,
+            manifest=self.manifest
+        )
+
+        assert item is self.manifest.get_item("newlib")
+        self.repo.get_branches.assert_not_called()
+
+    def test_pushed_repo_is_enumerated(self):
+        self.repo.pushed_at = datetime.datetime(2020, 2, 1)
+        self.repo.get_branches.return_value = []
+
+        item = get_component_from_github(
+            mock.Mock(), self.origin, "unikraft", self.repo,
+            manifest=self.manifest
+        )
+
+        assert item is not self.manifest.get_item("newlib")
+        assert item.pushed_at == "2020-02-01T00:00:00Z"
+        self.repo.get_branches.assert_called_once()
+
+
+class GetComponentsFromGitHubTestCase(unittest.TestCase):
+    origin = "https://github.com/unikraft/lib-*"
+
+    def setUp(self):
+        self.repos = list()
+        for name in ["lib-newlib", "lib-lwip"]:
+            repo = mock.Mock(spec=Repository)
+            repo.name = name
+            self.repos.append(repo)
+
+        self.github_api = mock.Mock(
+            rate_limiting=(5000, 5000),
+            rate_limiting_resettime=int(time.time()) + 3600
+        )
+        self.github_api.get_organization.return_value.get_repos.return_value = \
+            self.repos
+
+        self.ctx = click.Context(click.Command('test'), obj=mock.Mock(
+            settings={},
+            cache=mock.Mock(**{'get.return_value': None})
+        ))
+
+    @mock.patch('kraft.cmd.list.provider.github.get_component_from_github')
+    def test_failing_repo_is_skipped(self, get_component):
+        def probe(ctx, origin, org, repo, github_api, manifest):
+            if repo.name == "lib-newlib":
+                raise ValueError("unexpected response")
+            return repo.name
+
+        get_component.side_effect = probe
+
+        items = Queue()
+        get_components_from_github(
+            self.ctx, self.origin, "unikraft", "lib-*", items,
+            github_api=self.github_api
+        )
+
+        assert list(items.queue) == ["lib-lwip"]
+
+    @mock.patch('kraft.cmd.list.provider.github.get_component_from_github')
+    def test_listing_starts_deadline(self, get_component):
+        get_component.side_effect = \
+            lambda ctx, origin, org, repo, github_api, manifest: repo.name
+
+        # The deadline of the origin starts once its repositories are listed
+        budget = ConcurrencyBudget()
+        started = list()
+
+        def get_repos():
+            started.append(budget.started)
+            return self.repos
+
+        self.github_api.get_organization.return_value.get_repos.side_effect = \
+            get_repos
+
+        items = Queue()
+        get_components_from_github(
+            self.ctx, self.origin, "unikraft", "lib-*", items,
+            github_api=self.github_api, budget=budget
+        )
+
+        assert started[0] is not None
+        assert sorted(items.queue) == ["lib-lwip", "lib-newlib"]
@@ -0,0 +1,127 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+
+from .. import mock
+from .. import unittest
+from kraft.util import http_get
+from kraft.util import http_reset
+from kraft.util import http_session
+from kraft.util import http_stats
+
+
+class HTTPStub(BaseHTTPRequestHandler):
+    """
+    Keeps connections alive and fails the first `failures` requests.
+    """
+    protocol_version = 'HTTP/1.1'
+    failures = 0
+    requests = 0
+
+    def do_GET(self):
+        HTTPStub.requests += 1
+
+        if HTTPStub.requests <= HTTPStub.failures:
+            self.send_response(503)
+            payload = b'unavailable'
+        else:
+            self.send_response(200)
+            payload = b'ok'
+
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HTTPSessionTestCase(unittest.TestCase):
+    def setUp(self):
+        HTTPStub.failures = 0
+        HTTPStub.requests = 0
+
+        self.server = HTTPServer(('127.0.0.1', 0), HTTPStub)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.host = '127.0.0.1:%d' % self.server.server_address[1]
+        self.url = 'http://%s/' % self.host
+
+        # Retries are not delayed so that the tests run quickly
+        self.backoff = mock.patch('kraft.util.http.HTTP_RETRY_BACKOFF', 0)
+        self.backoff.start()
+        http_reset()
+
+    def tearDown(self):
+        # Pooled connections are closed first so that the server can stop
+        http_reset()
+        self.backoff.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_session_is_shared(self):
+        assert http_session() is http_session()
+        assert http_stats() == dict()
+
+    def test_connections_are_reused(self):
+        for _ in range(3):
+            assert http_get(self.url).content == b'ok'
+
+        stats = http_stats()[self.host]
+        assert stats['requests'] == 3
+        assert stats['connections'] == 1
+
+    def test_server_errors_are_retried(self):
+        HTTPStub.failures = 2
+
+        response = http_get(self.url)
+        assert response.status_code == 200
+        assert HTTPStub.requests == 3
+        assert http_stats()[self.host]['retries'] == 2
+
+    def test_retries_are_bounded(self):
+        HTTPStub.failures = 10
+
+        response = http_get(self.url)
+        assert response.status_code == 503
+        assert HTTPStub.requests == 4
+
+    def test_default_timeout(self):
+        with mock.patch.object(http_session(), 'request') as request:
+            http_get(self.url)
+
+        assert request.call_args[1]['timeout'] == 30
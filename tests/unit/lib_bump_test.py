@@ -0,0 +1,189 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import click
+
+from .. import mock
+from .. import unittest
+from kraft.cmd.lib.bump import kraft_lib_bump_all
+from kraft.const import MAKEFILE_UK
+from kraft.error import LibraryBuildError
+from kraft.lib import LibraryManager
+
+MAKEFILE_UK_TEMPLATE = """\
+$(eval $(call addlib_s,lib%(name)s,$(CONFIG_LIB%(kname)s)))
+LIB%(kname)s_VERSION = 1.0.0
+LIB%(kname)s_URL = https://example.org/%(name)s-$(LIB%(kname)s_VERSION).tar.gz
+"""
+
+
+class Overlap(object):
+    """
+    Records whether calls made from different threads were running at the
+    same time.
+    """
+
+    def __init__(self):
+        self.running = set()
+        self.lock = threading.Lock()
+        self.overlapped = threading.Event()
+
+    def __call__(self, key):
+        with self.lock:
+            self.running.add(key)
+            if len(self.running) > 1:
+                self.overlapped.set()
+
+        time.sleep(0.1)
+
+        with self.lock:
+            self.running.discard(key)
+
+
+class LibBumpTestCase(unittest.TestCase):
+    def setUp(self):
+        self.libsdir = tempfile.mkdtemp()
+        for name in ["lwip", "newlib", "zlib"]:
+            os.makedirs(os.path.join(self.libsdir, name))
+            with open(os.path.join(self.libsdir, name, MAKEFILE_UK), 'w') as f:
+                f.write(MAKEFILE_UK_TEMPLATE % {
+                    "name": name,
+                    "kname": name.upper()
+                })
+
+        # Not a library
+        os.makedirs(os.path.join(self.libsdir, "scratch"))
+
+        cache = mock.Mock()
+        cache.find_items_by_names.side_effect = lambda specs: {
+            spec: None for spec in specs
+        }
+        cache.find_item_by_localdir.return_value = None
+
+        self.ctx = click.Context(click.Command('test'), obj=mock.Mock(
+            cache=cache,
+            assume_yes=True,
+            settings=dict(),
+            env={'UK_LIBS': self.libsdir}
+        ))
+        self.ctx.__enter__()
+
+        self.probes = Overlap()
+        probes = self.probes
+
+        class Provider(object):
+            def __init__(self, source=None, current_version=None):
+                self.source = source
+
+            def probe_remote_versions(self):
+                probes(self.source)
+                if "zlib" in self.source:
+                    raise IOError("unreachable")
+
+                return {"1.0.0": self.source, "1.1.0": self.source}
+
+        mock.patch(
+            'kraft.lib.provider.determine_lib_provider',
+            return_value=Provider
+        ).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.ctx.__exit__(None, None, None)
+        shutil.rmtree(self.libsdir)
+
+    def read_version(self, name):
+        with open(os.path.join(self.libsdir, name, MAKEFILE_UK)) as f:
+            for line in f:
+                if line.startswith("LIB%s_VERSION" % name.upper()):
+                    return line.split("=")[1].strip()
+
+    def test_from_libsdir(self):
+        libraries = LibraryManager.from_libsdir()
+        assert [lib.name for lib in libraries.all()] == [
+            "lwip", "newlib", "zlib"
+        ]
+
+    def test_remotes_are_probed_concurrently(self):
+        libraries = LibraryManager.from_libsdir()
+        errors = libraries.probe_remote_versions()
+
+        assert self.probes.overlapped.is_set()
+        assert [lib.name for lib, _ in errors] == ["zlib"]
+        assert libraries.get("lwip").remote_versions is not None
+
+    def test_bump_all(self):
+        assert kraft_lib_bump_all(fast_forward=True) is False
+
+        assert self.read_version("lwip") == "1.1.0"
+        assert self.read_version("newlib") == "1.1.0"
+        assert self.read_version("zlib") == "1.0.0"
+
+    def test_bump_all_builds_concurrently(self):
+        builds = Overlap()
+
+        templatedirs = list()
+
+        def build(lib, templatedir=None):
+            builds(lib.name)
+            templatedirs.append(templatedir)
+            if lib.name == "newlib":
+                raise LibraryBuildError(lib.name, 2)
+
+        templatedir = tempfile.mkdtemp()
+        with mock.patch('kraft.cmd.lib.bump.kraft_lib_build', build), \
+                mock.patch('kraft.cmd.lib.bump.kraft_lib_build_template',
+                           return_value=templatedir) as template, \
+                mock.patch('click.echo') as echo:
+            assert kraft_lib_bump_all(fast_forward=True, build=True) is False
+
+        assert builds.overlapped.is_set()
+
+        # The template application is fetched once and shared by all builds
+        assert template.call_count == 1
+        assert templatedirs == [templatedir, templatedir]
+        assert not os.path.exists(templatedir)
+
+        report = click.unstyle(echo.call_args[0][0]).split("\n")
+        assert [line.split("\t")[0].strip() for line in report] == [
+            "LIBRARY", "lwip", "newlib", "zlib"
+        ]
+        assert "bumped and built" in report[1]
+        assert "build failed" in report[2]
+        assert "unreachable" in report[3]
@@ -0,0 +1,286 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import glob
+import os
+import shutil
+import tempfile
+
+from .. import mock
+from .. import unittest
+from kraft.error import UnsupportedMakefileConstruct
+from kraft.util import make as make_util
+from kraft.util import make_list_vars
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'makefiles')
+
+# The call to the shell means make has to be run to read this Makefile
+MAKEFILE_UK = """\
+LIBLWIP_VERSION=2.1.2
+LIBLWIP_URL=http://download.savannah.nongnu.org/releases/lwip/lwip-$(LIBLWIP_VERSION).zip
+LIBLWIP_MAJOR := $(shell echo 2)
+"""
+
+
+class MakeListVarsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cachedir = os.path.join(self.tmpdir, "cache")
+        self.makefile = os.path.join(self.tmpdir, "Makefile.uk")
+        self.write(MAKEFILE_UK)
+
+        make_util._make_vars.clear()
+        self.dump = mock.patch.object(
+            make_util, 'make_dump_vars', wraps=make_util.make_dump_vars
+        ).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        make_util._make_vars.clear()
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, content):
+        with open(self.makefile, 'w') as f:
+            f.write(content)
+
+    def list_vars(self):
+        return make_list_vars(
+            self.makefile, origin=['makefile'], cachedir=self.cachedir
+        )['makefile']
+
+    def test_parse(self):
+        variables = self.list_vars()
+        assert variables['LIBLWIP_VERSION'] == '2.1.2'
+        assert variables['LIBLWIP_URL'].endswith('lwip-$(LIBLWIP_VERSION).zip')
+        assert variables['LIBLWIP_MAJOR'] == '2'
+
+    def test_cached_in_memory(self):
+        assert self.list_vars() == self.list_vars()
+        assert self.dump.call_count == 1
+
+    def test_cached_in_cachedir(self):
+        variables = self.list_vars()
+        assert len(os.listdir(os.path.join(self.cachedir, "make"))) == 1
+
+        # Another kraft process does not need to run make again
+        make_util._make_vars.clear()
+        assert self.list_vars() == variables
+        assert self.dump.call_count == 1
+
+    def test_changed_makefile(self):
+        self.list_vars()
+        self.write(MAKEFILE_UK.replace('2.1.2', '2.1.3'))
+
+        assert self.list_vars()['LIBLWIP_VERSION'] == '2.1.3'
+        assert self.dump.call_count == 2
+
+    def test_changed_environment(self):
+        self.list_vars()
+
+        with mock.patch.dict(os.environ, {'UK_ARCH': 'arm64'}):
+            self.list_vars()
+            self.list_vars()
+
+        assert self.dump.call_count == 2
+
+    def test_referenced_environment(self):
+        self.write(MAKEFILE_UK + "LIBLWIP_HOME := $(KRAFT_TEST_HOME)\n")
+
+        with mock.patch.dict(os.environ, {'KRAFT_TEST_HOME': '/a'}):
+            assert self.list_vars()['LIBLWIP_HOME'] == '/a'
+        with mock.patch.dict(os.environ, {'KRAFT_TEST_HOME': '/b'}):
+            assert self.list_vars()['LIBLWIP_HOME'] == '/b'
+
+    def test_unreferenced_environment(self):
+        self.write(MAKEFILE_UK + "LIBLWIP_PATHS := $(LIBLWIP_BASE)/A\n")
+
+        # Only whole references count, and variables set by the shell are
+        # ignored
+        with mock.patch.dict(os.environ, {'A': '1', 'LIBLWIP': '1', '_': '/a'}):
+            self.list_vars()
+        with mock.patch.dict(os.environ, {'A': '2', 'LIBLWIP': '2', '_': '/b'}):
+            self.list_vars()
+
+        assert self.dump.call_count == 1
+
+    def test_make_references(self):
+        assert make_util.make_references(
+            b"A := $(B) ${C} $D $$E $(origin F) $(G:.c=.o)\n"
+            b"ifdef H\nendif\nifndef I\nendif\n"
+        ) == set(["B", "C", "D", "F", "G", "H", "I"])
+
+    def test_uncached_origin(self):
+        make_list_vars(self.makefile, origin=['environment'],
+                       cachedir=self.cachedir)
+        make_list_vars(self.makefile, origin=['environment'],
+                       cachedir=self.cachedir)
+        assert self.dump.call_count == 2
+        assert not os.path.exists(self.cachedir)
+
+    def test_parse_stops_after_variables(self):
+        lines = iter([
+            "# Variables\n",
+            "# makefile (from 'Makefile.uk', line 1)\n",
+            "A = 1\n",
+            "# variable set hash-table stats:\n",
+            "# Files\n",
+        ])
+
+        assert make_util.make_parse_vars(lines, ['makefile']) == {
+            'makefile': {'A': '1'}
+        }
+
+        # The rest of the database is never read
+        assert next(lines) == "# Files\n"
+
+
+class MakefileReaderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.makefile = os.path.join(self.tmpdir, "Makefile.uk")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read(self, content):
+        with open(self.makefile, 'w') as f:
+            f.write(content)
+
+        return make_util.make_read_vars(self.makefile)['makefile']
+
+    def assertUnsupported(self, content):
+        with self.assertRaises(UnsupportedMakefileConstruct):
+            self.read(content)
+
+    def test_assignments(self):
+        assert self.read(
+            "A = 1 # comment\n"
+            "B := [$(A)]\n"
+            "C = $(A)\n"
+            "C += $(B)\n"
+            "D ?= 2\n"
+            "D ?= 3\n"
+            "E :=\n"
+            "E += $(A)\n"
+            "F-$(CONFIG_F) += a \\\n"
+            "\tb\n"
+        ) == {
+            'A': '1',
+            'B': '[1 ]',
+            'C': '$(A) $(B)',
+            'D': '2',
+            'E': '1',
+            'F-': 'a b',
+        }
+
+    def test_conditionals(self):
+        assert self.read(
+            "A = y\n"
+            "ifeq ($(A),y)\n"
+            "  B = 1\n"
+            "  ifdef CONFIG_B\n"
+            "    C = 1\n"
+            "  else ifneq \"$(A)\" \"n\"\n"
+            "    C = 2\n"
+            "  else\n"
+            "    C = 3\n"
+            "  endif\n"
+            "else\n"
+            "  B = 2\n"
+            "endif\n"
+        ) == {'A': 'y', 'B': '1', 'C': '2'}
+
+    def test_library_registration(self):
+        assert self.read(
+            "$(eval $(call addlib_s,liblwip,$(CONFIG_LWIP)))\n"
+            "LIBLWIP_VERSION = 2.1.2\n"
+        ) == {'LIBLWIP_VERSION': '2.1.2'}
+
+    def test_unsupported(self):
+        self.assertUnsupported("A := $(shell echo 1)\n")
+        self.assertUnsupported("A := $(B:.c=.o)\n")
+        self.assertUnsupported("A != echo 1\n")
+        self.assertUnsupported("include other.uk\n")
+        self.assertUnsupported("define A\n1\nendef\n")
+        self.assertUnsupported("all: A\n")
+        self.assertUnsupported("A := $(CC)\n")
+        self.assertUnsupported("ifeq (a,b)\n")
+        self.assertUnsupported("F = 1\n$(eval $(call F))\n")
+
+    def test_environment(self):
+        with mock.patch.dict(os.environ, {'CONFIG_A': 'y'}):
+            self.assertUnsupported("B := $(CONFIG_A)\n")
+            self.assertUnsupported("CONFIG_A ?= n\n")
+            assert self.read("CONFIG_A = n\n") == {'CONFIG_A': 'n'}
+
+    def test_list_vars(self):
+        with mock.patch.object(make_util, 'make_dump_vars') as dump:
+            assert make_list_vars(
+                os.path.join(FIXTURES, 'zlib.uk'), origin=['makefile']
+            )['makefile']['LIBZLIB_VERSION'] == '1.2.11'
+
+        assert dump.call_count == 0
+
+        with mock.patch.object(make_util, 'make_dump_vars') as dump:
+            dump.return_value = {'makefile': {'LIBPYTHON3_VERSION': '3.7.4'}}
+            assert make_list_vars(
+                os.path.join(FIXTURES, 'python3.uk'), origin=['makefile']
+            )['makefile']['LIBPYTHON3_VERSION'] == '3.7.4'
+
+        assert dump.call_count == 1
+
+    @unittest.skipIf(shutil.which('make') is None, "make is not installed")
+    def test_corpus(self):
+        """
+        Each library Makefile which can be read without running make yields
+        the same variables as make does.
+        """
+        supported = 0
+
+        for makefile in sorted(glob.glob(os.path.join(FIXTURES, '*.uk'))):
+            expected = {
+                name: value for name, value in make_util.make_dump_vars(
+                    makefile, ['makefile']
+                )['makefile'].items()
+                if not make_util.MakefileReader(makefile).is_builtin(name)
+            }
+
+            try:
+                variables = make_util.make_read_vars(makefile)['makefile']
+            except UnsupportedMakefileConstruct:
+                continue
+
+            assert variables == expected, makefile
+            supported += 1
+
+        assert supported == 4
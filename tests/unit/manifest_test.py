@@ -0,0 +1,188 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import pickle
+from datetime import datetime
+
+import click
+
+from .. import mock
+from .. import unittest
+from kraft.error import UnknownManifestSchemaError
+from kraft.error import UnknownVersionError
+from kraft.manifest import Manifest
+from kraft.manifest import ManifestItem
+from kraft.manifest import ManifestItemDistribution
+from kraft.manifest import ManifestItemVersion
+from kraft.manifest import ManifestVersionEquality
+from kraft.types import ComponentType
+
+
+def make_distribution(name, *versions):
+    dist = ManifestItemDistribution(name=name)
+    for version in versions:
+        dist.add_version(ManifestItemVersion(
+            version=version,
+            git_sha="%s-sha" % version,
+            timestamp=datetime(2020, 1, 1)
+        ))
+
+    return dist
+
+
+class ManifestItemDistributionTestCase(unittest.TestCase):
+    def test_latest_is_ordered_by_semver(self):
+        dist = make_distribution("stable", "0.9", "0.10", "0.4.0", "0.10.0-rc1")
+        assert dist.latest.version == "0.10"
+
+    def test_latest_of_commits_is_the_first_added(self):
+        dist = make_distribution("staging", "4fd4a7b", "a5c9d1e")
+        assert dist.latest.version == "4fd4a7b"
+
+    def test_get_version_normalises_semver(self):
+        dist = make_distribution("stable", "0.4", "0.5.0")
+
+        assert dist.get_version("0.4").version == "0.4"
+        assert dist.get_version("0.4.0").version == "0.4"
+        assert dist.get_version("0.5").version == "0.5.0"
+        assert dist.get_version("0.6") is None
+        assert dist.get_version("4fd4a7b") is None
+
+    def test_find_version(self):
+        dist = make_distribution("stable", "0.9", "0.10")
+
+        assert dist.find_version("0.9").version == "0.9"
+        assert dist.find_version(
+            "0.9", ManifestVersionEquality.GT).version == "0.10"
+        assert dist.find_version("0.11", ManifestVersionEquality.GT) is None
+        assert dist.find_version("master", ManifestVersionEquality.GT) is None
+
+    def test_index_survives_pickling(self):
+        dist = pickle.loads(pickle.dumps(
+            make_distribution("stable", "0.9", "0.10", "0.2")
+        ))
+
+        assert dist.latest.version == "0.10"
+        assert dist.get_version("0.2.0").version == "0.2"
+
+        dist.add_version(ManifestItemVersion(version="0.11", git_sha="x"))
+        assert dist.latest.version == "0.11"
+
+
+class ManifestSchemaTestCase(unittest.TestCase):
+    def setUp(self):
+        self.manifest = Manifest(manifest="github.com/unikraft/*")
+        self.item = ManifestItem(
+            name="newlib",
+            type=ComponentType.LIB.shortname,
+            provider="github",
+            manifest=self.manifest.manifest,
+            last_checked=datetime(2020, 6, 1, 12, 30)
+        )
+        self.item.add_distribution(make_distribution("stable", "0.4", "0.5"))
+        self.manifest.add_item(self.item)
+
+    def test_roundtrip(self):
+        manifest = pickle.loads(pickle.dumps(self.manifest))
+        item = manifest.get_item("newlib")
+
+        assert item.type == ComponentType.LIB
+        assert item.last_checked == datetime(2020, 6, 1, 12, 30)
+        assert item.dists["stable"].latest.version == "0.5"
+        assert item.dists["stable"].get_version("0.4").timestamp == \
+            datetime(2020, 1, 1)
+
+    def test_load_unversioned_state(self):
+        item = ManifestItem.__new__(ManifestItem)
+        with mock.patch.object(ManifestItem, 'localdir', "/tmp/newlib"):
+            item.__setstate__(self.item.to_dict())
+
+        assert item.name == "newlib"
+        assert item.last_checked == datetime(2020, 6, 1, 12, 30)
+        assert item.dists["stable"].get_version("0.4").git_sha == "0.4-sha"
+        assert item.dists["stable"].latest.version == "0.5"
+
+    def test_unset_timestamps(self):
+        version = ManifestItemVersion.__new__(ManifestItemVersion)
+        version.__setstate__(ManifestItemVersion(version="0.4").to_dict())
+
+        assert version.timestamp is None
+
+    def test_unknown_schema(self):
+        state = list(self.item.__getstate__())
+        state[0] += 1
+
+        with self.assertRaises(UnknownManifestSchemaError):
+            ManifestItem.__new__(ManifestItem).__setstate__(tuple(state))
+
+
+class ManifestItemDownloadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.item = ManifestItem(
+            name="newlib",
+            type=ComponentType.LIB.shortname,
+            provider="github"
+        )
+        self.item.add_distribution(make_distribution("stable", "0.4", "0.9"))
+        self.item.add_distribution(make_distribution("staging", "0.10"))
+
+        self.ctx = click.Context(click.Command('test'), obj=mock.Mock())
+        self.ctx.__enter__()
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+
+    def download(self, version=None, equality=ManifestVersionEquality.EQ):
+        with mock.patch('kraft.cmd.list.provider.github.'
+                        'GitHubListProvider.download') as download:
+            self.item.download(
+                localdir="/tmp/newlib",
+                equality=equality,
+                version=version
+            )
+
+        return download.call_args[1]['version']
+
+    def test_exact_version(self):
+        assert self.download("0.4.0").version == "0.4"
+
+    def test_later_version_across_distributions(self):
+        assert self.download(
+            "0.5", ManifestVersionEquality.GT).version == "0.10"
+
+    def test_distribution_selects_its_latest(self):
+        assert self.download("stable").version == "0.9"
+
+    def test_unknown_version(self):
+        with self.assertRaises(UnknownVersionError):
+            self.download("0.11", ManifestVersionEquality.GT)
@@ -0,0 +1,118 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import threading
+
+import click
+
+from .. import mock
+from .. import unittest
+from kraft.cmd.list.pull import DownloadScheduler
+from kraft.const import KRAFTRC_LIST_CONCURRENCY
+from kraft.manifest import ManifestItem
+from kraft.types import ComponentType
+
+
+def make_item(name):
+    return ManifestItem(
+        name=name,
+        type=ComponentType.LIB.shortname,
+        provider="git",
+        manifest="origin"
+    )
+
+
+class DownloadSchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.settings = {
+            KRAFTRC_LIST_CONCURRENCY: 4,
+        }
+
+        obj = mock.Mock(verbose=False)
+        obj.settings.get.side_effect = \
+            lambda prop, default=None: self.settings.get(prop, default)
+
+        self.ctx = click.Context(click.Command('pull'), obj=obj)
+
+    def test_duplicates_are_scheduled_once(self):
+        scheduler = DownloadScheduler(workdir="/tmp/app")
+        newlib = make_item("newlib")
+
+        assert scheduler.add(newlib, 0, "1.0")
+        assert not scheduler.add(newlib, 0, "1.0")
+
+        # A different version to the same directory would race the first
+        assert not scheduler.add(newlib, 0, "2.0")
+        assert scheduler.add(make_item("lwip"), 0, "1.0")
+        assert len(scheduler.pending) == 2
+
+    def test_downloads_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+        downloaded = list()
+
+        def download(localdir=None, manifest=None, **kwargs):
+            # Each download only completes once all of them have started
+            barrier.wait()
+            downloaded.append(manifest.name)
+
+        scheduler = DownloadScheduler(workdir="/tmp/app")
+        for name in ["newlib", "lwip", "pthread-embedded"]:
+            scheduler.add(make_item(name), 0, None)
+
+        with mock.patch('kraft.cmd.list.pull.kraft_download_component',
+                        side_effect=download):
+            with self.ctx:
+                errors = scheduler.run()
+
+        assert errors == []
+        assert sorted(downloaded) == ["lwip", "newlib", "pthread-embedded"]
+        assert len(scheduler.pending) == 0
+
+        # Components which were already downloaded are not scheduled again
+        assert not scheduler.add(make_item("lwip"), 0, None)
+
+    def test_errors_are_collected(self):
+        def download(localdir=None, manifest=None, **kwargs):
+            if manifest.name == "lwip":
+                raise ValueError("unreachable")
+
+        scheduler = DownloadScheduler(workdir="/tmp/app")
+        scheduler.add(make_item("newlib"), 0, None)
+        scheduler.add(make_item("lwip"), 0, None)
+
+        with mock.patch('kraft.cmd.list.pull.kraft_download_component',
+                        side_effect=download):
+            with self.ctx:
+                errors = scheduler.run()
+
+        assert [(m.name, str(e)) for m, e in errors] == [("lwip", "unreachable")]
@@ -0,0 +1,315 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+
+import click
+
+from .. import mock
+from .. import unittest
+from kraft.cache import ArtifactCache
+from kraft.cmd.list.provider.tarball import tarball_download
+from kraft.cmd.list.provider.tarball import tarball_is_generated
+from kraft.cmd.list.provider.tarball import TarballListProvider
+from kraft.error import TarballChecksumError
+from kraft.error import UnsafeTarballError
+from kraft.manifest import ManifestItem
+from kraft.manifest import ManifestItemVersion
+
+
+def make_tarball(files, prefix="lib-newlib-0.1/"):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode='w:gz') as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(prefix + name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+    return buf.getvalue()
+
+
+class TarballStub(BaseHTTPRequestHandler):
+    """
+    Serves a single tarball and supports resuming with range requests.
+    """
+    tarball = b''
+    ranges = list()
+
+    def do_GET(self):
+        start = 0
+        if 'Range' in self.headers:
+            start = int(self.headers['Range'][len('bytes='):-1])
+            self.ranges.append(start)
+            self.send_response(206)
+        else:
+            self.send_response(200)
+
+        payload = self.tarball[start:]
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TarballDownloadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.archive = os.path.join(self.tmpdir, "cache", "newlib.tar.gz")
+        self.localdir = os.path.join(self.tmpdir, "libs", "newlib")
+
+        TarballStub.tarball = make_tarball({
+            "Makefile.uk": b"LIBNEWLIB_VERSION=0.1\n",
+            "src/newlib.c": os.urandom(4096),
+        })
+        TarballStub.ranges = list()
+
+        self.server = HTTPServer(('127.0.0.1', 0), TarballStub)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = 'http://127.0.0.1:%d/0.1.tar.gz' % \
+            self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.tmpdir)
+
+    def download(self, **kwargs):
+        return tarball_download(
+            url=self.url,
+            archive=self.archive,
+            localdir=self.localdir,
+            **kwargs
+        )
+
+    def test_download_and_extract(self):
+        checksum, size = self.download()
+
+        assert checksum == hashlib.sha256(TarballStub.tarball).hexdigest()
+        assert size == len(TarballStub.tarball)
+        assert os.path.exists(self.archive)
+
+        # The top-level directory of the tarball is stripped
+        assert os.path.exists(os.path.join(self.localdir, "Makefile.uk"))
+        assert os.path.exists(os.path.join(self.localdir, "src", "newlib.c"))
+        assert os.listdir(os.path.dirname(self.localdir)) == ["newlib"]
+
+    def test_resume_partial_download(self):
+        os.makedirs(os.path.dirname(self.archive))
+        with open("%s.part" % self.archive, 'wb') as f:
+            f.write(TarballStub.tarball[:100])
+
+        checksum, _ = self.download()
+
+        assert TarballStub.ranges == [100]
+        assert checksum == hashlib.sha256(TarballStub.tarball).hexdigest()
+        assert os.path.exists(os.path.join(self.localdir, "Makefile.uk"))
+
+    def test_checksum_mismatch(self):
+        with self.assertRaises(TarballChecksumError):
+            self.download(checksum="0" * 64)
+
+        # Nothing is extracted and the bad tarball is not kept
+        assert not os.path.exists(self.localdir)
+        assert not os.path.exists(self.archive)
+
+    def test_cached_tarball_mismatch_is_kept(self):
+        self.download()
+        shutil.rmtree(self.localdir)
+
+        # The archive belongs to whoever placed it there
+        with self.assertRaises(TarballChecksumError):
+            self.download(checksum="0" * 64)
+
+        assert os.path.exists(self.archive)
+        assert not os.path.exists(self.localdir)
+
+    def test_cached_tarball_is_verified(self):
+        checksum, _ = self.download()
+        shutil.rmtree(self.localdir)
+
+        TarballStub.tarball = b''
+        assert self.download(checksum=checksum)[0] == checksum
+        assert os.path.exists(os.path.join(self.localdir, "Makefile.uk"))
+
+    def test_unsafe_member(self):
+        TarballStub.tarball = make_tarball({"../escape": b"x"}, prefix="")
+
+        with self.assertRaises(UnsafeTarballError):
+            self.download()
+
+        assert not os.path.exists(os.path.join(self.tmpdir, "libs", "escape"))
+        assert not os.path.exists(os.path.join(self.tmpdir, "escape"))
+
+    def provider_context(self):
+        return click.Context(click.Command('pull'), obj=mock.Mock(
+            artifacts=ArtifactCache(os.path.join(self.tmpdir, "cache"))
+        ))
+
+    def test_checksum_is_remembered(self):
+        item = ManifestItem(
+            name="newlib",
+            type="lib",
+            provider="github",
+            manifest="origin"
+        )
+        version = ManifestItemVersion(version="0.1", tarball=self.url)
+
+        ctx = self.provider_context()
+        artifacts = ctx.obj.artifacts
+        with ctx:
+            TarballListProvider().download(
+                manifest=item,
+                localdir=self.localdir,
+                version=version
+            )
+
+        assert version.tarball_checksum == \
+            hashlib.sha256(TarballStub.tarball).hexdigest()
+        assert version.tarball_size == len(TarballStub.tarball)
+        ctx.obj.cache.save_item.assert_called_once_with("origin", item)
+
+        # The tarball is kept in the artifact cache and re-used from there
+        assert artifacts.lookup(self.url) == \
+            artifacts.path(version.tarball_checksum)
+
+        TarballStub.tarball = b''
+        shutil.rmtree(self.localdir)
+        with ctx:
+            TarballListProvider().download(
+                manifest=item,
+                localdir=self.localdir,
+                version=version
+            )
+
+        assert os.path.exists(os.path.join(self.localdir, "Makefile.uk"))
+
+    def test_pinned_checksum_mismatch(self):
+        item = ManifestItem(name="newlib", type="lib", manifest="origin")
+        version = ManifestItemVersion(
+            version="0.1", tarball=self.url, tarball_checksum="0" * 64
+        )
+
+        with self.provider_context() as ctx:
+            with self.assertRaises(TarballChecksumError):
+                TarballListProvider().download(
+                    manifest=item,
+                    localdir=self.localdir,
+                    version=version
+                )
+
+        assert version.tarball_checksum == "0" * 64
+        ctx.obj.cache.save_item.assert_not_called()
+
+    def test_corrupted_artifact_is_removed(self):
+        item = ManifestItem(name="newlib", type="lib", manifest="origin")
+        checksum = hashlib.sha256(TarballStub.tarball).hexdigest()
+        version = ManifestItemVersion(
+            version="0.1", tarball=self.url, tarball_checksum=checksum
+        )
+
+        ctx = self.provider_context()
+        artifacts = ctx.obj.artifacts
+        archive = artifacts.incoming(self.url)
+        with open(archive, 'wb') as f:
+            f.write(make_tarball({"Makefile.uk": b"corrupted\n"}))
+        artifacts.add(self.url, checksum, archive)
+
+        with ctx:
+            with self.assertRaises(TarballChecksumError):
+                TarballListProvider().download(
+                    manifest=item,
+                    localdir=self.localdir,
+                    version=version
+                )
+
+        assert not os.path.exists(artifacts.path(checksum))
+        assert artifacts.entries() == []
+
+        # The next download fetches the tarball again
+        with ctx:
+            TarballListProvider().download(
+                manifest=item,
+                localdir=self.localdir,
+                version=version
+            )
+
+        assert artifacts.lookup(self.url, checksum) == artifacts.path(checksum)
+
+    @mock.patch('kraft.cmd.list.provider.tarball.tarball_is_generated',
+                return_value=True)
+    def test_generated_archive_checksum_is_replaced(self, is_generated):
+        item = ManifestItem(name="newlib", type="lib", manifest="origin")
+        version = ManifestItemVersion(
+            version="0.1", tarball=self.url, tarball_checksum="0" * 64
+        )
+
+        with self.provider_context() as ctx:
+            TarballListProvider().download(
+                manifest=item,
+                localdir=self.localdir,
+                version=version
+            )
+
+        assert os.path.exists(os.path.join(self.localdir, "Makefile.uk"))
+        assert version.tarball_checksum == \
+            hashlib.sha256(TarballStub.tarball).hexdigest()
+        ctx.obj.cache.save_item.assert_called_once_with("origin", item)
+
+
+class TarballIsGeneratedTestCase(unittest.TestCase):
+    def test_github_archives(self):
+        assert tarball_is_generated(
+            "https://github.com/unikraft/lib-newlib/archive/RELEASE-0.4.tar.gz"
+        )
+        assert tarball_is_generated(
+            "https://codeload.github.com/unikraft/lib-newlib/tar.gz/stable"
+        )
+        assert not tarball_is_generated(
+            "https://github.com/unikraft/lib-newlib/releases/download/"
+            "RELEASE-0.4/lib-newlib-0.4.tar.gz"
+        )
+        assert not tarball_is_generated(
+            "https://sourceware.org/pub/newlib/newlib-2.5.0.tar.gz"
+        )
@@ -0,0 +1,160 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from queue import Queue
+
+import click
+
+from .. import mock
+from .. import unittest
+from kraft.cache import Cache
+from kraft.cmd.list.update import kraft_update
+from kraft.const import KRAFTRC_LIST_CONCURRENCY
+from kraft.const import KRAFTRC_LIST_ORIGINS
+from kraft.const import KRAFTRC_LIST_TIMEOUT
+from kraft.const import MANIFEST_SCHEMA_VERSION
+from kraft.error import UnknownManifestSchemaError
+from kraft.manifest import Manifest
+from kraft.manifest import ManifestItem
+from kraft.types import ComponentType
+
+
+class KraftUpdateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.settings = {
+            KRAFTRC_LIST_ORIGINS: ["fast", "slow", "broken"],
+            KRAFTRC_LIST_CONCURRENCY: 2,
+            KRAFTRC_LIST_TIMEOUT: 1,
+        }
+        self.release = threading.Event()
+
+        obj = mock.Mock(verbose=False)
+        obj.settings.get.side_effect = \
+            lambda prop, default=None: self.settings.get(prop, default)
+        obj.cache.get.return_value = None
+
+        self.ctx = click.Context(click.Command('update'), obj=obj)
+
+    def tearDown(self):
+        self.release.set()
+
+    def probe(self, origin=None, budget=None):
+        if origin == "broken":
+            raise ValueError("unreachable")
+        with budget:
+            if origin == "slow":
+                self.release.wait()
+            if origin.startswith("queued"):
+                time.sleep(0.6)
+
+        items = Queue()
+        items.put(ManifestItem(
+            name="%s-lib" % origin,
+            type=ComponentType.LIB.shortname,
+            provider="git",
+            manifest=origin
+        ))
+        return [], items
+
+    def test_origins_are_reported_independently(self):
+        with mock.patch('kraft.cmd.list.update.kraft_update_from_source_threads',
+                        side_effect=self.probe):
+            with self.ctx:
+                with self.assertRaises(SystemExit):
+                    kraft_update()
+
+        # The fast origin is saved even though the others did not complete
+        saved = [c[0][0] for c in self.ctx.obj.cache.save.call_args_list]
+        assert saved == ["fast"]
+
+    def test_deadline_starts_with_each_origin(self):
+        # The second origin waits for the only slot, but is not timed out as
+        # its own run is shorter than the timeout
+        self.settings[KRAFTRC_LIST_ORIGINS] = ["queued-a", "queued-b"]
+        self.settings[KRAFTRC_LIST_CONCURRENCY] = 1
+
+        with mock.patch('kraft.cmd.list.update.kraft_update_from_source_threads',
+                        side_effect=self.probe):
+            with self.ctx:
+                kraft_update()
+
+        saved = sorted(c[0][0] for c in self.ctx.obj.cache.save.call_args_list)
+        assert saved == ["queued-a", "queued-b"]
+
+    def test_origin_which_dies_is_reported(self):
+        self.settings[KRAFTRC_LIST_ORIGINS] = ["fast", "dying"]
+
+        def probe(origin=None, budget=None):
+            if origin == "dying":
+                raise SystemExit(1)
+            return self.probe(origin, budget)
+
+        with mock.patch('kraft.cmd.list.update.kraft_update_from_source_threads',
+                        side_effect=probe):
+            with self.ctx:
+                with self.assertRaises(SystemExit):
+                    kraft_update()
+
+        saved = [c[0][0] for c in self.ctx.obj.cache.save.call_args_list]
+        assert saved == ["fast"]
+
+    def test_newer_schema_is_rebuilt(self):
+        cachedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cachedir)
+        self.ctx.obj.workdir = cachedir
+        self.ctx.obj.env = {'UK_LIBS': os.path.join(cachedir, 'libs')}
+        self.settings[KRAFTRC_LIST_ORIGINS] = ["fast"]
+
+        with self.ctx:
+            # An entry written by a newer version of kraft
+            with mock.patch('kraft.manifest.manifest.MANIFEST_SCHEMA_VERSION',
+                            MANIFEST_SCHEMA_VERSION + 1):
+                Cache({'UK_CACHEDIR': cachedir}).save(
+                    "fast", Manifest(manifest="fast")
+                )
+
+            self.ctx.obj.cache = Cache({'UK_CACHEDIR': cachedir})
+            with self.assertRaises(UnknownManifestSchemaError):
+                self.ctx.obj.cache.get("fast")
+
+            with mock.patch('kraft.cmd.list.update.kraft_update_from_source_threads',
+                            side_effect=self.probe):
+                kraft_update()
+
+        manifest = Cache({'UK_CACHEDIR': cachedir}).get("fast")
+        assert [name for name, _ in manifest.items()] == ["fast-lib"]
@@ -0,0 +1,97 @@
+# SPDX-License-Identifier: BSD-3-Clause
+#
+# Authors: Alexander Jung <alexander.jung@neclab.eu>
+#
+# Copyright (c) 2020, NEC Europe Ltd., NEC Corporation. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import shutil
+import tempfile
+
+from git import GitCommandError
+from git import Repo as GitRepo
+
+from .. import mock
+from .. import unittest
+from kraft.util import git_ls_remote
+from kraft.util import parse_size
+from kraft.util import pretty_size
+
+
+class GitLsRemoteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.remote = tempfile.mkdtemp()
+        repo = GitRepo.init(self.remote)
+        with repo.config_writer() as config:
+            config.set_value("user", "name", "kraft")
+            config.set_value("user", "email", "kraft@localhost")
+        repo.index.commit("Initial commit")
+
+    def tearDown(self):
+        shutil.rmtree(self.remote)
+
+    def test_one_round_trip_per_remote(self):
+        with mock.patch('git.cmd.Git.ls_remote',
+                        return_value="sha\trefs/heads/master") as ls_remote:
+            for _ in range(3):
+                git_ls_remote("https://example.com/unikraft/lib-newlib.git")
+
+        assert ls_remote.call_count == 1
+
+    def test_expired(self):
+        refs = git_ls_remote(self.remote, ttl=0)
+        assert "refs/heads/" in refs
+
+        GitRepo(self.remote).create_tag("RELEASE-0.1")
+        assert "refs/tags/RELEASE-0.1" in git_ls_remote(self.remote, ttl=0)
+
+    def test_failures_are_shared(self):
+        with mock.patch('git.cmd.Git.ls_remote',
+                        side_effect=GitCommandError("ls-remote", 128)) \
+                as ls_remote:
+            for _ in range(2):
+                with self.assertRaises(GitCommandError):
+                    git_ls_remote("https://example.com/unikraft/missing.git")
+
+        assert ls_remote.call_count == 1
+
+
+class SizeTestCase(unittest.TestCase):
+    def test_parse_size(self):
+        assert parse_size("100") == 100
+        assert parse_size("512M") == 512 * 1024 * 1024
+        assert parse_size("2GiB") == 2 * 1024 * 1024 * 1024
+        assert parse_size(None) is None
+
+        with self.assertRaises(ValueError):
+            parse_size("lots")
+
+    def test_pretty_size(self):
+        assert pretty_size(100) == "100B"
+        assert pretty_size(1536) == "1.5K"